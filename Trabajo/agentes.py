@@ -0,0 +1,94 @@
+# agentes.py
+# Jugadores controlados por la computadora. Un agente recibe el juego en curso
+# y devuelve la jugada del jugador actual (o None para pasar). Debe dejar el
+# juego exactamente como lo recibió (puede usar jugar/deshacer para explorar).
+import ast
+import random
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Protocol, Tuple
+from mesa import Jugada
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+class Agente(Protocol):
+    nombre: str
+
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        """Devuelve la jugada para juego.jugador_actual(), o None para pasar."""
+        ...
+
+    def informe(self) -> Dict[str, Any]:
+        """Estadísticas de la última decisión (para mostrar o registrar)."""
+        ...
+
+class AgenteAleatorio:
+    """Elige al azar entre todas las jugadas legales (o las más grandes primero)."""
+    def __init__(self, semilla: Optional[int] = None, grandes_primero: bool = False):
+        self.nombre = "aleatorio" if not grandes_primero else "codicioso"
+        self.rng = random.Random(semilla)
+        self.grandes_primero = grandes_primero
+
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        jugador = juego.jugador_actual()
+        if self.grandes_primero:
+            return juego.mesa.jugada_aleatoria(jugador.simbolo, jugador.piezas_disponibles,
+                                               self.rng, grandes_primero=True)
+        jugadas = juego.jugadas_legales(jugador)
+        return self.rng.choice(jugadas) if jugadas else None
+
+    def informe(self) -> Dict[str, Any]:
+        return {}
+
+# ---------------- registro de estrategias ----------------
+def _crear_mcts(semilla: Optional[int] = None, **opciones) -> Agente:
+    from mcts import AgenteMCTS
+    # con un presupuesto en simulaciones el resultado no depende del reloj
+    if "max_playouts" in opciones:
+        opciones.setdefault("tiempo_limite", None)
+    return AgenteMCTS(semilla=semilla, **opciones)
+
+def _crear_busqueda(semilla: Optional[int] = None, **opciones) -> Agente:
+    from busqueda import AgenteBusqueda
+    # con una profundidad fija el resultado no depende del reloj
+    if "profundidad" in opciones:
+        opciones.setdefault("tiempo_limite", None)
+    return AgenteBusqueda(semilla=semilla, **opciones)
+
+def _crear_guiado(semilla: Optional[int] = None, **opciones) -> Agente:
+    from mcts_guiado import AgenteGuiado
+    if "max_playouts" in opciones:
+        opciones.setdefault("tiempo_limite", None)
+    return AgenteGuiado(semilla=semilla, **opciones)
+
+ESTRATEGIAS: Dict[str, Callable[..., Agente]] = {
+    "aleatorio": lambda semilla=None, **o: AgenteAleatorio(semilla, **o),
+    "codicioso": lambda semilla=None, **o: AgenteAleatorio(semilla, grandes_primero=True, **o),
+    "mcts": _crear_mcts,
+    "busqueda": _crear_busqueda,
+    "guiado": _crear_guiado,
+}
+
+def _valor(texto: str) -> Any:
+    try:
+        return ast.literal_eval(texto)
+    except (ValueError, SyntaxError):
+        return texto
+
+def parsear_estrategia(especificacion: str) -> Tuple[str, Dict[str, Any]]:
+    """'mcts:max_playouts=200,c=1.0' -> ('mcts', {'max_playouts': 200, 'c': 1.0})"""
+    nombre, _, resto = especificacion.partition(":")
+    nombre = nombre.strip().lower()
+    if nombre not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {nombre} (disponibles: {', '.join(ESTRATEGIAS)})")
+    opciones: Dict[str, Any] = {}
+    for par in filter(None, (p.strip() for p in resto.split(","))):
+        clave, igual, valor = par.partition("=")
+        if not igual:
+            raise ValueError(f"Opción mal formada en '{especificacion}': {par}")
+        opciones[clave.strip()] = _valor(valor.strip())
+    return nombre, opciones
+
+def crear_agente(especificacion: str, semilla: Optional[int] = None) -> Agente:
+    """Construye un agente a partir de 'nombre[:clave=valor,...]'."""
+    nombre, opciones = parsear_estrategia(especificacion)
+    return ESTRATEGIAS[nombre](semilla=semilla, **opciones)
@@ -0,0 +1,304 @@
+# benchmark.py
+# Suite de rendimiento reproducible (semillas fijas + posiciones guardadas).
+#
+# Uso:
+#   python benchmark.py                          # imprime resultados JSON
+#   python benchmark.py --salida base.json       # guarda una línea base
+#   python benchmark.py --comparar base.json     # marca regresiones (sale con 1)
+#   python benchmark.py --generar-posiciones     # regenera posiciones_bench.json
+#
+# Cada métrica es {"valor", "unidad", "mayor_es_mejor"}; cada medición toma
+# el mejor de varias repeticiones para reducir el ruido.
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from motor import Motor
+from repositorio_piezas import PIEZAS, RepositorioPiezas
+
+RUTA_POSICIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "posiciones_bench.json")
+# acciones jugadas antes de cortar cada fase, según el número de jugadores
+FASES = {2: {"apertura": 4, "medio": 18, "final": 34},
+         4: {"apertura": 4, "medio": 28, "final": 56}}
+SEMILLA = 12345
+REPETICIONES = 3
+
+Metricas = Dict[str, Dict[str, Any]]
+
+# ---------------- posiciones guardadas ----------------
+def generar_posiciones(ruta: str = RUTA_POSICIONES) -> Dict[str, Any]:
+    """Partidas al azar con semilla fija, cortadas en cada fase, para 2 y 4 jugadores."""
+    posiciones: Dict[str, Any] = {}
+    for jugadores, fases in FASES.items():
+        for fase, acciones in fases.items():
+            lista = []
+            for k in range(3):
+                motor = Motor(num_jugadores=jugadores)
+                rng = random.Random(SEMILLA + 100 * jugadores + k)
+                while len(motor.historial) < acciones and not motor.terminado():
+                    jugadas = motor.jugadas_legales()
+                    if jugadas:
+                        motor.jugar(rng.choice(jugadas))
+                    else:
+                        motor.pasar()
+                # en el archivo las piezas van por nombre para que sea legible
+                lista.append([[PIEZAS.nombre(e[0][0]), e[0][1], list(e[0][2])] if e[0] else None
+                              for e in motor.historial])
+            posiciones[f"{jugadores}j_{fase}"] = {"jugadores": jugadores, "partidas": lista}
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(posiciones, f, separators=(",", ":"))
+    return posiciones
+
+def cargar_posiciones(ruta: str = RUTA_POSICIONES) -> Dict[str, List[Motor]]:
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    resultado: Dict[str, List[Motor]] = {}
+    for nombre, d in datos.items():
+        motores = []
+        for jugadas in d["partidas"]:
+            motor = Motor(num_jugadores=d["jugadores"])
+            for j in jugadas:
+                if j is None:
+                    motor.pasar()
+                else:
+                    motor.jugar((PIEZAS.id_de(j[0]), j[1], tuple(j[2])))
+            motores.append(motor)
+        resultado[nombre] = motores
+    return resultado
+
+# ---------------- utilidades de medición ----------------
+def _metrica(valor: float, unidad: str, mayor_es_mejor: bool) -> Dict[str, Any]:
+    return {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor}
+
+def _mejor_tiempo(funcion: Callable[[], Any], repeticiones: int = REPETICIONES) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+# ---------------- mediciones ----------------
+def bench_indice() -> Metricas:
+    import colocaciones
+    colocaciones._INDICES.clear()
+    inicio = time.perf_counter()
+    colocaciones.obtener_indice(20, 20)
+    return {"indice_construccion": _metrica((time.perf_counter() - inicio) * 1000, "ms", False)}
+
+def bench_orientaciones() -> Metricas:
+    ids = PIEZAS.ids()
+
+    def frio():
+        repo = RepositorioPiezas()
+        for pid in ids:
+            repo.orientaciones(pid)
+
+    def caliente():
+        for _ in range(2000):
+            for pid in ids:
+                PIEZAS.orientaciones(pid)
+
+    return {
+        "orientaciones_frio": _metrica(_mejor_tiempo(frio) * 1000, "ms", False),
+        "orientaciones_llamadas_por_s": _metrica(2000 * len(ids) / _mejor_tiempo(caliente), "llamadas/s", True),
+    }
+
+def bench_validacion(posiciones: Dict[str, List[Motor]]) -> Metricas:
+    motor = posiciones["4j_medio"][0]
+    mesa = motor.mesa
+    rng = random.Random(SEMILLA)
+    candidatos = []
+    for _ in range(20000):
+        pid = rng.choice(PIEZAS.ids())
+        orient = rng.randrange(len(PIEZAS.orientaciones(pid)))
+        candidatos.append((rng.choice("ABCD"), pid, orient, (rng.randrange(20), rng.randrange(20))))
+
+    def correr():
+        for simbolo, pid, orient, ref in candidatos:
+            mesa.validar_colocacion(simbolo, pid, orient, ref)
+
+    metricas = {"validar_por_s": _metrica(len(candidatos) / _mejor_tiempo(correr), "llamadas/s", True)}
+    try:
+        import numpy as np
+        from validacion_lote import validar_lote
+    except ImportError:  # NumPy es opcional
+        return metricas
+    # un lote por símbolo, como lo usaría un bot
+    lotes = {}
+    for simbolo, pid, orient, (r, c) in candidatos:
+        lotes.setdefault(simbolo, []).append((pid, orient, r, c))
+    lotes = {s: [np.array(col) for col in zip(*filas)] for s, filas in lotes.items()}
+    validar_lote(mesa, "A", *lotes["A"])  # construye las tablas
+
+    def correr_lote():
+        for simbolo, columnas in lotes.items():
+            validar_lote(mesa, simbolo, *columnas)
+
+    metricas["validar_lote_por_s"] = _metrica(len(candidatos) / _mejor_tiempo(correr_lote), "candidatos/s", True)
+    return metricas
+
+def bench_generacion(posiciones: Dict[str, List[Motor]]) -> Metricas:
+    metricas: Metricas = {}
+    for nombre, motores in sorted(posiciones.items()):
+        tiempos, tiempos_hay = [], []
+        for motor in motores:
+            tiempos.append(_mejor_tiempo(motor.jugadas_legales))
+            tiempos_hay.append(_mejor_tiempo(motor.quedan_jugadas_posibles))
+        metricas[f"jugadas_legales_{nombre}"] = _metrica(statistics.mean(tiempos) * 1000, "ms", False)
+        metricas[f"hay_jugada_{nombre}"] = _metrica(statistics.mean(tiempos_hay) * 1000, "ms", False)
+    return metricas
+
+def bench_instantanea(posiciones: Dict[str, List[Motor]]) -> Metricas:
+    """Foto compacta (instantanea.py) contra pickle del Motor: tamaño e ida y vuelta."""
+    import pickle
+    from instantanea import Instantanea
+    motor = posiciones["4j_final"][0]
+    datos = Instantanea.capturar(motor).codificar()
+    crudo = pickle.dumps(motor, pickle.HIGHEST_PROTOCOL)
+    n = 200
+
+    def ida_vuelta():
+        for _ in range(n):
+            Instantanea.decodificar(Instantanea.capturar(motor).codificar()).motor()
+
+    def ida_vuelta_pickle():
+        for _ in range(3):
+            pickle.loads(pickle.dumps(motor, pickle.HIGHEST_PROTOCOL))
+
+    return {
+        "instantanea_bytes": _metrica(float(len(datos)), "bytes", False),
+        "pickle_bytes": _metrica(float(len(crudo)), "bytes", False),
+        "instantanea_ida_vuelta_por_s": _metrica(n / _mejor_tiempo(ida_vuelta), "posiciones/s", True),
+        "pickle_ida_vuelta_por_s": _metrica(3 / _mejor_tiempo(ida_vuelta_pickle), "posiciones/s", True),
+    }
+
+def bench_evaluacion_lote(posiciones: Dict[str, List[Motor]]) -> Metricas:
+    """Modelo de referencia (evaluacion_lote.py): posiciones por segundo según el tamaño del lote."""
+    try:
+        import numpy as np
+        from evaluacion_lote import ModeloConvolucional
+        from exportador import codificar_posicion
+    except ImportError:  # NumPy es opcional
+        return {}
+    modelo = ModeloConvolucional()
+    motores = [m for nombre, lista in sorted(posiciones.items()) for m in lista]
+    entradas = [codificar_posicion(m) for m in motores]
+    jugadas = [np.array([m.mesa.indice.por_clave[(p, o, tuple(ref))] for p, o, ref in m.jugadas_legales()],
+                        dtype=np.int64) for m in motores]
+    planos = np.stack([e[0] for e in entradas])
+    piezas = np.stack([e[1] for e in entradas])
+    n = len(motores)
+    metricas: Metricas = {}
+    for lote in (1, n):
+        def evaluar():
+            for desde in range(0, n, lote):
+                modelo.evaluar(planos[desde:desde + lote], piezas[desde:desde + lote], jugadas[desde:desde + lote])
+        metricas[f"modelo_lote_{lote}_por_s"] = _metrica(
+            n / _mejor_tiempo(evaluar), "posiciones/s", True)
+    return metricas
+
+def bench_partidas(partidas: int = 40) -> Metricas:
+    metricas: Metricas = {}
+    for jugadores in (2, 4):
+        def correr():
+            for k in range(partidas):
+                Motor(num_jugadores=jugadores).jugar_al_azar(random.Random(SEMILLA + k))
+        metricas[f"partidas_azar_{jugadores}j_por_s"] = _metrica(
+            partidas / _mejor_tiempo(correr), "partidas/s", True)
+    return metricas
+
+def bench_memoria(partidas: int = 10) -> Metricas:
+    gc.collect()
+    tracemalloc.start()
+    for k in range(partidas):
+        Motor(num_jugadores=4).jugar_al_azar(random.Random(SEMILLA + k))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metricas = {"memoria_pico_partidas": _metrica(pico / 1024, "KiB", False)}
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        metricas["memoria_rss_max"] = _metrica(float(rss), "KiB", False)
+    except ImportError:  # Windows
+        pass
+    return metricas
+
+def correr_todo() -> Dict[str, Any]:
+    if not os.path.exists(RUTA_POSICIONES):
+        generar_posiciones()
+    metricas: Metricas = {}
+    metricas.update(bench_indice())
+    posiciones = cargar_posiciones()
+    metricas.update(bench_orientaciones())
+    metricas.update(bench_validacion(posiciones))
+    metricas.update(bench_generacion(posiciones))
+    metricas.update(bench_instantanea(posiciones))
+    metricas.update(bench_evaluacion_lote(posiciones))
+    metricas.update(bench_partidas())
+    metricas.update(bench_memoria())
+    return {
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "metricas": metricas,
+    }
+
+# ---------------- comparación ----------------
+def comparar(actual: Dict[str, Any], base: Dict[str, Any], tolerancia: float) -> List[Tuple[str, float, float, float]]:
+    """
+    Devuelve las regresiones (nombre, base, actual, cambio relativo) que
+    empeoran más que 'tolerancia' (0.10 = 10%).
+    """
+    regresiones = []
+    for nombre, m in actual["metricas"].items():
+        b = base["metricas"].get(nombre)
+        if b is None or not b["valor"]:
+            continue
+        cambio = (m["valor"] - b["valor"]) / b["valor"]
+        empeora = -cambio if m["mayor_es_mejor"] else cambio
+        if empeora > tolerancia:
+            regresiones.append((nombre, b["valor"], m["valor"], cambio))
+    return regresiones
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de reglas, generación de jugadas y partidas.")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="línea base JSON contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="empeoramiento permitido (0.10 = 10%%)")
+    parser.add_argument("--generar-posiciones", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.generar_posiciones:
+        generar_posiciones()
+        print(f"Posiciones guardadas en {RUTA_POSICIONES}")
+        return 0
+
+    resultado = correr_todo()
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    print(texto)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        if regresiones:
+            print(f"\n⚠️  {len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%}):", file=sys.stderr)
+            for nombre, b, a, cambio in regresiones:
+                print(f"  {nombre}: {b:.4g} -> {a:.4g} ({cambio:+.1%})", file=sys.stderr)
+            return 1
+        print("\nSin regresiones.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+# busqueda.py
+# Jugador por computadora con búsqueda en árbol y profundización iterativa.
+#
+#   - modo "paranoico" (por defecto): minimax alfa-beta donde todos los rivales
+#     juegan contra el jugador de la raíz. Con 2 jugadores es alfa-beta clásico.
+#   - modo "maxn" (3-4 jugadores): cada jugador maximiza su propio valor.
+#
+# La profundidad se mide en acciones (jugadas o pases). Las hojas se valoran
+# con evaluacion.Evaluador y las posiciones ya buscadas se guardan en una
+# TablaTransposicion. Orden de jugadas: la de la tabla, las 'killer' del
+# nivel, el historial y luego piezas grandes y que tapan más anclas rivales.
+# En los finales (pocas jugadas legales en total) se prueba antes el
+# solucionador exacto de finales.py; si agota su presupuesto se sigue con la
+# búsqueda normal. En la apertura se juega del libro (libro.py) si lo hay.
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from evaluacion import Evaluador
+from finales import SolucionadorFinal
+from libro import jugada_de_libro
+from mesa import Jugada
+from repositorio_piezas import PIEZAS
+from transposicion import COTA_INFERIOR, COTA_SUPERIOR, EXACTO, TablaTransposicion
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+INFINITO = float("inf")
+# una partida terminada vale más que cualquier evaluación
+_ESCALA_FINAL = 1000.0
+
+class _SinTiempo(Exception):
+    pass
+
+class AgenteBusqueda:
+    """
+    Presupuesto por jugada en segundos (tiempo_limite) y/o profundidad máxima
+    (profundidad); con solo 'profundidad' el resultado es determinista.
+    anchura limita cuántas jugadas (ya ordenadas) se miran en los nodos
+    internos; None = todas. ventana es la semiamplitud de la ventana de
+    aspiración alrededor del valor de la iteración anterior.
+    umbral_final / nodos_final configuran el solucionador de finales
+    (umbral_final=None lo desactiva); usa a lo sumo la mitad del tiempo.
+    Con usar_libro las primeras jugadas salen del libro de aperturas.
+    """
+    def __init__(
+        self,
+        tiempo_limite: Optional[float] = 1.0,
+        profundidad: Optional[int] = None,
+        modo: str = "paranoico",
+        anchura: Optional[int] = None,
+        ventana: float = 2.0,
+        capacidad_tt: int = 1 << 18,
+        pesos: Optional[Dict[str, float]] = None,
+        umbral_final: Optional[int] = 30,
+        nodos_final: int = 20_000,
+        usar_libro: bool = True,
+        semilla: Optional[int] = None,  # sin azar: se acepta por compatibilidad con ESTRATEGIAS
+    ):
+        if modo not in ("paranoico", "maxn"):
+            raise ValueError(f"Modo de búsqueda desconocido: {modo}")
+        if tiempo_limite is None and profundidad is None:
+            raise ValueError("Indica tiempo_limite y/o profundidad.")
+        self.nombre = "busqueda" if modo == "paranoico" else "maxn"
+        self.tiempo_limite = tiempo_limite
+        self.profundidad = profundidad
+        self.modo = modo
+        self.anchura = anchura
+        self.ventana = ventana
+        self.pesos = pesos
+        self.usar_libro = usar_libro
+        self.tt = TablaTransposicion(capacidad_tt)
+        self.final: Optional[SolucionadorFinal] = None
+        if umbral_final is not None:
+            self.final = SolucionadorFinal(
+                umbral_final, nodos_final, tiempo_limite / 2 if tiempo_limite is not None else None)
+        self._informe: Dict[str, Any] = {}
+
+    # ---------- API de agente ----------
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        if juego.terminado():
+            return None
+        inicio = time.perf_counter()
+        if self.usar_libro:
+            jugada = jugada_de_libro(juego)
+            if jugada is not None:
+                self._informe = {"libro": True, "nodos": 0, "segundos": time.perf_counter() - inicio}
+                return jugada
+        if self.final is not None:
+            resuelto = self.final.resolver(juego)
+            if resuelto is not None:
+                segundos = time.perf_counter() - inicio
+                informe = self.final.informe()
+                self._informe = {
+                    "nodos": informe["nodos"],
+                    "segundos": segundos,
+                    "nodos_por_segundo": informe["nodos"] / segundos if segundos > 0 else 0.0,
+                    "profundidad": 0,
+                    "ebf": 0.0,
+                    "valor_estimado": resuelto[1],
+                    "final": informe,
+                }
+                return resuelto[0]
+        self._juego = juego
+        self._raiz = juego.turno_idx
+        self._eval = Evaluador(juego.mesa, [j.simbolo for j in juego.jugadores], self.pesos)
+        self._killers: List[List[Optional[Jugada]]] = []
+        self._historia: Dict[Tuple[int, Jugada], int] = {}
+        self._nodos = 0
+        self.tt.nueva_busqueda()
+        self._limite = inicio + self.tiempo_limite if self.tiempo_limite is not None else None
+
+        jugadas = self._ordenar(juego, self._generar(juego), 0, None)
+        mejor, valor = jugadas[0], 0.0
+        nodos_por_iteracion: List[int] = []
+        completa = 0
+        if len(jugadas) > 1:
+            maxima = self.profundidad if self.profundidad is not None else 64
+            for prof in range(1, maxima + 1):
+                antes = self._nodos
+                try:
+                    if self.modo == "paranoico":
+                        mejor, valor = self._raiz_aspiracion(jugadas, prof, valor if completa else None)
+                    else:
+                        mejor, valor = self._raiz_maxn(jugadas, prof)
+                except _SinTiempo:
+                    break
+                completa = prof
+                nodos_por_iteracion.append(self._nodos - antes)
+                # la mejor primero en la siguiente iteración
+                jugadas.remove(mejor)
+                jugadas.insert(0, mejor)
+                if abs(valor) >= _ESCALA_FINAL:  # resultado final ya conocido
+                    break
+                if self._limite is not None and time.perf_counter() >= self._limite:
+                    break
+        segundos = time.perf_counter() - inicio
+
+        ebf = 0.0
+        if len(nodos_por_iteracion) >= 2 and nodos_por_iteracion[-2]:
+            ebf = nodos_por_iteracion[-1] / nodos_por_iteracion[-2]
+        self._informe = {
+            "nodos": self._nodos,
+            "segundos": segundos,
+            "nodos_por_segundo": self._nodos / segundos if segundos > 0 else 0.0,
+            "profundidad": completa,
+            "ebf": ebf,
+            "nodos_por_iteracion": nodos_por_iteracion,
+            "jugadas_raiz": len(jugadas),
+            "valor_estimado": valor,
+            "tt": self.tt.estadisticas(),
+        }
+        if self.final is not None and self.final.informe():
+            self._informe["final"] = self.final.informe()
+        del self._juego, self._eval
+        return mejor
+
+    def informe(self) -> Dict[str, Any]:
+        return dict(self._informe)
+
+    # ---------- utilidades ----------
+    def _aplicar(self, juego: "Motor", jugada: Optional[Jugada]) -> None:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+
+    def _generar(self, juego: "Motor") -> List[Optional[Jugada]]:
+        jugadas: List[Optional[Jugada]] = juego.jugadas_legales()
+        return jugadas or [None]
+
+    def _clave(self, juego: "Motor") -> int:
+        # los pases y el jugador de la raíz (punto de vista de los valores)
+        # también distinguen la posición
+        return juego.clave_posicion() ^ (juego.pases_consecutivos << 64) ^ (self._raiz << 68)
+
+    def _reloj(self) -> None:
+        self._nodos += 1
+        if self._limite is not None and not self._nodos & 63 and time.perf_counter() >= self._limite:
+            raise _SinTiempo()
+
+    def _ordenar(self, juego: "Motor", jugadas: List[Optional[Jugada]], ply: int,
+                 jugada_tt: Optional[Jugada]) -> List[Optional[Jugada]]:
+        if len(jugadas) < 2:
+            return jugadas
+        mesa = juego.mesa
+        indice = mesa.indice
+        turno = juego.turno_idx
+        simbolo = juego.jugadores[turno].simbolo
+        anclas_rivales = 0
+        for j in juego.jugadores:
+            if j.simbolo != simbolo and j.simbolo in mesa.anclas:
+                anclas_rivales |= mesa.anclas[j.simbolo]
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        historia = self._historia
+
+        def puntaje(jugada: Jugada) -> float:
+            if jugada == jugada_tt:
+                return INFINITO
+            idx = indice.por_clave[jugada]
+            estatico = 16 * PIEZAS.tamanos[jugada[0]] + 4 * (indice.mascara[idx] & anclas_rivales).bit_count()
+            if jugada in killers:
+                estatico += 1 << 20
+            return estatico + historia.get((turno, jugada), 0)
+
+        return sorted(jugadas, key=puntaje, reverse=True)
+
+    def _recortar(self, jugadas: List[Optional[Jugada]]) -> List[Optional[Jugada]]:
+        if self.anchura is None:
+            return jugadas
+        return jugadas[:self.anchura]
+
+    def _premiar(self, ply: int, turno: int, jugada: Optional[Jugada], prof: int) -> None:
+        """Una jugada produjo un corte: killer del nivel y puntos de historial."""
+        if jugada is None:
+            return
+        while len(self._killers) <= ply:
+            self._killers.append([None, None])
+        killers = self._killers[ply]
+        if killers[0] != jugada:
+            killers[1] = killers[0]
+            killers[0] = jugada
+        clave = (turno, jugada)
+        self._historia[clave] = self._historia.get(clave, 0) + prof * prof
+
+    def _final(self, juego: "Motor") -> List[float]:
+        """Valores de una partida terminada: diferencia de puntaje con el mejor rival, escalada."""
+        puntajes = juego.puntajes()
+        valores = []
+        for i, p in enumerate(puntajes):
+            diferencia = p - max(puntajes[:i] + puntajes[i + 1:])
+            signo = (diferencia > 0) - (diferencia < 0)
+            valores.append(signo * _ESCALA_FINAL + diferencia)
+        return valores
+
+    # ---------- paranoico / alfa-beta ----------
+    def _raiz_aspiracion(self, jugadas: List[Optional[Jugada]], prof: int,
+                         previo: Optional[float]) -> Tuple[Optional[Jugada], float]:
+        if previo is None or abs(previo) >= _ESCALA_FINAL:
+            return self._raiz_alfabeta(jugadas, prof, -INFINITO, INFINITO)
+        alfa, beta = previo - self.ventana, previo + self.ventana
+        mejor, valor = self._raiz_alfabeta(jugadas, prof, alfa, beta)
+        if valor <= alfa:
+            mejor, valor = self._raiz_alfabeta(jugadas, prof, -INFINITO, beta)
+        elif valor >= beta:
+            mejor, valor = self._raiz_alfabeta(jugadas, prof, alfa, INFINITO)
+        return mejor, valor
+
+    def _raiz_alfabeta(self, jugadas: List[Optional[Jugada]], prof: int,
+                       alfa: float, beta: float) -> Tuple[Optional[Jugada], float]:
+        juego = self._juego
+        mejor, mejor_valor = jugadas[0], -INFINITO
+        for jugada in jugadas:
+            self._aplicar(juego, jugada)
+            try:
+                valor = self._alfabeta(prof - 1, 1, max(alfa, mejor_valor), beta)
+            finally:
+                juego.deshacer()
+            if valor > mejor_valor:
+                mejor, mejor_valor = jugada, valor
+                if valor >= beta:
+                    break
+        return mejor, mejor_valor
+
+    def _alfabeta(self, prof: int, ply: int, alfa: float, beta: float) -> float:
+        """Valor para el jugador de la raíz; maximiza en sus turnos y minimiza en los de los rivales."""
+        self._reloj()
+        juego = self._juego
+        if juego.terminado():
+            return self._final(juego)[self._raiz]
+        if prof <= 0:
+            return self._eval.relativos()[self._raiz]
+
+        clave = self._clave(juego)
+        entrada = self.tt.buscar(clave)
+        jugada_tt = None
+        if entrada is not None:
+            jugada_tt = entrada.jugada
+            if entrada.profundidad >= prof:
+                if entrada.tipo == EXACTO:
+                    return entrada.valor
+                if entrada.tipo == COTA_INFERIOR and entrada.valor >= beta:
+                    return entrada.valor
+                if entrada.tipo == COTA_SUPERIOR and entrada.valor <= alfa:
+                    return entrada.valor
+
+        turno = juego.turno_idx
+        maximiza = turno == self._raiz
+        jugadas = self._recortar(self._ordenar(juego, self._generar(juego), ply, jugada_tt))
+        alfa_0, beta_0 = alfa, beta
+        mejor, mejor_valor = jugadas[0], -INFINITO if maximiza else INFINITO
+        for jugada in jugadas:
+            self._aplicar(juego, jugada)
+            try:
+                valor = self._alfabeta(prof - 1, ply + 1, alfa, beta)
+            finally:
+                juego.deshacer()
+            if maximiza:
+                if valor > mejor_valor:
+                    mejor, mejor_valor = jugada, valor
+                    alfa = max(alfa, valor)
+            elif valor < mejor_valor:
+                mejor, mejor_valor = jugada, valor
+                beta = min(beta, valor)
+            if alfa >= beta:
+                self._premiar(ply, turno, jugada, prof)
+                break
+
+        if mejor_valor <= alfa_0:
+            tipo = COTA_SUPERIOR
+        elif mejor_valor >= beta_0:
+            tipo = COTA_INFERIOR
+        else:
+            tipo = EXACTO
+        self.tt.guardar(clave, mejor_valor, prof, tipo, mejor)
+        return mejor_valor
+
+    # ---------- max-n ----------
+    def _raiz_maxn(self, jugadas: List[Optional[Jugada]], prof: int) -> Tuple[Optional[Jugada], float]:
+        juego = self._juego
+        mejor, mejor_valores = jugadas[0], None
+        for jugada in jugadas:
+            self._aplicar(juego, jugada)
+            try:
+                valores = self._maxn(prof - 1, 1)
+            finally:
+                juego.deshacer()
+            if mejor_valores is None or valores[self._raiz] > mejor_valores[self._raiz]:
+                mejor, mejor_valores = jugada, valores
+        return mejor, mejor_valores[self._raiz]
+
+    def _maxn(self, prof: int, ply: int) -> List[float]:
+        """Vector de valores (uno por asiento); quien mueve elige el que más le conviene."""
+        self._reloj()
+        juego = self._juego
+        if juego.terminado():
+            return self._final(juego)
+        if prof <= 0:
+            return self._eval.relativos()
+
+        clave = self._clave(juego)
+        entrada = self.tt.buscar(clave)
+        jugada_tt = None
+        if entrada is not None:
+            if entrada.profundidad >= prof:
+                return list(entrada.valor)
+            jugada_tt = entrada.jugada
+
+        turno = juego.turno_idx
+        jugadas = self._recortar(self._ordenar(juego, self._generar(juego), ply, jugada_tt))
+        mejor, mejor_valores = jugadas[0], None
+        for jugada in jugadas:
+            self._aplicar(juego, jugada)
+            try:
+                valores = self._maxn(prof - 1, ply + 1)
+            finally:
+                juego.deshacer()
+            if mejor_valores is None or valores[turno] > mejor_valores[turno]:
+                mejor, mejor_valores = jugada, valores
+        # sin poda, el mejor del nivel también ordena los hermanos siguientes
+        self._premiar(ply, turno, mejor, prof)
+        self.tt.guardar(clave, tuple(mejor_valores), prof, EXACTO, mejor)
+        return mejor_valores
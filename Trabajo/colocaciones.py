@@ -0,0 +1,139 @@
+# colocaciones.py
+# Índice precalculado de todas las colocaciones posibles (pieza × orientación × posición)
+# para un tamaño de tablero. Se construye una sola vez, se comparte entre mesas
+# y opcionalmente se guarda en disco para no reconstruirlo en cada proceso.
+import hashlib
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+from repositorio_piezas import PIEZAS, RepositorioPiezas
+
+Coord = Tuple[int, int]
+Clave = Tuple[int, int, Coord]  # (pieza_id, orient_idx, ref)
+
+# Variable de entorno con el directorio donde persistir los índices (opcional)
+ENV_DIRECTORIO_CACHE = "BLOKUS_CACHE_DIR"
+_VERSION_FORMATO = 3
+
+class IndiceColocaciones:
+    """
+    Tabla de colocaciones dentro del tablero. Cada colocación tiene un id denso
+    (0..n-1) y, en listas paralelas: pieza, orientación, ref, celdas, máscara,
+    halo de lados y halo de esquinas. 'por_celda[i][pieza_id]' son los ids de las
+    colocaciones de esa pieza que cubren la celda i (= r*columnas + c); la
+    lista está vacía si ninguna la cubre. Las colocaciones de cada pieza son
+    consecutivas: 'por_pieza[pieza_id]' es su rango de ids.
+    """
+    def __init__(self, filas: int, columnas: int, repo: RepositorioPiezas = PIEZAS):
+        self.filas = filas
+        self.columnas = columnas
+        self.firma = firma_piezas(repo)
+
+        self.pieza: List[int] = []
+        self.orient: List[int] = []
+        self.ref: List[Coord] = []
+        self.celdas: List[Tuple[Coord, ...]] = []
+        self.mascara: List[int] = []
+        self.lado: List[int] = []
+        self.esquina: List[int] = []
+        self.por_clave: Dict[Clave, int] = {}
+        self.por_celda: List[List[List[int]]] = [[[] for _ in repo.ids()] for _ in range(filas * columnas)]
+        self.por_pieza: List[range] = []
+
+        for pieza_id in repo.ids():
+            inicio = len(self.pieza)
+            for orient_idx, orient in enumerate(repo.orientaciones(pieza_id)):
+                alto = max(r for r, _ in orient) + 1
+                ancho = max(c for _, c in orient) + 1
+                for rr in range(filas - alto + 1):
+                    for cc in range(columnas - ancho + 1):
+                        self._agregar(pieza_id, orient_idx, (rr, cc),
+                                      tuple((rr + r, cc + c) for r, c in orient))
+            self.por_pieza.append(range(inicio, len(self.pieza)))
+
+    def _dentro(self, r: int, c: int) -> bool:
+        return 0 <= r < self.filas and 0 <= c < self.columnas
+
+    def _agregar(self, pieza_id: int, orient_idx: int, ref: Coord, celdas: Tuple[Coord, ...]) -> None:
+        propias = set(celdas)
+        mascara = lado = esquina = 0
+        for r, c in celdas:
+            mascara |= 1 << (r * self.columnas + c)
+            for lr, lc in ((r-1, c), (r+1, c), (r, c-1), (r, c+1)):
+                if self._dentro(lr, lc) and (lr, lc) not in propias:
+                    lado |= 1 << (lr * self.columnas + lc)
+            for dr, dc in ((r-1, c-1), (r-1, c+1), (r+1, c-1), (r+1, c+1)):
+                if self._dentro(dr, dc) and (dr, dc) not in propias:
+                    esquina |= 1 << (dr * self.columnas + dc)
+        # una celda que toca por lado nunca cuenta como contacto de esquina
+        esquina &= ~lado
+
+        idx = len(self.pieza)
+        self.pieza.append(pieza_id)
+        self.orient.append(orient_idx)
+        self.ref.append(ref)
+        self.celdas.append(celdas)
+        self.mascara.append(mascara)
+        self.lado.append(lado)
+        self.esquina.append(esquina)
+        self.por_clave[(pieza_id, orient_idx, ref)] = idx
+        for r, c in celdas:
+            self.por_celda[r * self.columnas + c][pieza_id].append(idx)
+
+    def __len__(self) -> int:
+        return len(self.pieza)
+
+    def clave(self, idx: int) -> Clave:
+        return self.pieza[idx], self.orient[idx], self.ref[idx]
+
+# ---------------- construcción perezosa + cache ----------------
+_INDICES: Dict[Tuple[int, int, str], IndiceColocaciones] = {}
+
+def firma_piezas(repo: RepositorioPiezas = PIEZAS) -> str:
+    """Hash corto del catálogo de piezas (cambia si cambia alguna pieza)."""
+    texto = repr(sorted((nombre, sorted(coords)) for nombre, coords in repo.base.items()))
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:12]
+
+def _ruta_cache(directorio: str, filas: int, columnas: int, firma: str) -> str:
+    return os.path.join(directorio, f"colocaciones_{filas}x{columnas}_{firma}_v{_VERSION_FORMATO}.pkl")
+
+def obtener_indice(
+    filas: int = 20,
+    columnas: int = 20,
+    repo: RepositorioPiezas = PIEZAS,
+    directorio_cache: Optional[str] = None,
+) -> IndiceColocaciones:
+    """
+    Devuelve el índice compartido para ese tamaño de tablero. Si se indica un
+    directorio de cache (o la variable BLOKUS_CACHE_DIR) se intenta cargar de
+    disco y, si no existe, se construye y se guarda ahí.
+    """
+    firma = firma_piezas(repo)
+    clave = (filas, columnas, firma)
+    if clave in _INDICES:
+        return _INDICES[clave]
+
+    directorio = directorio_cache or os.environ.get(ENV_DIRECTORIO_CACHE)
+    indice = None
+    if directorio:
+        ruta = _ruta_cache(directorio, filas, columnas, firma)
+        try:
+            with open(ruta, "rb") as f:
+                indice = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            indice = None
+
+    if indice is None:
+        indice = IndiceColocaciones(filas, columnas, repo)
+        if directorio:
+            try:
+                os.makedirs(directorio, exist_ok=True)
+                temporal = f"{ruta}.{os.getpid()}.tmp"
+                with open(temporal, "wb") as f:
+                    pickle.dump(indice, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporal, ruta)
+            except OSError:
+                pass  # la cache en disco es opcional
+
+    _INDICES[clave] = indice
+    return indice
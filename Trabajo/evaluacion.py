@@ -0,0 +1,160 @@
+# evaluacion.py
+# Evaluación posicional barata para usar dentro de búsquedas.
+#
+# Rasgos por símbolo:
+#   cuadros      cuadros ya colocados
+#   anclas       anclas vivas (celdas donde puede apoyarse la próxima pieza)
+#   territorio   celdas libres alcanzables desde sus anclas moviéndose por
+#                lados sin pisar celdas prohibidas para él (flood fill)
+#   bloqueadas   anclas rivales que tapó con sus piezas
+#   peso         peso de las piezas que le quedan (suma de tamaño²: las
+#                grandes cuestan más de colocar al final)
+#
+# El Evaluador sigue la pila de deshacer de la Mesa: actualizar() procesa solo
+# las colocaciones nuevas (o descarta las deshechas) y recalcula el territorio
+# únicamente de los símbolos cuya región tocó alguna pieza nueva.
+from typing import Dict, List, Optional, Sequence, Tuple
+from mesa import Mesa
+from repositorio_piezas import PIEZAS
+
+PESOS_DEFECTO: Dict[str, float] = {
+    "cuadros": 1.0,
+    "anclas": 0.5,
+    "territorio": 0.05,
+    "bloqueadas": 0.3,
+    "peso": -0.02,
+}
+
+_PESO_INICIAL = sum(t * t for t in PIEZAS.tamanos)
+
+class Evaluador:
+    def __init__(self, mesa: Mesa, simbolos: Sequence[str], pesos: Optional[Dict[str, float]] = None):
+        self.mesa = mesa
+        self.simbolos = list(simbolos)
+        self.pesos = dict(PESOS_DEFECTO if pesos is None else pesos)
+        columnas = mesa.columnas
+        self._todas = (1 << (mesa.filas * columnas)) - 1
+        col_0 = col_n = 0
+        for r in range(mesa.filas):
+            col_0 |= 1 << (r * columnas)
+            col_n |= 1 << (r * columnas + columnas - 1)
+        self._sin_col_0 = self._todas & ~col_0
+        self._sin_col_n = self._todas & ~col_n
+        # Una entrada por colocación de la pila de la mesa (más la inicial):
+        # (entrada de la pila de la mesa, bloqueadas, peso, territorio por
+        #  símbolo o None si no se calculó para esa posición)
+        n = len(self.simbolos)
+        self._pila: List[Tuple[Optional[tuple], Tuple[int, ...], Tuple[int, ...], Optional[Tuple[int, ...]]]] = [
+            (None, (0,) * n, (_PESO_INICIAL,) * n, None)]
+        self.actualizar()
+
+    # ---------- territorio ----------
+    def _inundar(self, semillas: int, libre: int) -> int:
+        """Celdas de 'libre' conectadas por lados a 'semillas' (bit a bit, sin recorrer celdas)."""
+        c = self.mesa.columnas
+        region = semillas & libre
+        while True:
+            nueva = (region
+                     | ((region << 1) & self._sin_col_0)
+                     | ((region >> 1) & self._sin_col_n)
+                     | (region << c)
+                     | (region >> c)) & libre
+            if nueva == region:
+                return region
+            region = nueva
+
+    def _territorio(self, simbolo: str) -> int:
+        mesa = self.mesa
+        mesa._asegurar_simbolo(simbolo)
+        return self._inundar(mesa.anclas[simbolo], self._todas & ~mesa.prohibidas[simbolo])
+
+    # ---------- sincronización con la mesa ----------
+    def actualizar(self) -> None:
+        """Se pone al día con la mesa tras colocar/aplicar/deshacer."""
+        pila = self.mesa._pila
+        # parte común: las entradas de la pila de la mesa son tuplas nuevas en
+        # cada aplicar, así que basta comparar identidades
+        k = min(len(self._pila) - 1, len(pila))
+        while k > 0 and self._pila[k][0] is not pila[k - 1]:
+            k -= 1
+        del self._pila[k + 1:]
+        self._avanzar()
+
+    def _avanzar(self) -> None:
+        """Agrega las colocaciones nuevas y completa el territorio de la posición actual."""
+        mesa = self.mesa
+        indice = mesa.indice
+        orden = list(mesa.anclas)  # orden de las anclas guardadas en la pila
+        _, bloqueadas, peso, _ = self._pila[-1]
+        for entrada in mesa._pila[len(self._pila) - 1:]:
+            simbolo, idx, _, anclas_previas = entrada[:4]
+            mascara = indice.mascara[idx]
+            tam = PIEZAS.tamanos[indice.pieza[idx]]
+            if simbolo in self.simbolos:
+                tapadas = sum((anclas & mascara).bit_count()
+                              for otro, anclas in zip(orden, anclas_previas) if otro != simbolo)
+                i = self.simbolos.index(simbolo)
+                bloqueadas = bloqueadas[:i] + (bloqueadas[i] + tapadas,) + bloqueadas[i + 1:]
+                peso = peso[:i] + (peso[i] - tam * tam,) + peso[i + 1:]
+            self._pila.append((entrada, bloqueadas, peso, None))
+        if self._pila[-1][3] is not None:
+            return
+
+        # último territorio conocido y lo que cambió desde entonces
+        j = len(self._pila) - 1
+        while j > 0 and self._pila[j][3] is None:
+            j -= 1
+        conocido = self._pila[j][3]
+        if conocido is None:
+            territorio = tuple(self._territorio(s) for s in self.simbolos)
+        else:
+            tocadas = 0
+            movieron = set()
+            for entrada in mesa._pila[j:]:
+                tocadas |= indice.mascara[entrada[1]]
+                movieron.add(entrada[0])
+            # para los demás solo se achica lo libre: si la pieza no tocó su
+            # región, la región no cambió
+            territorio = tuple(
+                self._territorio(s) if (s in movieron or t & tocadas) else t
+                for s, t in zip(self.simbolos, conocido))
+        self._pila[-1] = self._pila[-1][:3] + (territorio,)
+
+    # ---------- resultados ----------
+    def rasgos(self, simbolo: str) -> Dict[str, int]:
+        self.actualizar()
+        mesa = self.mesa
+        i = self.simbolos.index(simbolo)
+        _, bloqueadas, peso, territorio = self._pila[-1]
+        return {
+            "cuadros": mesa.mascaras.get(simbolo, 0).bit_count(),
+            "anclas": mesa.anclas[simbolo].bit_count() if simbolo in mesa.anclas else 0,
+            "territorio": territorio[i].bit_count(),
+            "bloqueadas": bloqueadas[i],
+            "peso": peso[i],
+        }
+
+    def valores(self) -> List[float]:
+        """Valor de cada símbolo (en el orden de 'simbolos'): suma ponderada de rasgos."""
+        self.actualizar()
+        mesa = self.mesa
+        _, bloqueadas, peso, territorio = self._pila[-1]
+        p = self.pesos
+        valores = []
+        for i, s in enumerate(self.simbolos):
+            valores.append(
+                p["cuadros"] * mesa.mascaras.get(s, 0).bit_count()
+                + p["anclas"] * (mesa.anclas[s].bit_count() if s in mesa.anclas else 0)
+                + p["territorio"] * territorio[i].bit_count()
+                + p["bloqueadas"] * bloqueadas[i]
+                + p["peso"] * peso[i])
+        return valores
+
+    def relativos(self) -> List[float]:
+        """Valor de cada símbolo menos el mejor de sus rivales (útil para minimax)."""
+        valores = self.valores()
+        relativos = []
+        for i, v in enumerate(valores):
+            rivales = valores[:i] + valores[i + 1:]
+            relativos.append(v - max(rivales) if rivales else v)
+        return relativos
@@ -0,0 +1,268 @@
+# evaluacion_lote.py
+# Evaluación de hojas por lotes para búsquedas guiadas por un modelo.
+#
+# Un modelo rinde mucho más evaluando muchas posiciones juntas que de a una.
+# EvaluadorLotes recibe pedidos desde cualquier hilo de búsqueda (solicitar()
+# devuelve un Future enseguida), los junta en una cola y los manda al modelo
+# como un solo lote cuando se llega a 'tamano_lote' o cuando el pedido más
+# viejo lleva 'espera' segundos. Mientras tanto los hilos que pidieron siguen
+# expandiendo otras ramas (con pérdida virtual, ver mcts_guiado.py).
+#
+# La entrada del modelo es la misma que escribe exportador.py (planos y
+# piezas vistos desde el jugador que mueve); la salida se devuelve como una
+# probabilidad por jugada pedida y un valor por asiento.
+#
+#   evaluador = EvaluadorLotes(ModeloConvolucional(), tamano_lote=16)
+#   futuro = evaluador.solicitar(juego, jugadas)     # no bloquea
+#   priors, valor = futuro.result()                  # Evaluacion
+#
+# ModeloConvolucional es un modelo de referencia solo con NumPy (una capa
+# convolucional 3x3 y cabezas lineales) para probar el lote y medir
+# rendimiento sin GPU; sus pesos se guardan y cargan con np.savez.
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+import numpy as np
+from colocaciones import obtener_indice
+from exportador import MAX_ASIENTOS, PLANOS_POR_ASIENTO, codificar_posicion
+from mesa import Jugada
+from repositorio_piezas import PIEZAS
+from validacion_lote import obtener_tablas
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+_BLOQUE = 8
+
+class Evaluacion(NamedTuple):
+    priors: List[float]  # una probabilidad por jugada pedida, en el mismo orden
+    valor: List[float]   # resultado esperado de cada asiento (absoluto, suma 1)
+
+class Modelo(Protocol):
+    def evaluar(self, planos: np.ndarray, piezas: np.ndarray,
+                jugadas: Sequence[np.ndarray]) -> Tuple[List[np.ndarray], np.ndarray]:
+        """
+        planos u8 (B, 4*3, F, C), piezas u8 (B, 4, 21) y los ids de colocación
+        a puntuar en cada posición -> (logits por jugada, logits de valor (B, 4)
+        por asiento relativo).
+        """
+        ...
+
+# ---------------- modelo de referencia ----------------
+class ModeloConvolucional:
+    """
+    conv 3x3 (4*3 -> canales) + ReLU, y sobre eso:
+      política: logit por celda; el de una colocación es la suma de sus
+                celdas más un sesgo por pieza
+      valor:    lineal sobre (promedio de la capa oculta, piezas restantes)
+    """
+    def __init__(self, canales: int = 16, filas: int = 20, columnas: int = 20, semilla: int = 0):
+        self.filas = filas
+        self.columnas = columnas
+        indice = obtener_indice(filas, columnas)
+        self._celdas = obtener_tablas(indice).celdas  # rellenado con la celda ficticia filas*columnas
+        self._pieza = np.array(indice.pieza, dtype=np.int32)
+        rng = np.random.default_rng(semilla)
+        entradas = MAX_ASIENTOS * PLANOS_POR_ASIENTO * 9
+        self.pesos: Dict[str, np.ndarray] = {
+            "conv": (rng.standard_normal((entradas, canales)) * np.sqrt(2 / entradas)).astype(np.float32),
+            "conv_sesgo": np.zeros(canales, dtype=np.float32),
+            "politica": (rng.standard_normal(canales) * 0.1).astype(np.float32),
+            "sesgo_pieza": np.array(PIEZAS.tamanos, dtype=np.float32) * 0.1,
+            "valor": (rng.standard_normal((canales + MAX_ASIENTOS * PIEZAS.n, MAX_ASIENTOS)) * 0.05).astype(np.float32),
+            "valor_sesgo": np.zeros(MAX_ASIENTOS, dtype=np.float32),
+        }
+
+    def guardar(self, ruta: str) -> None:
+        np.savez(ruta, **self.pesos)
+
+    def cargar(self, ruta: str) -> None:
+        with np.load(ruta) as datos:
+            for nombre, actual in self.pesos.items():
+                if datos[nombre].shape != actual.shape:
+                    raise ValueError(f"{ruta}: '{nombre}' tiene forma {datos[nombre].shape}, se esperaba {actual.shape}.")
+                self.pesos[nombre] = datos[nombre].astype(np.float32)
+
+    def evaluar(self, planos: np.ndarray, piezas: np.ndarray,
+                jugadas: Sequence[np.ndarray]) -> Tuple[List[np.ndarray], np.ndarray]:
+        p = self.pesos
+        n, canales, f, c = planos.shape
+        # conv 3x3 como 9 productos de matrices sobre vistas desplazadas
+        # (canales al final); 'conv' va ordenado (canal, dr, dc) x salidas.
+        # De a _BLOQUE posiciones: con lotes grandes los intermedios ya no
+        # caben en caché y cada posición sale más cara.
+        filtros = p["conv"].reshape(canales, 3, 3, -1)
+        oculta = np.empty((n, f * c, filtros.shape[-1]), dtype=np.float32)
+        for desde in range(0, n, _BLOQUE):
+            bloque = planos[desde:desde + _BLOQUE]
+            x = np.zeros((len(bloque), f + 2, c + 2, canales), dtype=np.float32)
+            x[:, 1:-1, 1:-1, :] = bloque.transpose(0, 2, 3, 1)
+            suma = None
+            for dr in range(3):
+                for dc in range(3):
+                    parcial = x[:, dr:dr + f, dc:dc + c, :] @ filtros[:, dr, dc, :]
+                    suma = parcial if suma is None else suma + parcial
+            oculta[desde:desde + _BLOQUE] = np.maximum(suma.reshape(len(bloque), f * c, -1) + p["conv_sesgo"], 0)
+
+        por_celda = np.zeros((n, f * c + 1), dtype=np.float32)
+        por_celda[:, :-1] = oculta @ p["politica"]
+        # todas las jugadas del lote juntas y después se cortan por posición
+        cuantas = [len(ids) for ids in jugadas]
+        todas = np.concatenate(jugadas) if jugadas else np.zeros(0, dtype=np.int64)
+        de_quien = np.repeat(np.arange(n), cuantas)
+        planas = (por_celda[de_quien[:, None], self._celdas[todas]].sum(axis=1)
+                  + p["sesgo_pieza"][self._pieza[todas]])
+        logits = np.split(planas, np.cumsum(cuantas)[:-1])
+        rasgos = np.concatenate([oculta.mean(axis=1), piezas.reshape(n, -1).astype(np.float32)], axis=1)
+        return logits, rasgos @ p["valor"] + p["valor_sesgo"]
+
+# ---------------- cola de pedidos ----------------
+class _Pedido(NamedTuple):
+    planos: np.ndarray
+    piezas: np.ndarray
+    ids: np.ndarray                   # ids de colocación (-1 = pasar)
+    turno: int
+    num_jugadores: int
+    llegada: float
+    futuro: Future
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max())
+    return e / e.sum()
+
+class EvaluadorLotes:
+    """
+    Cola de pedidos de evaluación atendida por un hilo propio. Se puede usar
+    desde varios hilos a la vez; cerrar() (o 'with') termina el hilo.
+    """
+    def __init__(self, modelo: Optional[Modelo] = None, tamano_lote: int = 16, espera: float = 0.002):
+        if tamano_lote <= 0:
+            raise ValueError("tamano_lote debe ser positivo.")
+        self.modelo: Modelo = modelo if modelo is not None else ModeloConvolucional()
+        self.tamano_lote = tamano_lote
+        self.espera = espera
+        self._cola: List[_Pedido] = []
+        self._condicion = threading.Condition()
+        self._urgente = False
+        self._cerrado = False
+        self._hilo: Optional[threading.Thread] = None
+        # estadísticas
+        self.lotes = 0
+        self.posiciones = 0
+        self.segundos_modelo = 0.0
+
+    # ---------- API ----------
+    def solicitar(self, juego: "Motor", jugadas: Sequence[Optional[Jugada]]) -> "Future[Evaluacion]":
+        """
+        Encola la posición actual (se codifica ya: el juego puede seguir
+        cambiando) y devuelve un Future con su Evaluacion.
+        """
+        mesa = juego.mesa
+        por_clave = mesa.indice.por_clave
+        ids = np.array([-1 if j is None else por_clave[(j[0], j[1], tuple(j[2]))] for j in jugadas], dtype=np.int64)
+        planos, piezas = codificar_posicion(juego)
+        futuro: Future = Future()
+        pedido = _Pedido(planos, piezas, ids, juego.turno_idx, len(juego.jugadores), time.perf_counter(), futuro)
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("El evaluador está cerrado.")
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._atender, name="evaluador-lotes", daemon=True)
+                self._hilo.start()
+            self._cola.append(pedido)
+            if len(self._cola) >= self.tamano_lote or len(self._cola) == 1:
+                self._condicion.notify()
+        return futuro
+
+    def evaluar(self, juego: "Motor", jugadas: Sequence[Optional[Jugada]]) -> Evaluacion:
+        """Versión bloqueante de solicitar() (no espera a juntar un lote)."""
+        futuro = self.solicitar(juego, jugadas)
+        self.vaciar()
+        return futuro.result()
+
+    def vaciar(self) -> None:
+        """Manda lo que haya en la cola sin esperar a completar el lote."""
+        with self._condicion:
+            self._urgente = True
+            self._condicion.notify()
+
+    def estadisticas(self) -> Dict[str, float]:
+        return {
+            "lotes": self.lotes,
+            "posiciones": self.posiciones,
+            "tamano_medio_lote": self.posiciones / self.lotes if self.lotes else 0.0,
+            "segundos_modelo": self.segundos_modelo,
+            "posiciones_por_segundo": self.posiciones / self.segundos_modelo if self.segundos_modelo > 0 else 0.0,
+        }
+
+    def cerrar(self) -> None:
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify()
+        if self._hilo is not None:
+            self._hilo.join()
+
+    def __enter__(self) -> "EvaluadorLotes":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    # ---------- hilo del evaluador ----------
+    def _tomar_lote(self) -> Optional[List[_Pedido]]:
+        with self._condicion:
+            while not self._cola and not self._cerrado:
+                self._condicion.wait()
+            if not self._cola:
+                return None
+            limite = self._cola[0].llegada + self.espera
+            while len(self._cola) < self.tamano_lote and not (self._urgente or self._cerrado):
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                self._condicion.wait(restante)
+            lote = self._cola[:self.tamano_lote]
+            del self._cola[:self.tamano_lote]
+            if not self._cola:
+                self._urgente = False
+            return lote
+
+    def _atender(self) -> None:
+        while True:
+            lote = self._tomar_lote()
+            if lote is None:
+                return
+            try:
+                resultados = self._evaluar_lote(lote)
+            except BaseException as error:  # que ningún hilo de búsqueda quede esperando
+                for pedido in lote:
+                    pedido.futuro.set_exception(error)
+            else:
+                for pedido, resultado in zip(lote, resultados):
+                    pedido.futuro.set_result(resultado)
+
+    def _evaluar_lote(self, lote: List[_Pedido]) -> List[Evaluacion]:
+        inicio = time.perf_counter()
+        planos = np.stack([p.planos for p in lote])
+        piezas = np.stack([p.piezas for p in lote])
+        logits, valores = self.modelo.evaluar(planos, piezas, [p.ids[p.ids >= 0] for p in lote])
+        resultados = []
+        for pedido, logit, valor in zip(lote, logits, valores):
+            # priors: softmax sobre las jugadas pedidas (pasar, si es la única, vale 1)
+            priors = np.full(len(pedido.ids), 1.0 / max(len(pedido.ids), 1))
+            jugables = pedido.ids >= 0
+            if jugables.any():
+                priors[:] = 0.0
+                priors[jugables] = _softmax(logit.astype(np.float64))
+            # valor: softmax entre los asientos que juegan, de vuelta a asientos absolutos
+            n = pedido.num_jugadores
+            relativo = _softmax(valor[:n].astype(np.float64))
+            absoluto = [0.0] * n
+            for k in range(n):
+                absoluto[(pedido.turno + k) % n] = float(relativo[k])
+            resultados.append(Evaluacion(priors.tolist(), absoluto))
+        self.lotes += 1
+        self.posiciones += len(lote)
+        self.segundos_modelo += time.perf_counter() - inicio
+        return resultados
@@ -0,0 +1,300 @@
+# exportador.py
+# Partidas -> datos de entrenamiento en fragmentos .npy de tamaño fijo.
+#
+# Cada acción de cada partida (también los pases) es una posición, vista
+# desde el jugador que mueve: el asiento relativo k es (turno + k) % jugadores.
+#   planos   u8   (N, 4*3, F, C)  por asiento relativo: piezas propias, anclas, prohibidas
+#   piezas   u8   (N, 4, 21)      piezas que le quedan a cada asiento relativo
+#   jugada   i32  (N,)            id de colocación jugada (-1 = pasar)
+#   valor    f32  (N, 4)          resultado final (1 al ganador, repartido en empates)
+#   puntaje  i16  (N, 4)          puntaje final (-cuadros restantes)
+#   jugadores u8  (N,)            número de jugadores (los asientos que faltan van en 0)
+#
+# Se escribe directo a arreglos con mmap (np.lib.format.open_memmap): en
+# memoria solo hay un fragmento abierto y la partida en curso, sin importar
+# cuántas posiciones tenga el conjunto. El último fragmento queda con filas
+# sin usar; indice.json dice cuántas valen en cada uno.
+#
+#   python exportador.py partidas.blk datos/ --por-fragmento 16384
+#   datos = DatosEntrenamiento("datos/")
+#   for lote in datos.lotes(256, random.Random(1)):   # simetría al azar por posición
+#       lote["planos"], lote["jugada"], lote["valor"] ...
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from colocaciones import obtener_indice
+from libro import obtener_simetrias, simetrias
+from mcts import recompensas
+from mesa import Jugada
+from motor import Motor
+from registro import LectorRegistro
+from repositorio_piezas import PIEZAS
+
+VERSION = 1
+MAX_ASIENTOS = 4
+PLANOS_POR_ASIENTO = 3
+PASAR = -1
+_INDICE = "indice.json"
+_CAMPOS = ("planos", "piezas", "jugada", "valor", "puntaje", "jugadores")
+
+def _forma(campo: str, n: int, filas: int, columnas: int) -> tuple:
+    return {
+        "planos": (n, MAX_ASIENTOS * PLANOS_POR_ASIENTO, filas, columnas),
+        "piezas": (n, MAX_ASIENTOS, PIEZAS.n),
+        "jugada": (n,),
+        "valor": (n, MAX_ASIENTOS),
+        "puntaje": (n, MAX_ASIENTOS),
+        "jugadores": (n,),
+    }[campo]
+
+_TIPOS = {"planos": np.uint8, "piezas": np.uint8, "jugada": np.int32,
+          "valor": np.float32, "puntaje": np.int16, "jugadores": np.uint8}
+
+def _ruta(directorio: str, fragmento: int, campo: str) -> str:
+    return os.path.join(directorio, f"{fragmento:05d}_{campo}.npy")
+
+def puntajes_finales(jugadas: Sequence[Optional[Jugada]], num_jugadores: int) -> List[int]:
+    """Puntaje final de cada asiento a partir de las acciones (los turnos van en ronda)."""
+    puntajes = [-PIEZAS.cuadros(PIEZAS.todas)] * num_jugadores
+    for k, jugada in enumerate(jugadas):
+        if jugada is not None:
+            puntajes[k % num_jugadores] += PIEZAS.tamanos[jugada[0]]
+    return puntajes
+
+def codificar_posicion(motor: Motor) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (planos u8 (4*3, F, C), piezas u8 (4, 21)) de la posición, vista desde el
+    jugador que mueve. Es la misma entrada que reciben los modelos (evaluacion_lote.py).
+    """
+    mesa = motor.mesa
+    n = len(motor.jugadores)
+    nb = (mesa.filas * mesa.columnas + 7) // 8
+    orden = [motor.jugadores[(motor.turno_idx + i) % n] for i in range(n)]
+    # todas las máscaras en un solo bloque de bytes: un unpackbits por posición
+    partes = []
+    for j in orden:
+        mesa._asegurar_simbolo(j.simbolo)
+        partes.append(mesa.mascaras.get(j.simbolo, 0).to_bytes(nb, "little"))
+        partes.append(mesa.anclas[j.simbolo].to_bytes(nb, "little"))
+        partes.append(mesa.prohibidas[j.simbolo].to_bytes(nb, "little"))
+    partes.append(bytes(nb * PLANOS_POR_ASIENTO * (MAX_ASIENTOS - n)))
+    for j in orden:
+        partes.append(j.piezas_disponibles.to_bytes(3, "little"))
+    partes.append(bytes(3 * (MAX_ASIENTOS - n)))
+    bits = np.unpackbits(np.frombuffer(b"".join(partes), dtype=np.uint8), bitorder="little")
+    n_planos = MAX_ASIENTOS * PLANOS_POR_ASIENTO
+    corte = n_planos * nb * 8
+    planos = bits[:corte].reshape(n_planos, nb * 8)[:, :mesa.filas * mesa.columnas]
+    piezas = bits[corte:].reshape(MAX_ASIENTOS, 24)[:, :PIEZAS.n]
+    return planos.reshape(n_planos, mesa.filas, mesa.columnas), piezas
+
+class ExportadorDatos:
+    """
+    Agrega partidas (lista de acciones, None = pasar) y las vuelca como
+    posiciones. Usar con 'with' o llamar a cerrar() para escribir el índice.
+    """
+    def __init__(self, directorio: str, por_fragmento: int = 16384, filas: int = 20, columnas: int = 20):
+        if por_fragmento <= 0:
+            raise ValueError("por_fragmento debe ser positivo.")
+        self.directorio = directorio
+        self.por_fragmento = por_fragmento
+        self.filas = filas
+        self.columnas = columnas
+        self.fragmentos: List[int] = []  # posiciones válidas de cada fragmento
+        self.partidas = 0
+        self._arreglos: Dict[str, np.ndarray] = {}
+        self._fila = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    @property
+    def posiciones(self) -> int:
+        return sum(self.fragmentos)
+
+    # ---------- fragmentos ----------
+    def _abrir(self) -> None:
+        fragmento = len(self.fragmentos)
+        for campo in _CAMPOS:
+            self._arreglos[campo] = np.lib.format.open_memmap(
+                _ruta(self.directorio, fragmento, campo), mode="w+", dtype=_TIPOS[campo],
+                shape=_forma(campo, self.por_fragmento, self.filas, self.columnas))
+        self.fragmentos.append(0)
+        self._fila = 0
+
+    def _cerrar_fragmento(self) -> None:
+        for arreglo in self._arreglos.values():
+            arreglo.flush()
+        # soltar los mmap: lo escrito queda en disco y fuera de la memoria del proceso
+        self._arreglos = {}
+
+    # ---------- partidas ----------
+    def agregar_partida(self, jugadas: Sequence[Optional[Jugada]], num_jugadores: int) -> int:
+        """Reproduce la partida y escribe una posición por acción. Devuelve cuántas escribió."""
+        if not 2 <= num_jugadores <= MAX_ASIENTOS:
+            raise ValueError(f"Número de jugadores no soportado: {num_jugadores}")
+        motor = Motor(self.filas, self.columnas, num_jugadores)
+        indice = motor.mesa.indice
+        puntajes = puntajes_finales(jugadas, num_jugadores)
+        valores = recompensas(puntajes)
+        for k, jugada in enumerate(jugadas):
+            if jugada is None:
+                objetivo = PASAR
+            else:
+                ok, motivo = motor.validar(jugada)
+                if not ok:
+                    raise ValueError(f"Partida {self.partidas}, acción {k}: jugada ilegal {jugada}: {motivo}")
+                objetivo = indice.por_clave[(jugada[0], jugada[1], tuple(jugada[2]))]
+
+            if not self._arreglos:
+                self._abrir()
+            a, fila = self._arreglos, self._fila
+            orden = [(motor.turno_idx + i) % num_jugadores for i in range(num_jugadores)]
+            a["planos"][fila], a["piezas"][fila] = codificar_posicion(motor)
+            a["jugada"][fila] = objetivo
+            a["valor"][fila] = [valores[i] for i in orden] + [0.0] * (MAX_ASIENTOS - num_jugadores)
+            a["puntaje"][fila] = [puntajes[i] for i in orden] + [0] * (MAX_ASIENTOS - num_jugadores)
+            a["jugadores"][fila] = num_jugadores
+            self._fila += 1
+            self.fragmentos[-1] = self._fila
+            if self._fila == self.por_fragmento:
+                self._cerrar_fragmento()
+
+            if jugada is None:
+                motor.pasar()
+            else:
+                motor.jugar(jugada)
+        self.partidas += 1
+        return len(jugadas)
+
+    def cerrar(self) -> None:
+        if self._arreglos:
+            # filas sobrantes del último fragmento: en cero
+            for arreglo in self._arreglos.values():
+                arreglo[self._fila:] = 0
+            self._cerrar_fragmento()
+        with open(os.path.join(self.directorio, _INDICE), "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "filas": self.filas, "columnas": self.columnas,
+                       "por_fragmento": self.por_fragmento, "partidas": self.partidas,
+                       "fragmentos": self.fragmentos}, f, indent=2)
+
+    def __enter__(self) -> "ExportadorDatos":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+def exportar_registro(ruta: str, directorio: str, por_fragmento: int = 16384,
+                      limite: Optional[int] = None) -> ExportadorDatos:
+    """Exporta las partidas de un registro binario (registro.py), de a una."""
+    with LectorRegistro(ruta) as lector:
+        with ExportadorDatos(directorio, por_fragmento, lector.filas, lector.columnas) as exportador:
+            for n in range(len(lector) if limite is None else min(limite, len(lector))):
+                _, num_jugadores, _ = lector.info(n)
+                exportador.agregar_partida(lector.jugadas(n), num_jugadores)
+    return exportador
+
+# ---------------- lectura con aumento por simetrías ----------------
+class DatosEntrenamiento:
+    """
+    Lee un directorio exportado sin cargarlo en memoria (np.load con mmap).
+    lote(indices, simetria) aplica al vuelo una simetría del tablero (las 8
+    de libro.simetrias en tableros cuadrados, 4 si no) a planos y jugadas.
+    """
+    def __init__(self, directorio: str):
+        with open(os.path.join(directorio, _INDICE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != VERSION:
+            raise ValueError(f"Versión de exportación desconocida: {meta['version']}")
+        self.filas = meta["filas"]
+        self.columnas = meta["columnas"]
+        self.por_fragmento = meta["por_fragmento"]
+        self.fragmentos: List[int] = meta["fragmentos"]
+        self._inicios = np.cumsum([0] + self.fragmentos)
+        self._arreglos = [{campo: np.load(_ruta(directorio, k, campo), mmap_mode="r") for campo in _CAMPOS}
+                          for k in range(len(self.fragmentos))]
+        self.simetrias = simetrias(self.filas, self.columnas)
+        # origen[s][celda destino] = celda de la que viene bajo la simetría s
+        self._origen = np.empty((len(self.simetrias), self.filas * self.columnas), dtype=np.intp)
+        for k, (a, b, e, g, h, m) in enumerate(self.simetrias):
+            r, c = np.divmod(np.arange(self.filas * self.columnas), self.columnas)
+            self._origen[k, (a * r + b * c + e) * self.columnas + g * r + h * c + m] = np.arange(r.size)
+        self._jugadas: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self._inicios[-1])
+
+    def _tabla_jugadas(self) -> np.ndarray:
+        """directa[s][id] de libro.TablaSimetrias como arreglo (se arma la primera vez)."""
+        if self._jugadas is None:
+            tabla = obtener_simetrias(obtener_indice(self.filas, self.columnas))
+            self._jugadas = np.array(tabla.directa, dtype=np.int32)
+        return self._jugadas
+
+    def lote(self, indices: Sequence[int], simetria: Union[None, int, Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Posiciones 'indices' (globales) como arreglos nuevos. 'simetria' es una
+        para todo el lote, una por posición, o None (sin transformar).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= len(self)):
+            raise IndexError("Posición fuera de rango.")
+        fragmento = np.searchsorted(self._inicios, indices, side="right") - 1
+        fila = indices - self._inicios[fragmento]
+        lote = {campo: np.empty(_forma(campo, indices.size, self.filas, self.columnas), dtype=_TIPOS[campo])
+                for campo in _CAMPOS}
+        for k in np.unique(fragmento):
+            cuales = np.nonzero(fragmento == k)[0]
+            filas = fila[cuales]
+            for campo in _CAMPOS:
+                lote[campo][cuales] = self._arreglos[k][campo][filas]
+        if simetria is not None:
+            self._transformar(lote, np.broadcast_to(np.asarray(simetria, dtype=np.int64), indices.shape))
+        return lote
+
+    def _transformar(self, lote: Dict[str, np.ndarray], simetria: np.ndarray) -> None:
+        n = len(simetria)
+        planos = lote["planos"].reshape(n, -1, self.filas * self.columnas)
+        jugadas = lote["jugada"]
+        for s in np.unique(simetria):
+            if s == 0:
+                continue  # la primera es la identidad
+            cuales = np.nonzero(simetria == s)[0]
+            planos[cuales] = planos[cuales][:, :, self._origen[s]]
+            objetivo = jugadas[cuales]
+            jugar = objetivo != PASAR
+            objetivo[jugar] = self._tabla_jugadas()[s][objetivo[jugar]]
+            jugadas[cuales] = objetivo
+
+    def lotes(self, tamano: int, rng: Optional[random.Random] = None,
+              aumentar: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+        """Una pasada completa en orden aleatorio; con 'aumentar', simetría al azar por posición."""
+        rng = rng or random.Random()
+        generador = np.random.default_rng(rng.getrandbits(64))
+        orden = generador.permutation(len(self))
+        for desde in range(0, len(orden), tamano):
+            indices = orden[desde:desde + tamano]
+            simetria = generador.integers(len(self.simetrias), size=indices.size) if aumentar else None
+            yield self.lote(indices, simetria)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta partidas de un registro como datos de entrenamiento.")
+    parser.add_argument("registro", help="archivo .blk (registro.py)")
+    parser.add_argument("directorio", help="carpeta de salida para los fragmentos .npy")
+    parser.add_argument("--por-fragmento", type=int, default=16384, help="posiciones por fragmento")
+    parser.add_argument("--limite", type=int, default=None, help="exportar solo las primeras N partidas")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    exportador = exportar_registro(args.registro, args.directorio, args.por_fragmento, args.limite)
+    segundos = time.perf_counter() - inicio
+    print(f"{exportador.partidas} partidas, {exportador.posiciones} posiciones en "
+          f"{len(exportador.fragmentos)} fragmentos ({segundos:.1f}s, "
+          f"{exportador.posiciones / max(segundos, 1e-9):.0f} posiciones/s) -> {args.directorio}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
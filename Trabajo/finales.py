@@ -0,0 +1,293 @@
+# finales.py
+# Resolución exacta de finales de partida.
+#
+# Cuando quedan pocas jugadas legales en total, el árbol cabe en una búsqueda
+# completa: alfa-beta paranoico sobre el diferencial de puntaje final (el
+# jugador de la raíz menos el mejor rival), con memoria de subposiciones.
+#
+# Regiones independientes: la zona de un jugador son las celdas libres, no
+# prohibidas para él, conectadas (por lado o esquina) a sus anclas vivas;
+# toda pieza que pueda colocar en el futuro cae dentro. Si la zona de un
+# jugador no toca la de nadie más, lo que haga no afecta a los demás ni al
+# revés: se saca de la búsqueda (pasa) y su ganancia se calcula aparte como un
+# problema de empaquetado de un solo jugador, resolviendo por separado cada
+# componente de su zona y combinando las piezas usadas en cada una.
+#
+# Se corta por nodos y por tiempo: si no termina, resolver() devuelve None y
+# el agente sigue con su búsqueda normal.
+import collections
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from mesa import Jugada, Mesa
+from repositorio_piezas import PIEZAS
+from transposicion import COTA_INFERIOR, COTA_SUPERIOR, EXACTO, TablaTransposicion
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+INFINITO = float("inf")
+# profundidad con la que se guardan los valores exactos en la tabla
+_EXACTA = 1 << 16
+
+class _SinPresupuesto(Exception):
+    pass
+
+def jugadas_restantes(juego: "Motor", tope: int) -> int:
+    """Jugadas legales sumando todos los jugadores (deja de contar al pasar 'tope')."""
+    total = 0
+    for j in juego.jugadores:
+        if j.piezas_disponibles:
+            total += sum(1 for _ in islice(juego.mesa.iter_jugadas_legales(j.simbolo, j.piezas_disponibles),
+                                           tope + 1 - total))
+            if total > tope:
+                break
+    return total
+
+class SolucionadorFinal:
+    """
+    resolver(juego) -> (mejor jugada, diferencial final exacto) o None si se
+    agota el presupuesto (max_nodos / tiempo_limite) o no es un final
+    (más de 'umbral' jugadas legales en total).
+    Las ganancias de empaquetado ya calculadas se conservan entre búsquedas
+    (las zonas aisladas suelen repetirse de un turno al siguiente), hasta
+    'capacidad_empaquetados' entradas; se descartan las menos usadas.
+    """
+    def __init__(
+        self,
+        umbral: int = 30,
+        max_nodos: int = 20_000,
+        tiempo_limite: Optional[float] = None,
+        capacidad_tt: int = 1 << 16,
+        capacidad_empaquetados: int = 1 << 12,
+    ):
+        self.umbral = umbral
+        self.max_nodos = max_nodos
+        self.tiempo_limite = tiempo_limite
+        self.tt = TablaTransposicion(capacidad_tt)
+        self.capacidad_empaquetados = capacidad_empaquetados
+        self._empaquetados: "collections.OrderedDict[Tuple[str, int, int, int], int]" = collections.OrderedDict()
+        self._bordes: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self._informe: Dict[str, Any] = {}
+
+    # ---------- API ----------
+    def activo(self, juego: "Motor") -> bool:
+        return jugadas_restantes(juego, self.umbral) <= self.umbral
+
+    def resolver(self, juego: "Motor") -> Optional[Tuple[Optional[Jugada], float]]:
+        if juego.terminado() or not self.activo(juego):
+            return None
+        self._juego = juego
+        self._raiz = juego.turno_idx
+        self._nodos = 0
+        inicio = time.perf_counter()
+        self._limite = inicio + self.tiempo_limite if self.tiempo_limite is not None else None
+        self.tt.nueva_busqueda()
+        resultado: Optional[Tuple[Optional[Jugada], float]] = None
+        try:
+            resultado = self._raiz_exacta()
+        except _SinPresupuesto:
+            pass
+        finally:
+            del self._juego
+        self._informe = {
+            "resuelto": resultado is not None,
+            "nodos": self._nodos,
+            "segundos": time.perf_counter() - inicio,
+            "valor": resultado[1] if resultado is not None else None,
+        }
+        return resultado
+
+    def informe(self) -> Dict[str, Any]:
+        return dict(self._informe)
+
+    # ---------- zonas ----------
+    def _inundar8(self, mesa: Mesa, semillas: int, libre: int) -> int:
+        """Celdas de 'libre' conectadas por lado o esquina a 'semillas'."""
+        c = mesa.columnas
+        bordes = self._bordes.get((mesa.filas, c))
+        if bordes is None:
+            sin_col_0 = sin_col_n = (1 << (mesa.filas * c)) - 1
+            for r in range(mesa.filas):
+                sin_col_0 &= ~(1 << (r * c))
+                sin_col_n &= ~(1 << (r * c + c - 1))
+            bordes = self._bordes[(mesa.filas, c)] = (sin_col_0, sin_col_n)
+        sin_col_0, sin_col_n = bordes
+        region = semillas & libre
+        while True:
+            derecha = (region << 1) & sin_col_0
+            izquierda = (region >> 1) & sin_col_n
+            fila = region | derecha | izquierda
+            nueva = (fila | (fila << c) | (fila >> c)) & libre
+            if nueva == region:
+                return region
+            region = nueva
+
+    def _zonas(self, juego: "Motor") -> List[int]:
+        """Zona de cada asiento (0 si ya no le queda ninguna pieza viva)."""
+        mesa = juego.mesa
+        libres = ((1 << (mesa.filas * mesa.columnas)) - 1) & ~mesa.ocupadas
+        zonas = []
+        for j in juego.jugadores:
+            mesa._asegurar_simbolo(j.simbolo)
+            piezas, anclas = mesa._vivas(j.simbolo, j.piezas_disponibles)
+            zonas.append(self._inundar8(mesa, anclas, libres & ~mesa.prohibidas[j.simbolo]) if piezas else 0)
+        return zonas
+
+    def _aislados(self, zonas: List[int]) -> List[bool]:
+        aislados = []
+        for i, z in enumerate(zonas):
+            otras = 0
+            for k, w in enumerate(zonas):
+                if k != i:
+                    otras |= w
+            aislados.append(not z & otras)
+        return aislados
+
+    # ---------- empaquetado de un jugador aislado ----------
+    def _ganancia(self, juego: "Motor", asiento: int, zona: int) -> int:
+        """Máximo de cuadros que el jugador puede agregar dentro de su zona (aislada)."""
+        if not zona:
+            return 0
+        jugador = juego.jugadores[asiento]
+        mesa = juego.mesa
+        clave = (jugador.simbolo, mesa.anclas[jugador.simbolo] & zona, zona, jugador.piezas_disponibles)
+        ganancia = self._empaquetados.get(clave)
+        if ganancia is not None:
+            self._empaquetados.move_to_end(clave)
+            return ganancia
+
+        # cada componente de la zona por separado: conjuntos de piezas usables
+        mejores: Dict[int, int] = {0: 0}  # piezas usadas -> cuadros
+        resto = zona
+        while resto:
+            region = self._inundar8(mesa, resto & -resto, zona)
+            resto &= ~region
+            usados: set = set()
+            self._usos(mesa, jugador.simbolo, jugador.piezas_disponibles, region, 0, usados, set())
+            combinados: Dict[int, int] = {}
+            for previos, cuadros in mejores.items():
+                for u in usados:
+                    if not previos & u:
+                        total = previos | u
+                        combinados[total] = max(combinados.get(total, 0), cuadros + PIEZAS.cuadros(u))
+            mejores = combinados
+        ganancia = max(mejores.values())
+        self._empaquetados[clave] = ganancia
+        if len(self._empaquetados) > self.capacidad_empaquetados:
+            self._empaquetados.popitem(last=False)
+        return ganancia
+
+    def _usos(self, mesa: Mesa, simbolo: str, inventario: int, region: int, usadas: int,
+              usos: set, vistos: set) -> None:
+        """Todos los conjuntos de piezas que se pueden colocar, en algún orden, dentro de 'region'."""
+        self._contar()
+        estado = (mesa.mascaras.get(simbolo, 0) & region, usadas)
+        if estado in vistos:
+            return
+        vistos.add(estado)
+        usos.add(usadas)
+        indice = mesa.indice
+        for jugada in mesa.jugadas_legales(simbolo, inventario & ~usadas):
+            if indice.mascara[indice.por_clave[jugada]] & ~region:
+                continue
+            mesa.aplicar(simbolo, jugada)
+            try:
+                self._usos(mesa, simbolo, inventario, region, usadas | 1 << jugada[0], usos, vistos)
+            finally:
+                mesa.deshacer()
+
+    # ---------- búsqueda exacta ----------
+    def _contar(self) -> None:
+        self._nodos += 1
+        if self._nodos > self.max_nodos:
+            raise _SinPresupuesto()
+        if self._limite is not None and not self._nodos & 63 and time.perf_counter() >= self._limite:
+            raise _SinPresupuesto()
+
+    def _diferencial(self, juego: "Motor", zonas: List[int], aislados: List[bool]) -> float:
+        finales = [p + (self._ganancia(juego, i, zonas[i]) if aislados[i] else 0)
+                   for i, p in enumerate(juego.puntajes())]
+        raiz = self._raiz
+        return finales[raiz] - max(p for i, p in enumerate(finales) if i != raiz)
+
+    def _ordenar(self, jugadas: List[Jugada], jugada_tt: Optional[Jugada]) -> List[Jugada]:
+        jugadas.sort(key=lambda j: (j == jugada_tt, PIEZAS.tamanos[j[0]]), reverse=True)
+        return jugadas
+
+    def _raiz_exacta(self) -> Tuple[Optional[Jugada], float]:
+        juego = self._juego
+        jugadas = juego.jugadas_legales()
+        if not jugadas:
+            return None, self._alfabeta(-INFINITO, INFINITO, pasar=True)
+        mejor, mejor_valor = jugadas[0], -INFINITO
+        for jugada in self._ordenar(jugadas, None):
+            juego.jugar(jugada)
+            try:
+                valor = self._alfabeta(mejor_valor, INFINITO)
+            finally:
+                juego.deshacer()
+            if valor > mejor_valor:
+                mejor, mejor_valor = jugada, valor
+        return mejor, mejor_valor
+
+    def _alfabeta(self, alfa: float, beta: float, pasar: bool = False) -> float:
+        """Diferencial final exacto para el jugador de la raíz (rivales en su contra)."""
+        self._contar()
+        juego = self._juego
+        if pasar:
+            juego.pasar()
+            try:
+                return self._alfabeta(alfa, beta)
+            finally:
+                juego.deshacer()
+
+        zonas = self._zonas(juego)
+        aislados = self._aislados(zonas)
+        if juego.terminado() or all(a or not z for a, z in zip(aislados, zonas)):
+            return self._diferencial(juego, zonas, aislados)
+        turno = juego.turno_idx
+        if aislados[turno] or not zonas[turno]:
+            # juega aparte (se suma en las hojas) o ya no puede jugar
+            return self._alfabeta(alfa, beta, pasar=True)
+
+        clave = juego.clave_posicion() ^ (juego.pases_consecutivos << 64) ^ (self._raiz << 68)
+        entrada = self.tt.buscar(clave)
+        jugada_tt = None
+        if entrada is not None:
+            jugada_tt = entrada.jugada
+            if (entrada.tipo == EXACTO
+                    or (entrada.tipo == COTA_INFERIOR and entrada.valor >= beta)
+                    or (entrada.tipo == COTA_SUPERIOR and entrada.valor <= alfa)):
+                return entrada.valor
+
+        jugadas = juego.jugadas_legales()
+        if not jugadas:
+            return self._alfabeta(alfa, beta, pasar=True)
+        maximiza = turno == self._raiz
+        alfa_0, beta_0 = alfa, beta
+        mejor, mejor_valor = jugadas[0], -INFINITO if maximiza else INFINITO
+        for jugada in self._ordenar(jugadas, jugada_tt):
+            juego.jugar(jugada)
+            try:
+                valor = self._alfabeta(alfa, beta)
+            finally:
+                juego.deshacer()
+            if maximiza:
+                if valor > mejor_valor:
+                    mejor, mejor_valor = jugada, valor
+                    alfa = max(alfa, valor)
+            elif valor < mejor_valor:
+                mejor, mejor_valor = jugada, valor
+                beta = min(beta, valor)
+            if alfa >= beta:
+                break
+
+        if mejor_valor <= alfa_0:
+            tipo = COTA_SUPERIOR
+        elif mejor_valor >= beta_0:
+            tipo = COTA_INFERIOR
+        else:
+            tipo = EXACTO
+        self.tt.guardar(clave, mejor_valor, _EXACTA, tipo, mejor)
+        return mejor_valor
@@ -0,0 +1,158 @@
+# instantanea.py
+# Foto inmutable y compacta de una posición (Motor / Juego).
+#
+# Guarda, por asiento, los ids de colocación de sus piezas en el orden en que
+# las puso; de ahí salen el tablero, el inventario, las celdas de cada pieza
+# y si ya hizo su primera jugada. Además: turno, pases consecutivos y quién
+# pasó. Todo lo demás (anclas, prohibidas, hash) se recalcula al restaurar,
+# y el resultado no depende de cómo se intercalen los asientos.
+#
+# Al restaurar se arma además un historial: una partida por rondas, desde el
+# asiento 0, que llega a la misma posición (mismo turno, pases y quién pasó).
+# Así deshacer() y todo lo que lea el historial siguen siendo coherentes con
+# el tablero, aunque los pases y el orden entre asientos no sean los reales.
+#
+#   foto = Instantanea.capturar(juego)
+#   datos = foto.codificar()                  # siempre TAMANO bytes
+#   copia = Instantanea.decodificar(datos).motor()
+#   foto.restaurar(otro_juego)
+#
+# Formato binario (TAMANO = 176 bytes):
+#   versión, filas, columnas, num_jugadores, turno, pases, pasaron (bits por
+#   asiento), reservado (u8 cada uno); luego 4 asientos × 21 ids de colocación
+#   (u16, 0xFFFF = vacío).
+import struct
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+from colocaciones import IndiceColocaciones, obtener_indice
+from mesa import Mesa
+from repositorio_piezas import PIEZAS
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+VERSION = 1
+MAX_ASIENTOS = 4
+_VACIO = 0xFFFF
+_FORMATO = struct.Struct(f"<8B{MAX_ASIENTOS * PIEZAS.n}H")
+TAMANO = _FORMATO.size
+
+class Instantanea(NamedTuple):
+    filas: int
+    columnas: int
+    turno: int
+    pases: int
+    pasaron: Tuple[bool, ...]                 # ha_pasado de cada asiento
+    colocaciones: Tuple[Tuple[int, ...], ...]  # ids de colocación de cada asiento, en orden
+
+    @classmethod
+    def capturar(cls, juego: "Motor") -> "Instantanea":
+        """Foto de la posición actual. O(piezas colocadas)."""
+        mesa = juego.mesa
+        por_simbolo = {j.simbolo: [] for j in juego.jugadores}
+        for entrada in mesa._pila:
+            por_simbolo[entrada[0]].append(entrada[1])
+        return cls(mesa.filas, mesa.columnas, juego.turno_idx, juego.pases_consecutivos,
+                   tuple(j.ha_pasado for j in juego.jugadores),
+                   tuple(tuple(por_simbolo[j.simbolo]) for j in juego.jugadores))
+
+    @property
+    def num_jugadores(self) -> int:
+        return len(self.colocaciones)
+
+    def inventario(self, asiento: int) -> int:
+        """Máscara de piezas que le quedan al asiento."""
+        return self._inventario(obtener_indice(self.filas, self.columnas), asiento)
+
+    def _inventario(self, indice: IndiceColocaciones, asiento: int) -> int:
+        inventario = PIEZAS.todas
+        for idx in self.colocaciones[asiento]:
+            inventario &= ~(1 << indice.pieza[idx])
+        return inventario
+
+    # ---------- volver a un juego ----------
+    def _acciones(self) -> List[Tuple[int, Optional[int]]]:
+        """
+        (asiento, id de colocación o None = pasar) de una partida por rondas
+        que termina con el turno en self.turno. Cada asiento conserva el orden
+        de sus piezas, que es lo único que importa para que sean válidas;
+        quien pasó al final pasa después de sus piezas y el resto antes.
+        """
+        n = self.num_jugadores
+        turno = self.turno
+        rondas = max([len(propias) + self.pasaron[a] - (a < turno)
+                      for a, propias in enumerate(self.colocaciones)] + [0])
+        turnos_por_asiento = []
+        for a, propias in enumerate(self.colocaciones):
+            pases: List[Optional[int]] = [None] * (rondas + (a < turno) - len(propias))
+            turnos_por_asiento.append(list(propias) + pases if self.pasaron[a] else pases + list(propias))
+        return [(a, turnos_por_asiento[a][k]) for k in range(rondas + 1) for a in range(n)
+                if k < len(turnos_por_asiento[a])]
+
+    def restaurar(self, juego: "Motor") -> None:
+        """
+        Lleva un Motor/Juego existente (con el mismo número de jugadores) a esta
+        posición, con un historial equivalente (ver _acciones) para deshacer.
+        """
+        if len(juego.jugadores) != self.num_jugadores:
+            raise ValueError(f"La foto es de {self.num_jugadores} jugadores, el juego tiene {len(juego.jugadores)}.")
+        mesa = Mesa(self.filas, self.columnas, verificar=juego.verificar)
+        indice = mesa.indice
+        historial = []
+        pasaron = [False] * self.num_jugadores
+        pases = 0
+        for asiento, idx in self._acciones():
+            jugada = None if idx is None else indice.clave(idx)
+            historial.append((jugada, pasaron[asiento], pases))
+            if jugada is None:
+                pasaron[asiento] = True
+                pases += 1
+            else:
+                mesa.aplicar(juego.jugadores[asiento].simbolo, jugada)
+                pasaron[asiento] = False
+                pases = 0
+        if tuple(pasaron) != tuple(self.pasaron) or pases != self.pases:
+            raise ValueError("La instantánea no corresponde a ninguna partida (turno, pases y quién pasó no cuadran).")
+        juego.mesa = mesa
+        for asiento, jugador in enumerate(juego.jugadores):
+            jugador.piezas_disponibles = self._inventario(indice, asiento)
+            jugador.cuadros_restantes = PIEZAS.cuadros(jugador.piezas_disponibles)
+            jugador.piezas_colocadas = {indice.pieza[idx]: list(indice.celdas[idx])
+                                        for idx in self.colocaciones[asiento]}
+            jugador.ha_pasado = self.pasaron[asiento]
+        juego.turno_idx = self.turno
+        juego.pases_consecutivos = self.pases
+        juego.historial = historial
+
+    def motor(self, verificar: bool = False) -> "Motor":
+        """Motor nuevo en esta posición (clonar = Instantanea.capturar(juego).motor())."""
+        from motor import Motor
+        juego = Motor(self.filas, self.columnas, self.num_jugadores, verificar)
+        self.restaurar(juego)
+        return juego
+
+    # ---------- binario ----------
+    def codificar(self) -> bytes:
+        """Siempre TAMANO bytes."""
+        pasaron = sum(1 << i for i, p in enumerate(self.pasaron) if p)
+        ids = []
+        for asiento in range(MAX_ASIENTOS):
+            propias = self.colocaciones[asiento] if asiento < self.num_jugadores else ()
+            if any(idx >= _VACIO for idx in propias):
+                raise ValueError("Tablero demasiado grande para ids de 16 bits.")
+            ids.extend(propias)
+            ids.extend([_VACIO] * (PIEZAS.n - len(propias)))
+        return _FORMATO.pack(VERSION, self.filas, self.columnas, self.num_jugadores,
+                             self.turno, self.pases, pasaron, 0, *ids)
+
+    @classmethod
+    def decodificar(cls, datos: bytes) -> "Instantanea":
+        if len(datos) != TAMANO:
+            raise ValueError(f"Una instantánea ocupa {TAMANO} bytes, no {len(datos)}.")
+        campos = _FORMATO.unpack(datos)
+        version, filas, columnas, n, turno, pases, pasaron, _ = campos[:8]
+        if version != VERSION:
+            raise ValueError(f"Versión de instantánea desconocida: {version}")
+        ids = campos[8:]
+        colocaciones = tuple(
+            tuple(idx for idx in ids[a * PIEZAS.n:(a + 1) * PIEZAS.n] if idx != _VACIO) for a in range(n))
+        return cls(filas, columnas, turno, pases, tuple(bool(pasaron >> i & 1) for i in range(n)), colocaciones)
@@ -0,0 +1,218 @@
+# instrumentacion.py
+# Contadores y tiempos opcionales para ver dónde se va el tiempo de un turno.
+#
+# Apagada no cuesta nada: activar() reemplaza los métodos calientes por
+# versiones que cuentan y miden, y desactivar() deja los originales.
+# Se mide:
+#   - Mesa.validar_colocacion: llamadas y tiempo por motivo de rechazo
+#   - RepositorioPiezas.orientaciones: aciertos / fallos de cache
+#   - generación de jugadas (jugadas_legales, hay_jugada_legal, jugada_aleatoria)
+#   - latencia por turno (con el bloque 'with INSTR.turno():')
+# Además PerfiladorMuestreo toma muestras de la pila de un hilo para ver qué
+# funciones dominan un turno o un torneo completo.
+import contextlib
+import functools
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_NULO = contextlib.nullcontext()
+
+class Instrumentacion:
+    def __init__(self):
+        self.activo = False
+        self._originales: List[Tuple[type, str, Callable]] = []
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self.validar: Dict[str, List[float]] = {}       # motivo -> [llamadas, segundos]
+        self.generacion: Dict[str, List[float]] = {}    # método -> [llamadas, segundos]
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        self.turnos: List[float] = []
+
+    # ---------- encendido / apagado ----------
+    def activar(self) -> None:
+        if self.activo:
+            return
+        from mesa import Mesa
+        from repositorio_piezas import RepositorioPiezas
+        self._envolver(Mesa, "validar_colocacion", self._medir_validar)
+        for nombre in ("jugadas_legales", "hay_jugada_legal", "jugada_aleatoria"):
+            self._envolver(Mesa, nombre, functools.partial(self._medir_generacion, nombre))
+        self._envolver(RepositorioPiezas, "orientaciones", self._medir_orientaciones)
+        self.activo = True
+
+    def desactivar(self) -> None:
+        for clase, nombre, original in reversed(self._originales):
+            setattr(clase, nombre, original)
+        self._originales = []
+        self.activo = False
+
+    def _envolver(self, clase: type, nombre: str, medidor: Callable) -> None:
+        original = getattr(clase, nombre)
+
+        @functools.wraps(original)
+        def envoltura(*args, **kwargs):
+            return medidor(original, *args, **kwargs)
+
+        self._originales.append((clase, nombre, original))
+        setattr(clase, nombre, envoltura)
+
+    # ---------- medidores ----------
+    def _medir_validar(self, original, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = original(*args, **kwargs)
+        segundos = time.perf_counter() - inicio
+        # "Pieza no reconocida: XX" -> una sola categoría
+        motivo = resultado[2].split(":")[0]
+        d = self.validar.setdefault(motivo, [0, 0.0])
+        d[0] += 1
+        d[1] += segundos
+        return resultado
+
+    def _medir_generacion(self, nombre, original, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = original(*args, **kwargs)
+        d = self.generacion.setdefault(nombre, [0, 0.0])
+        d[0] += 1
+        d[1] += time.perf_counter() - inicio
+        return resultado
+
+    def _medir_orientaciones(self, original, repo, pieza_id):
+        if pieza_id in repo._cache_orient:
+            self.cache_aciertos += 1
+        else:
+            self.cache_fallos += 1
+        return original(repo, pieza_id)
+
+    def turno(self):
+        """Bloque 'with' que mide la latencia de un turno (no hace nada si está apagada)."""
+        if not self.activo:
+            return _NULO
+        return self._medir_turno()
+
+    @contextlib.contextmanager
+    def _medir_turno(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.turnos.append(time.perf_counter() - inicio)
+
+    # ---------- resultados ----------
+    def foto(self) -> Dict[str, Any]:
+        """Contadores actuales como un diccionario serializable a JSON."""
+        turnos = sorted(self.turnos)
+
+        def percentil(p: float) -> float:
+            return turnos[min(len(turnos) - 1, int(p * len(turnos)))] if turnos else 0.0
+
+        return {
+            "validar": {
+                "llamadas": sum(d[0] for d in self.validar.values()),
+                "segundos": sum(d[1] for d in self.validar.values()),
+                "por_motivo": {m: {"llamadas": d[0], "segundos": d[1]} for m, d in self.validar.items()},
+            },
+            "orientaciones_cache": {"aciertos": self.cache_aciertos, "fallos": self.cache_fallos},
+            "generacion": {n: {"llamadas": d[0], "segundos": d[1]} for n, d in self.generacion.items()},
+            "turnos": {
+                "n": len(turnos),
+                "segundos": sum(turnos),
+                "p50": percentil(0.50),
+                "p95": percentil(0.95),
+                "max": turnos[-1] if turnos else 0.0,
+            },
+        }
+
+INSTR = Instrumentacion()
+
+def sumar_fotos(fotos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Agrega fotos de varias partidas/procesos (los percentiles de turno no se suman)."""
+    total: Dict[str, Any] = {
+        "validar": {"llamadas": 0, "segundos": 0.0, "por_motivo": {}},
+        "orientaciones_cache": {"aciertos": 0, "fallos": 0},
+        "generacion": {},
+        "turnos": {"n": 0, "segundos": 0.0, "max": 0.0},
+    }
+    for f in fotos:
+        total["validar"]["llamadas"] += f["validar"]["llamadas"]
+        total["validar"]["segundos"] += f["validar"]["segundos"]
+        for m, d in f["validar"]["por_motivo"].items():
+            t = total["validar"]["por_motivo"].setdefault(m, {"llamadas": 0, "segundos": 0.0})
+            t["llamadas"] += d["llamadas"]
+            t["segundos"] += d["segundos"]
+        for k in ("aciertos", "fallos"):
+            total["orientaciones_cache"][k] += f["orientaciones_cache"][k]
+        for n, d in f["generacion"].items():
+            t = total["generacion"].setdefault(n, {"llamadas": 0, "segundos": 0.0})
+            t["llamadas"] += d["llamadas"]
+            t["segundos"] += d["segundos"]
+        total["turnos"]["n"] += f["turnos"]["n"]
+        total["turnos"]["segundos"] += f["turnos"]["segundos"]
+        total["turnos"]["max"] = max(total["turnos"]["max"], f["turnos"]["max"])
+    return total
+
+# ---------------- perfilador por muestreo ----------------
+class PerfiladorMuestreo:
+    """
+    Cada 'intervalo' segundos toma la pila del hilo observado desde un hilo
+    aparte y cuenta cuántas veces aparece cada pila. Se usa como bloque 'with'
+    alrededor de un turno o de todo un torneo.
+    """
+    def __init__(self, intervalo: float = 0.005, hilo: Optional[int] = None):
+        self.intervalo = intervalo
+        self.hilo = hilo
+        self.pilas: Dict[Tuple[str, ...], int] = {}
+        self.muestras = 0
+        self._parar = threading.Event()
+        self._muestreador: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "PerfiladorMuestreo":
+        if self.hilo is None:
+            self.hilo = threading.get_ident()
+        self._parar.clear()
+        self._muestreador = threading.Thread(target=self._muestrear, daemon=True)
+        self._muestreador.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._parar.set()
+        self._muestreador.join()
+
+    def _muestrear(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo)
+            pila = []
+            while marco is not None:
+                codigo = marco.f_code
+                pila.append(f"{codigo.co_filename.rsplit('/', 1)[-1]}:{codigo.co_name}")
+                marco = marco.f_back
+            if pila:
+                clave = tuple(reversed(pila))
+                self.pilas[clave] = self.pilas.get(clave, 0) + 1
+                self.muestras += 1
+
+    def propias(self, n: int = 20) -> List[Tuple[str, float]]:
+        """Funciones con más muestras propias (en la cima de la pila), como fracción."""
+        conteo: Dict[str, int] = {}
+        for pila, k in self.pilas.items():
+            conteo[pila[-1]] = conteo.get(pila[-1], 0) + k
+        total = self.muestras or 1
+        return [(f, k / total) for f, k in sorted(conteo.items(), key=lambda x: -x[1])[:n]]
+
+    def acumuladas(self, n: int = 20) -> List[Tuple[str, float]]:
+        """Funciones presentes en más muestras (propias o en llamadas hijas), como fracción."""
+        conteo: Dict[str, int] = {}
+        for pila, k in self.pilas.items():
+            for f in set(pila):
+                conteo[f] = conteo.get(f, 0) + k
+        total = self.muestras or 1
+        return [(f, k / total) for f, k in sorted(conteo.items(), key=lambda x: -x[1])[:n]]
+
+    def guardar(self, ruta: str) -> None:
+        """Formato de pilas colapsadas ('a;b;c N'), compatible con flamegraph.pl / speedscope."""
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, k in sorted(self.pilas.items(), key=lambda x: -x[1]):
+                f.write(";".join(pila) + f" {k}\n")
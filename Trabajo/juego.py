@@ -1,52 +1,27 @@
 # juego.py
-from typing import List
-from mesa import Mesa
-from repositorio_piezas import PIEZAS
+import json
+from typing import Dict, Optional
+from agentes import Agente
+from instrumentacion import INSTR
 from jugador import Jugador
+from motor import Motor
 from pieza import generar_orientaciones  # <-- IMPORT NECESARIO
+from repositorio_piezas import PIEZAS
 
-class Juego:
-    def __init__(self, filas: int = 20, columnas: int = 20, num_jugadores: int = 2):
-        if not 2 <= num_jugadores <= 4:
-            raise ValueError("El juego soporta entre 2 y 4 jugadores.")
-
-        self.mesa = Mesa(filas, columnas)
-        # Símbolos fijos para mapear esquinas: A,B,C,D
-        simbolos = ["A", "B", "C", "D"]
-        nombres  = ["Azul", "Rojo", "Verde", "Amarillo"]
-
-        self.jugadores: List[Jugador] = []
-        for i in range(num_jugadores):
-            piezas_iniciales = PIEZAS.ids()  # <-- ANTES: list(PIEZAS.keys())
-            j = Jugador(
-                id=i+1,
-                nombre=nombres[i],
-                simbolo=simbolos[i],
-                piezas_disponibles=piezas_iniciales
-            )
-            self.jugadores.append(j)
-
-        self.turno_idx = 0
-        self.pases_consecutivos = 0  # para detectar fin (todos pasaron)
-
-    # ----------------- utilidades de turno -----------------
-    def jugador_actual(self) -> Jugador:
-        return self.jugadores[self.turno_idx]
-
-    def siguiente_turno(self) -> None:
-        self.turno_idx = (self.turno_idx + 1) % len(self.jugadores)
-
-    def quedan_jugadas_posibles(self, jugador: Jugador) -> bool:
-        """Heurística simple: intenta validar al menos una orientación/pos en una vecindad."""
-        for pieza_id in jugador.piezas_disponibles:
-            orientaciones = generar_orientaciones(pieza_id)
-            for orient_idx in range(len(orientaciones)):
-                for r in range(0, self.mesa.filas, 2):
-                    for c in range(0, self.mesa.columnas, 2):
-                        ok, _, _ = self.mesa.validar_colocacion(jugador.simbolo, pieza_id, orient_idx, (r, c))
-                        if ok:
-                            return True
-        return False
+class Juego(Motor):
+    """Front-end de consola sobre Motor: menús, input() y print()."""
+    def __init__(
+        self,
+        filas: int = 20,
+        columnas: int = 20,
+        num_jugadores: int = 2,
+        verificar: bool = False,
+        agentes: Optional[Dict[int, Agente]] = None,
+    ):
+        super().__init__(filas, columnas, num_jugadores, verificar)
+        # Asientos controlados por la computadora (índice 0..n-1 -> agente);
+        # los demás se juegan por consola
+        self.agentes: Dict[int, Agente] = dict(agentes or {})
 
     # ----------------- UI consola -----------------
     def _mostrar_menu_turno(self, jugador: Jugador):
@@ -62,10 +37,10 @@ class Juego:
         print("-------------------------------------")
 
     def _listar_piezas(self, jugador: Jugador):
-        print(f"Piezas disponibles ({len(jugador.piezas_disponibles)}):")
+        print(f"Piezas disponibles ({jugador.piezas_restantes()}):")
         fila = []
-        for i, pid in enumerate(sorted(jugador.piezas_disponibles)):
-            fila.append(pid)
+        for i, nombre in enumerate(sorted(PIEZAS.nombre(p) for p in jugador.lista_piezas())):
+            fila.append(nombre)
             if (i+1) % 10 == 0:
                 print("  " + ", ".join(fila))
                 fila = []
@@ -96,16 +71,18 @@ class Juego:
             return False
 
         self._listar_piezas(jugador)
-        pieza_id = input("Elige pieza (ej: L3, I3, T4) o Q para cancelar: ").strip().upper()
-        if pieza_id == "Q":
+        nombre = input("Elige pieza (ej: L3, I3, T4) o Q para cancelar: ").strip().upper()
+        if nombre == "Q":
             return False
 
-        if pieza_id not in jugador.piezas_disponibles:
+        # los nombres solo existen en la consola; el motor trabaja con ids enteros
+        pieza_id = PIEZAS.id_de(nombre)
+        if pieza_id is None or not jugador.tiene_pieza(pieza_id):
             print("Esa pieza no está en tu lista disponible.")
             return False
 
         orientaciones = generar_orientaciones(pieza_id)
-        print(f"La pieza {pieza_id} tiene {len(orientaciones)} orientaciones (0 a {len(orientaciones)-1}).")
+        print(f"La pieza {nombre} tiene {len(orientaciones)} orientaciones (0 a {len(orientaciones)-1}).")
         orient_idx = self._input_int("Orientación: ", 0, len(orientaciones)-1)
         if orient_idx is None:
             return False
@@ -117,21 +94,38 @@ class Juego:
         if c is None:
             return False
 
-        ok, _, motivo = self.mesa.validar_colocacion(jugador.simbolo, pieza_id, orient_idx, (r, c))
+        ok, motivo = self.validar((pieza_id, orient_idx, (r, c)))
         if not ok:
             print(f"❌ Jugada inválida: {motivo}")
             return False
 
-        colocado = self.mesa.colocar(jugador.simbolo, pieza_id, orient_idx, (r, c))
-        if colocado:
-            jugador.quitar_pieza(pieza_id)
-            jugador.ha_pasado = False
-            print("✅ Jugada realizada.")
-            self.mesa.mostrar()
-            return True
-        else:
-            print("❌ No se pudo colocar (algo salió mal).")
-            return False
+        self.jugar((pieza_id, orient_idx, (r, c)))
+        print("✅ Jugada realizada.")
+        self.mesa.mostrar()
+        return True
+
+    def _turno_agente(self, jugador: Jugador, agente: Agente):
+        print(f"[{jugador.simbolo}] {jugador.nombre} ({agente.nombre}) está pensando...")
+        with INSTR.turno():
+            jugada = agente.elegir_jugada(self)
+        if jugada is None:
+            self.pasar()
+            print(f"[{jugador.simbolo}] {jugador.nombre} pasó el turno.")
+            return
+        pieza_id, orient_idx, (r, c) = jugada
+        self.jugar(jugada)
+        print(f"[{jugador.simbolo}] {jugador.nombre} coloca {PIEZAS.nombre(pieza_id)} (orientación {orient_idx}) en ({r}, {c}).")
+        informe = agente.informe()
+        if informe.get("libro"):
+            print("  > jugada del libro de aperturas")
+        elif "playouts" in informe:
+            print(f"  > {informe['playouts']} simulaciones en {informe['segundos']:.2f}s "
+                  f"({informe['playouts_por_segundo']:.0f}/s)")
+        elif "nodos" in informe:
+            print(f"  > {informe['nodos']} nodos en {informe['segundos']:.2f}s "
+                  f"({informe['nodos_por_segundo']:.0f}/s), profundidad {informe['profundidad']}, "
+                  f"EBF {informe['ebf']:.1f}")
+        self.mesa.mostrar()
 
     # ----------------- bucle principal -----------------
     def iniciar(self):
@@ -145,17 +139,24 @@ class Juego:
             jugador = self.jugador_actual()
 
             # Fin del juego: todos pasaron seguidos
-            if self.pases_consecutivos >= len(self.jugadores):
+            if self.terminado():
                 print("\n🏁 Todos pasaron. ¡Fin del juego!\n")
                 self._imprimir_puntajes()
+                if INSTR.activo:
+                    print("Instrumentación:")
+                    print(json.dumps(INSTR.foto(), indent=2, ensure_ascii=False))
                 break
 
             # Si no tiene jugadas posibles, pasa automáticamente
             if not jugador.piezas_disponibles or not self.quedan_jugadas_posibles(jugador):
                 print(f"[{jugador.simbolo}] {jugador.nombre} no tiene jugadas posibles. Debe pasar.")
-                jugador.marcar_paso()
-                self.pases_consecutivos += 1
-                self.siguiente_turno()
+                self.pasar()
+                continue
+
+            # Turno de la computadora
+            agente = self.agentes.get(self.turno_idx)
+            if agente is not None:
+                self._turno_agente(jugador, agente)
                 continue
 
             # Menú de turno
@@ -165,9 +166,7 @@ class Juego:
             if opcion == "1":
                 exito = self._accion_colocar(jugador)
                 if exito:
-                    # Colocó bien: resetea pases y pasa al siguiente jugador
-                    self.pases_consecutivos = 0
-                    self.siguiente_turno()
+                    # Colocó bien: jugar() ya reseteó pases y pasó al siguiente jugador
                     continue
                 else:
                     # Jugada inválida o cancelada: mismo jugador reintenta
@@ -184,10 +183,8 @@ class Juego:
                 continue
 
             elif opcion == "4":
-                jugador.marcar_paso()
-                self.pases_consecutivos += 1
+                self.pasar()
                 print(f"[{jugador.simbolo}] {jugador.nombre} pasó el turno.")
-                self.siguiente_turno()
                 continue
 
             elif opcion == "5":
@@ -203,17 +200,11 @@ class Juego:
     # ----------------- puntajes (simple) -----------------
     def _imprimir_puntajes(self):
         print("PUNTAJES (aprox. por piezas restantes):")
-        tabla = []
-        for j in self.jugadores:
-            penal = 0
-            for pid in j.piezas_disponibles:
-                penal += PIEZAS.tam(pid)   # <-- ANTES: len(PIEZAS[pid])
-            score = -penal
-            tabla.append((score, j))
+        tabla = list(zip(self.puntajes(), self.jugadores))
         tabla.sort(reverse=True, key=lambda x: x[0])
 
         for rank, (score, j) in enumerate(tabla, start=1):
-            print(f"{rank}. [{j.simbolo}] {j.nombre}  ->  {score} (piezas sin jugar: {len(j.piezas_disponibles)})")
+            print(f"{rank}. [{j.simbolo}] {j.nombre}  ->  {score} (piezas sin jugar: {j.piezas_restantes()})")
 
 if __name__ == "__main__":
     Juego(num_jugadores=2).iniciar()
@@ -1,34 +1,48 @@
 # jugador.py
 from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Dict
+from repositorio_piezas import PIEZAS
 
 Coord = Tuple[int, int]  # (fila, col)
-PieceId = str            # p.ej. "L5", "I1", "T4", etc.
+PieceId = int            # id entero de PIEZAS (PIEZAS.nombre(id) -> "L5", "I1", ...)
 
 @dataclass
 class Jugador:
     id: int                      # 1..4
     nombre: str                  # "Azul", "Amarillo", etc.
     simbolo: str                 # p.ej. "A", "B", "C", "D" para imprimir en tablero
-    piezas_disponibles: List[PieceId] = field(default_factory=list)
+    piezas_disponibles: int = PIEZAS.todas   # máscara: bit i = pieza i disponible
     piezas_colocadas: Dict[PieceId, List[Coord]] = field(default_factory=dict)
     ha_pasado: bool = False      # si pasó el turno
     puntaje: int = 0             # puntaje acumulado (se calcula al final)
+    cuadros_restantes: int = field(init=False, default=0)  # se mantiene al quitar/devolver
+
+    def __post_init__(self):
+        self.cuadros_restantes = PIEZAS.cuadros(self.piezas_disponibles)
 
     def tiene_pieza(self, pieza: PieceId) -> bool:
-        return pieza in self.piezas_disponibles
+        return self.piezas_disponibles >> pieza & 1 == 1
 
     def quitar_pieza(self, pieza: PieceId) -> None:
-        if pieza not in self.piezas_disponibles:
-            raise ValueError(f"La pieza {pieza} no está disponible para {self.nombre}.")
-        self.piezas_disponibles.remove(pieza)
+        if not self.tiene_pieza(pieza):
+            raise ValueError(f"La pieza {PIEZAS.nombre(pieza)} no está disponible para {self.nombre}.")
+        self.piezas_disponibles ^= 1 << pieza
+        self.cuadros_restantes -= PIEZAS.tamanos[pieza]
+
+    def devolver_pieza(self, pieza: PieceId) -> None:
+        """Inverso de quitar_pieza (para deshacer)."""
+        self.piezas_disponibles |= 1 << pieza
+        self.cuadros_restantes += PIEZAS.tamanos[pieza]
 
     def registrar_colocacion(self, pieza: PieceId, celdas: List[Coord]) -> None:
         """Guarda la jugada en el historial del jugador."""
         self.piezas_colocadas[pieza] = celdas
 
     def piezas_restantes(self) -> int:
-        return len(self.piezas_disponibles)
+        return self.piezas_disponibles.bit_count()
+
+    def lista_piezas(self) -> List[PieceId]:
+        return PIEZAS.lista(self.piezas_disponibles)
 
     def marcar_paso(self) -> None:
         self.ha_pasado = True
@@ -0,0 +1,301 @@
+# libro.py
+# Libro de aperturas: primeras jugadas precalculadas para una esquina canónica.
+#
+# Las cuatro esquinas son equivalentes por rotación/reflexión del tablero, y
+# al principio cada jugador juega solo en su rincón. Por eso el libro guarda,
+# para la esquina (0, 0), la jugada que eligió la búsqueda en auto-juego
+# (generar_libro) según las piezas PROPIAS ya colocadas; para otro asiento se
+# lleva la posición a esa esquina con una simetría, se busca y se devuelve la
+# jugada transformada de vuelta.
+# Se usa mientras ninguna pieza rival esté cerca de las propias.
+#
+# Archivo (.lib):
+#   cabecera: b"BLKA", versión (u8), filas (u8), columnas (u8), reservado (u8),
+#             firma del catálogo de piezas (12 bytes), entradas (u32)
+#   por entrada, ordenadas por clave: clave (u64), id de colocación (u32)
+#
+#   python libro.py --generar                  # regenera libro_aperturas.lib
+#   python libro.py --generar --jugadas 6 --partidas 32 --profundidad 3
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from colocaciones import IndiceColocaciones, obtener_indice
+from mesa import Jugada, Mesa
+from repositorio_piezas import PIEZAS
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+RUTA_LIBRO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libro_aperturas.lib")
+MAGIA = b"BLKA"
+VERSION = 1
+_CABECERA = struct.Struct("<4sBBBB12sI")
+_ENTRADA = struct.Struct("<QI")
+_MASCARA_64 = (1 << 64) - 1
+
+# ---------------- simetrías del tablero ----------------
+def simetrias(filas: int, columnas: int) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    Simetrías como coeficientes (a, b, e, g, h, k): (r, c) -> (a*r + b*c + e, g*r + h*c + k).
+    4 en un tablero rectangular, 8 si es cuadrado.
+    """
+    F, C = filas - 1, columnas - 1
+    lista = [(1, 0, 0, 0, 1, 0), (1, 0, 0, 0, -1, C), (-1, 0, F, 0, 1, 0), (-1, 0, F, 0, -1, C)]
+    if filas == columnas:
+        lista += [(0, 1, 0, 1, 0, 0), (0, 1, 0, -1, 0, F), (0, -1, C, 1, 0, 0), (0, -1, C, -1, 0, F)]
+    return lista
+
+def _transformar(s: Tuple[int, int, int, int, int, int], r: int, c: int) -> Tuple[int, int]:
+    a, b, e, g, h, k = s
+    return a * r + b * c + e, g * r + h * c + k
+
+class TablaSimetrias:
+    """directa[s][idx] = colocación que resulta de aplicar la simetría s; inversa[s] la deshace."""
+    def __init__(self, indice: IndiceColocaciones):
+        self.simetrias = simetrias(indice.filas, indice.columnas)
+        self.directa: List[List[int]] = []
+        self.inversa: List[List[int]] = []
+        for s in self.simetrias:
+            lineal = s[:2] + (0,) + s[3:5] + (0,)
+            # por (pieza, orientación): orientación resultante y desplazamiento
+            # de la nueva referencia respecto de la referencia transformada
+            destino: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+            for pieza_id in PIEZAS.ids():
+                orientaciones = PIEZAS.orientaciones(pieza_id)
+                formas = {frozenset(o): k for k, o in enumerate(orientaciones)}
+                for k, orient in enumerate(orientaciones):
+                    celdas = [_transformar(lineal, r, c) for r, c in orient]
+                    dr = min(r for r, _ in celdas)
+                    dc = min(c for _, c in celdas)
+                    nueva = formas[frozenset((r - dr, c - dc) for r, c in celdas)]
+                    destino[(pieza_id, k)] = (nueva, dr, dc)
+            directa = []
+            for idx in range(len(indice)):
+                pieza_id = indice.pieza[idx]
+                nueva, dr, dc = destino[(pieza_id, indice.orient[idx])]
+                r, c = _transformar(s, *indice.ref[idx])
+                directa.append(indice.por_clave[(pieza_id, nueva, (r + dr, c + dc))])
+            inversa = [0] * len(directa)
+            for idx, imagen in enumerate(directa):
+                inversa[imagen] = idx
+            self.directa.append(directa)
+            self.inversa.append(inversa)
+
+_TABLAS: Dict[int, Tuple[IndiceColocaciones, TablaSimetrias]] = {}
+
+def obtener_simetrias(indice: IndiceColocaciones) -> TablaSimetrias:
+    entrada = _TABLAS.get(id(indice))
+    if entrada is None or entrada[0] is not indice:
+        entrada = (indice, TablaSimetrias(indice))
+        _TABLAS[id(indice)] = entrada
+    return entrada[1]
+
+# ---------------- claves ----------------
+def _mezclar(x: int) -> int:
+    """splitmix64: clave fija por colocación (no depende de ninguna semilla)."""
+    x = (x + 0x9E3779B97F4A7C15) & _MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASCARA_64
+    return x ^ (x >> 31)
+
+def propias(mesa: Mesa, simbolo: str) -> List[int]:
+    """Ids de las colocaciones del símbolo, en el orden en que se hicieron."""
+    return [entrada[1] for entrada in mesa._pila if entrada[0] == simbolo]
+
+def clave_canonica(mesa: Mesa, simbolo: str) -> Optional[Tuple[int, int]]:
+    """
+    (clave, simetría) de las piezas propias llevadas a la esquina (0, 0). Entre
+    las simetrías que llevan la esquina del símbolo a (0, 0) se elige la de
+    menor clave. None si el símbolo no tiene esquina asignada.
+    """
+    esquina = mesa.corners_por_jugador.get(simbolo)
+    if esquina is None:
+        return None
+    tabla = obtener_simetrias(mesa.indice)
+    colocadas = propias(mesa, simbolo)
+    mejor = None
+    for k, s in enumerate(tabla.simetrias):
+        if _transformar(s, *esquina) != (0, 0):
+            continue
+        directa = tabla.directa[k]
+        clave = 0
+        for idx in colocadas:
+            clave ^= _mezclar(directa[idx])
+        if mejor is None or clave < mejor[0]:
+            mejor = (clave, k)
+    return mejor
+
+# (filas, columnas) -> (todas, todas sin la columna 0, todas sin la última)
+_BORDES: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+
+def _expandir(mesa: Mesa, mascara: int) -> int:
+    """Celdas a distancia <= 1 (por lado o esquina) de 'mascara'."""
+    c = mesa.columnas
+    bordes = _BORDES.get((mesa.filas, c))
+    if bordes is None:
+        todas = (1 << (mesa.filas * c)) - 1
+        sin_col_0 = sin_col_n = todas
+        for r in range(mesa.filas):
+            sin_col_0 &= ~(1 << (r * c))
+            sin_col_n &= ~(1 << (r * c + c - 1))
+        bordes = _BORDES[(mesa.filas, c)] = (todas, sin_col_0, sin_col_n)
+    todas, sin_col_0, sin_col_n = bordes
+    fila = mascara | ((mascara << 1) & sin_col_0) | ((mascara >> 1) & sin_col_n)
+    return (fila | (fila << c) | (fila >> c)) & todas
+
+# ---------------- libro ----------------
+class LibroAperturas:
+    """Clave canónica -> id de colocación (en el marco de la esquina (0, 0))."""
+    # distancia mínima (en celdas) entre piezas rivales y las propias + la jugada
+    MARGEN = 2
+
+    def __init__(self, filas: int = 20, columnas: int = 20, entradas: Optional[Dict[int, int]] = None):
+        self.filas = filas
+        self.columnas = columnas
+        self.entradas: Dict[int, int] = dict(entradas or {})
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def buscar(self, mesa: Mesa, simbolo: str) -> Optional[Jugada]:
+        """Jugada del libro para el símbolo en esta posición, o None si está fuera del libro."""
+        if (mesa.filas, mesa.columnas) != (self.filas, self.columnas):
+            return None
+        canonica = clave_canonica(mesa, simbolo)
+        if canonica is None:
+            return None
+        clave, k = canonica
+        canonico = self.entradas.get(clave)
+        if canonico is None:
+            return None
+        indice = mesa.indice
+        idx = obtener_simetrias(indice).inversa[k][canonico]
+        # el libro supone que los rivales todavía están lejos
+        cerca = mesa.mascaras.get(simbolo, 0) | indice.mascara[idx]
+        for _ in range(self.MARGEN):
+            cerca = _expandir(mesa, cerca)
+        if cerca & mesa.ocupadas & ~mesa.mascaras.get(simbolo, 0):
+            return None
+        jugada = indice.clave(idx)
+        ok, _, _ = mesa.validar_colocacion(simbolo, *jugada)
+        return jugada if ok else None
+
+    # ---------- disco ----------
+    def guardar(self, ruta: str = RUTA_LIBRO) -> None:
+        firma = obtener_indice(self.filas, self.columnas).firma.encode("ascii")
+        with open(ruta, "wb") as f:
+            f.write(_CABECERA.pack(MAGIA, VERSION, self.filas, self.columnas, 0, firma, len(self.entradas)))
+            for clave in sorted(self.entradas):
+                f.write(_ENTRADA.pack(clave, self.entradas[clave]))
+
+    @classmethod
+    def cargar(cls, ruta: str = RUTA_LIBRO) -> "LibroAperturas":
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        magia, version, filas, columnas, _, firma, n = _CABECERA.unpack_from(datos)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es un libro de aperturas compatible.")
+        if firma.decode("ascii") != obtener_indice(filas, columnas).firma:
+            raise ValueError(f"{ruta} se generó con otro catálogo de piezas.")
+        cuerpo = memoryview(datos)[_CABECERA.size:_CABECERA.size + n * _ENTRADA.size]
+        return cls(filas, columnas, dict(_ENTRADA.iter_unpack(cuerpo)))
+
+_LIBROS: Dict[str, Optional[LibroAperturas]] = {}
+
+def obtener_libro(ruta: str = RUTA_LIBRO) -> Optional[LibroAperturas]:
+    """Libro compartido por ruta (None si el archivo no existe)."""
+    if ruta not in _LIBROS:
+        _LIBROS[ruta] = LibroAperturas.cargar(ruta) if os.path.exists(ruta) else None
+    return _LIBROS[ruta]
+
+def jugada_de_libro(juego: "Motor", ruta: str = RUTA_LIBRO) -> Optional[Jugada]:
+    """Jugada del libro para el jugador actual, o None (sin libro o fuera de él)."""
+    libro = obtener_libro(ruta)
+    if libro is None:
+        return None
+    jugador = juego.jugador_actual()
+    jugada = libro.buscar(juego.mesa, jugador.simbolo)
+    if jugada is None or not jugador.tiene_pieza(jugada[0]):
+        return None
+    return jugada
+
+# ---------------- generación ----------------
+def generar_libro(
+    jugadas: int = 5,
+    partidas: int = 16,
+    profundidad: int = 2,
+    jugadores: int = 4,
+    semilla: int = 0,
+    filas: int = 20,
+    columnas: int = 20,
+) -> LibroAperturas:
+    """
+    Auto-juego con busqueda.AgenteBusqueda a profundidad fija en todos los
+    asientos durante las primeras 'jugadas' rondas. Cada posición nueva se
+    busca y se guarda su jugada; las que ya están en el libro se juegan de él.
+    La primera partida es la línea principal; en cada una de las demás, cada
+    asiento juega una vez al azar (sin guardarla) para cubrir también
+    posiciones a las que se llega con otras aperturas.
+    Solo se guardan jugadas con los rivales todavía lejos (ver buscar()).
+    """
+    from busqueda import AgenteBusqueda
+    from motor import Motor
+
+    libro = LibroAperturas(filas, columnas)
+    agente = AgenteBusqueda(tiempo_limite=None, profundidad=profundidad, umbral_final=None, usar_libro=False)
+    for partida in range(partidas):
+        rng = random.Random(semilla * 1_000_003 + partida)
+        juego = Motor(filas, columnas, jugadores)
+        tabla = obtener_simetrias(juego.mesa.indice)
+        # ronda en la que cada asiento se desvía (ninguna en la primera partida)
+        desvios = [rng.randrange(jugadas - 1) if partida and jugadas > 1 else -1 for _ in range(jugadores)]
+        for ronda in range(jugadas):
+            for asiento in range(jugadores):
+                if juego.terminado():
+                    break
+                mesa = juego.mesa
+                simbolo = juego.jugador_actual().simbolo
+                legales = juego.jugadas_legales()
+                if not legales:
+                    juego.pasar()
+                    continue
+                if ronda == desvios[asiento]:
+                    jugada = rng.choice(legales)
+                else:
+                    jugada = libro.buscar(mesa, simbolo)
+                    if jugada is None:
+                        jugada = agente.elegir_jugada(juego)
+                        clave, k = clave_canonica(mesa, simbolo)
+                        libro.entradas[clave] = tabla.directa[k][mesa.indice.por_clave[jugada]]
+                        if libro.buscar(mesa, simbolo) != jugada:
+                            del libro.entradas[clave]  # rivales demasiado cerca
+                juego.jugar(jugada)
+    return libro
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Libro de aperturas de Blokus.")
+    parser.add_argument("--generar", action="store_true", help="regenera el libro")
+    parser.add_argument("--jugadas", type=int, default=5, help="jugadas propias cubiertas")
+    parser.add_argument("--partidas", type=int, default=16, help="partidas de auto-juego")
+    parser.add_argument("--profundidad", type=int, default=2, help="profundidad de la búsqueda")
+    parser.add_argument("--jugadores", type=int, default=4)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--ruta", default=RUTA_LIBRO)
+    args = parser.parse_args(argv)
+
+    if args.generar:
+        inicio = time.perf_counter()
+        libro = generar_libro(args.jugadas, args.partidas, args.profundidad, args.jugadores, args.semilla)
+        libro.guardar(args.ruta)
+        print(f"{len(libro)} posiciones en {time.perf_counter() - inicio:.1f}s -> {args.ruta}")
+        return 0
+    libro = LibroAperturas.cargar(args.ruta)
+    print(f"{args.ruta}: {len(libro)} posiciones ({os.path.getsize(args.ruta)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
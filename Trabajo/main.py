@@ -1,6 +1,9 @@
 
 # main.py
+import os
+from instrumentacion import INSTR
 from juego import Juego
+from mcts import AgenteMCTS
 
 def mostrar_menu():
     print("========================================")
@@ -35,6 +38,10 @@ def mostrar_creditos():
     print("----------------------------------------\n")
 
 def main():
+    # BLOKUS_INSTRUMENTAR=1 cuenta validaciones, generación de jugadas y
+    # latencia por turno, y las muestra al terminar cada partida
+    if os.environ.get("BLOKUS_INSTRUMENTAR"):
+        INSTR.activar()
     while True:
         mostrar_menu()
         opcion = input("Elige una opción (1-4): ").strip()
@@ -43,7 +50,17 @@ def main():
             try:
                 n = int(input("Número de jugadores (2-4): ").strip())
                 if 2 <= n <= 4:
-                    juego = Juego(num_jugadores=n)
+                    ia = int(input(f"¿Cuántos controla la computadora? (0-{n}): ").strip())
+                    if not 0 <= ia <= n:
+                        print(f"⚠️  Debe estar entre 0 y {n}.")
+                        continue
+                    segundos = 0.0
+                    if ia:
+                        segundos = float(input("Segundos por jugada de la computadora: ").strip())
+                    # la computadora toma los últimos asientos
+                    agentes = {i: AgenteMCTS(tiempo_limite=segundos) for i in range(n - ia, n)}
+                    juego = Juego(num_jugadores=n, agentes=agentes)
+                    INSTR.reiniciar()
                     juego.iniciar()
                 else:
                     print("⚠️  El número debe estar entre 2 y 4.")
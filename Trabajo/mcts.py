@@ -0,0 +1,190 @@
+# mcts.py
+# Jugador por computadora con Monte Carlo Tree Search (UCT) para 2-4 jugadores.
+# Cada nodo guarda la recompensa acumulada del jugador que hizo la jugada que
+# lleva a él, así la selección maximiza siempre el interés de quien mueve.
+import math
+import random
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from libro import jugada_de_libro
+from mesa import Jugada
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+class NodoMCTS:
+    __slots__ = ("jugada", "padre", "jugador", "hijos", "pendientes", "visitas", "valor")
+
+    def __init__(self, jugada: Optional[Jugada], padre: Optional["NodoMCTS"], jugador: Optional[int]):
+        self.jugada = jugada          # jugada que llevó a este nodo (None = pasar)
+        self.padre = padre
+        self.jugador = jugador        # asiento que hizo esa jugada (None en la raíz)
+        self.hijos: List["NodoMCTS"] = []
+        self.pendientes: Optional[List[Optional[Jugada]]] = None  # None: aún sin expandir
+        self.visitas = 0
+        self.valor = 0.0
+
+def recompensas(puntajes: List[int]) -> List[float]:
+    """1 para el ganador, repartido en empates, 0 para el resto."""
+    mejor = max(puntajes)
+    ganadores = sum(1 for p in puntajes if p == mejor)
+    return [1.0 / ganadores if p == mejor else 0.0 for p in puntajes]
+
+class AgenteMCTS:
+    """
+    UCT con presupuesto por jugada en segundos (tiempo_limite) y/o en número de
+    simulaciones (max_playouts); se corta con el primero que se agote.
+    Simulaciones:
+      - "aleatorio": primera jugada legal en orden aleatorio
+      - "heuristico": igual, pero probando antes las piezas grandes
+    Con reutilizar_arbol el subárbol de la jugada realmente jugada se conserva
+    para el turno siguiente. Con usar_libro las primeras jugadas salen del
+    libro de aperturas (libro.py) sin buscar.
+    """
+    def __init__(
+        self,
+        tiempo_limite: Optional[float] = 1.0,
+        max_playouts: Optional[int] = None,
+        c: float = 1.4,
+        simulacion: str = "heuristico",
+        reutilizar_arbol: bool = True,
+        usar_libro: bool = True,
+        semilla: Optional[int] = None,
+    ):
+        if simulacion not in ("aleatorio", "heuristico"):
+            raise ValueError(f"Simulación desconocida: {simulacion}")
+        if tiempo_limite is None and max_playouts is None:
+            raise ValueError("Indica tiempo_limite y/o max_playouts.")
+        self.nombre = "mcts"
+        self.tiempo_limite = tiempo_limite
+        self.max_playouts = max_playouts
+        self.c = c
+        self.grandes_primero = simulacion == "heuristico"
+        self.reutilizar_arbol = reutilizar_arbol
+        self.usar_libro = usar_libro
+        self.rng = random.Random(semilla)
+        # Árbol conservado entre turnos
+        self._raiz: Optional[NodoMCTS] = None
+        self._juego_id: Optional[int] = None
+        self._historial: List[Optional[Jugada]] = []
+        self._informe: Dict[str, Any] = {}
+
+    # ---------- API de agente ----------
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        if juego.terminado():
+            return None
+        if self.usar_libro:
+            jugada = jugada_de_libro(juego)
+            if jugada is not None:
+                self._informe = {"libro": True}
+                return jugada
+        raiz = self._raiz_para(juego)
+        reutilizadas = raiz.visitas
+        inicio = time.perf_counter()
+        limite = inicio + self.tiempo_limite if self.tiempo_limite is not None else None
+        playouts = 0
+        while True:
+            self._iteracion(juego, raiz)
+            playouts += 1
+            if self.max_playouts is not None and playouts >= self.max_playouts:
+                break
+            if limite is not None and time.perf_counter() >= limite:
+                break
+        segundos = time.perf_counter() - inicio
+
+        mejor = max(raiz.hijos, key=lambda h: h.visitas)
+        self._raiz = raiz
+        self._juego_id = id(juego)
+        self._historial = [entrada[0] for entrada in juego.historial]
+        self._informe = {
+            "playouts": playouts,
+            "segundos": segundos,
+            "playouts_por_segundo": playouts / segundos if segundos > 0 else 0.0,
+            "visitas_reutilizadas": reutilizadas,
+            "visitas_raiz": raiz.visitas,
+            "jugadas_raiz": len(raiz.hijos) + len(raiz.pendientes or ()),
+            "valor_estimado": mejor.valor / mejor.visitas,
+        }
+        return mejor.jugada
+
+    def informe(self) -> Dict[str, Any]:
+        return dict(self._informe)
+
+    def estadisticas_raiz(self) -> List[Tuple[Optional[Jugada], int, float]]:
+        """(jugada, visitas, valor acumulado) de cada hijo de la última raíz buscada."""
+        if self._raiz is None:
+            return []
+        return [(h.jugada, h.visitas, h.valor) for h in self._raiz.hijos]
+
+    # ---------- árbol ----------
+    def _raiz_para(self, juego: "Motor") -> NodoMCTS:
+        """Baja por el árbol anterior siguiendo las jugadas hechas desde entonces."""
+        raiz = self._raiz
+        prof = len(self._historial)
+        historial = [entrada[0] for entrada in juego.historial]
+        if (not self.reutilizar_arbol or raiz is None or self._juego_id != id(juego)
+                or historial[:prof] != self._historial):
+            return NodoMCTS(None, None, None)
+        for jugada in historial[prof:]:
+            raiz = next((h for h in raiz.hijos if h.jugada == jugada), None)
+            if raiz is None:
+                return NodoMCTS(None, None, None)
+        raiz.padre = None
+        return raiz
+
+    def _seleccionar(self, nodo: NodoMCTS) -> NodoMCTS:
+        log_n = math.log(nodo.visitas)
+        c = self.c
+        return max(
+            nodo.hijos,
+            key=lambda h: h.valor / h.visitas + c * math.sqrt(log_n / h.visitas),
+        )
+
+    def _jugadas(self, juego: "Motor") -> List[Optional[Jugada]]:
+        jugadas: List[Optional[Jugada]] = juego.jugadas_legales(juego.jugador_actual())
+        if not jugadas:
+            return [None]
+        self.rng.shuffle(jugadas)
+        return jugadas
+
+    def _aplicar(self, juego: "Motor", jugada: Optional[Jugada]) -> None:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+
+    def _iteracion(self, juego: "Motor", raiz: NodoMCTS) -> None:
+        nodo = raiz
+        aplicadas = 0
+        # 1) selección + 2) expansión de un hijo nuevo
+        while not juego.terminado():
+            if nodo.pendientes is None:
+                nodo.pendientes = self._jugadas(juego)
+            if nodo.pendientes:
+                jugada = nodo.pendientes.pop()
+                hijo = NodoMCTS(jugada, nodo, juego.turno_idx)
+                nodo.hijos.append(hijo)
+                self._aplicar(juego, jugada)
+                aplicadas += 1
+                nodo = hijo
+                break
+            nodo = self._seleccionar(nodo)
+            self._aplicar(juego, nodo.jugada)
+            aplicadas += 1
+
+        # 3) simulación
+        aplicadas += self._simular(juego)
+        valores = recompensas(juego.puntajes())
+        for _ in range(aplicadas):
+            juego.deshacer()
+
+        # 4) retropropagación
+        while nodo is not None:
+            nodo.visitas += 1
+            if nodo.jugador is not None:
+                nodo.valor += valores[nodo.jugador]
+            nodo = nodo.padre
+
+    def _simular(self, juego: "Motor") -> int:
+        """Juega al azar hasta el final. Devuelve cuántas acciones aplicó."""
+        return juego.jugar_al_azar(self.rng, self.grandes_primero)
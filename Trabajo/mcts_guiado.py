@@ -0,0 +1,262 @@
+# mcts_guiado.py
+# MCTS guiado por un modelo (PUCT) con varios hilos y evaluación por lotes.
+#
+# En vez de simular hasta el final, cada hoja nueva se manda al evaluador
+# (evaluacion_lote.py), que devuelve una probabilidad a priori por jugada y el
+# valor esperado de cada asiento. Los hilos comparten el árbol; cada uno juega
+# sobre su propia copia del Motor (instantanea.py). Al bajar por el árbol un
+# hilo suma "visitas virtuales" sin recompensa a los nodos que pisa, así los
+# demás prefieren otras ramas mientras espera su evaluación y el evaluador
+# recibe lotes de posiciones distintas. Si dos hilos llegan a la misma hoja
+# pendiente, el segundo espera el mismo pedido. El candado compartido solo
+# cubre la selección y la actualización de estadísticas; aplicar jugadas,
+# generar las legales y codificar la posición se hace fuera de él.
+#
+# Con hilos > 1 el resultado depende del orden en que corren los hilos.
+import math
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from evaluacion_lote import Evaluacion, EvaluadorLotes, Modelo
+from instantanea import Instantanea
+from libro import jugada_de_libro
+from mcts import recompensas
+from mesa import Jugada
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+class NodoGuiado:
+    __slots__ = ("jugada", "padre", "jugador", "prior", "hijos", "abiertos", "visitas", "valor", "virtual",
+                 "pendiente")
+
+    def __init__(self, jugada: Optional[Jugada], padre: Optional["NodoGuiado"], jugador: Optional[int], prior: float):
+        self.jugada = jugada          # jugada que llevó a este nodo (None = pasar)
+        self.padre = padre
+        self.jugador = jugador        # asiento que hizo esa jugada (None en la raíz)
+        self.prior = prior
+        self.hijos: List["NodoGuiado"] = []  # vacío: sin expandir (o fin de partida); por prior decreciente
+        self.abiertos = 0             # hijos ya elegidos alguna vez (son los primeros de la lista)
+        self.visitas = 0
+        self.valor = 0.0
+        self.virtual = 0              # visitas virtuales de hilos que pasan por acá
+        # mientras un hilo evalúa esta hoja: futuro con (jugadas, evaluación)
+        self.pendiente: Optional["Future[Optional[Tuple[List[Optional[Jugada]], Evaluacion]]]"] = None
+
+class AgenteGuiado:
+    """
+    PUCT con presupuesto por jugada en segundos (tiempo_limite) y/o en número de
+    simulaciones (max_playouts); se corta con el primero que se agote.
+    'hilos' búsquedas comparten el árbol; el evaluador junta sus pedidos en
+    lotes de hasta 'tamano_lote' (por defecto, uno por hilo). Sin 'modelo' se
+    usa el de referencia (evaluacion_lote.ModeloConvolucional).
+    Con 'evaluador' varios agentes comparten una misma cola de lotes (se
+    ignoran modelo, tamano_lote y espera); quien lo creó es quien lo cierra,
+    y las cifras de lotes del informe incluyen los pedidos de los demás.
+    """
+    def __init__(
+        self,
+        tiempo_limite: Optional[float] = 1.0,
+        max_playouts: Optional[int] = None,
+        c_puct: float = 1.5,
+        hilos: int = 4,
+        perdida_virtual: int = 1,
+        modelo: Optional[Modelo] = None,
+        tamano_lote: Optional[int] = None,
+        espera: float = 0.002,
+        evaluador: Optional[EvaluadorLotes] = None,
+        usar_libro: bool = True,
+        semilla: Optional[int] = None,
+    ):
+        if tiempo_limite is None and max_playouts is None:
+            raise ValueError("Indica tiempo_limite y/o max_playouts.")
+        if max_playouts is not None and max_playouts < 1:
+            raise ValueError("max_playouts debe ser positivo.")
+        if hilos <= 0:
+            raise ValueError("hilos debe ser positivo.")
+        self.nombre = "guiado"
+        self.tiempo_limite = tiempo_limite
+        self.max_playouts = max_playouts
+        self.c_puct = c_puct
+        self.hilos = hilos
+        self.perdida_virtual = perdida_virtual
+        self.usar_libro = usar_libro
+        self.rng = random.Random(semilla)
+        self._evaluador_propio = evaluador is None
+        self.evaluador = evaluador if evaluador is not None else EvaluadorLotes(modelo, tamano_lote or hilos, espera)
+        self._candado = threading.Lock()
+        self._raiz: Optional[NodoGuiado] = None
+        self._informe: Dict[str, Any] = {}
+
+    # ---------- API de agente ----------
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        if juego.terminado():
+            return None
+        if self.usar_libro:
+            jugada = jugada_de_libro(juego)
+            if jugada is not None:
+                self._informe = {"libro": True}
+                return jugada
+        raiz = NodoGuiado(None, None, None, 1.0)
+        foto = Instantanea.capturar(juego)
+        lotes, posiciones = self.evaluador.lotes, self.evaluador.posiciones
+        inicio = time.perf_counter()
+        self._limite = inicio + self.tiempo_limite if self.tiempo_limite is not None else None
+        self._lanzadas = 0
+        self._colisiones = 0
+        self._error: Optional[BaseException] = None
+
+        if self.hilos == 1:
+            self._trabajar(foto.motor(), raiz)
+        else:
+            hilos = [threading.Thread(target=self._trabajar, args=(foto.motor(), raiz), daemon=True)
+                     for _ in range(self.hilos)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        if self._error is not None:
+            raise self._error
+        segundos = time.perf_counter() - inicio
+
+        mas_visitas = max(h.visitas for h in raiz.hijos)
+        mejor = self.rng.choice([h for h in raiz.hijos if h.visitas == mas_visitas])
+        self._raiz = raiz
+        lotes = self.evaluador.lotes - lotes
+        posiciones = self.evaluador.posiciones - posiciones
+        self._informe = {
+            "playouts": self._lanzadas,
+            "segundos": segundos,
+            "playouts_por_segundo": self._lanzadas / segundos if segundos > 0 else 0.0,
+            "visitas_raiz": raiz.visitas,
+            "jugadas_raiz": len(raiz.hijos),
+            "valor_estimado": mejor.valor / mejor.visitas if mejor.visitas else 0.0,
+            "lotes": lotes,
+            "tamano_medio_lote": posiciones / lotes if lotes else 0.0,
+            "colisiones": self._colisiones,
+        }
+        return mejor.jugada
+
+    def informe(self) -> Dict[str, Any]:
+        return dict(self._informe)
+
+    def estadisticas_raiz(self) -> List[Tuple[Optional[Jugada], int, float]]:
+        """(jugada, visitas, valor acumulado) de cada hijo de la última raíz buscada."""
+        if self._raiz is None:
+            return []
+        return [(h.jugada, h.visitas, h.valor) for h in self._raiz.hijos]
+
+    def cerrar(self) -> None:
+        if self._evaluador_propio:
+            self.evaluador.cerrar()
+
+    # ---------- hilos ----------
+    def _seguir(self, raiz: NodoGuiado) -> bool:
+        """Reserva una simulación del presupuesto (con el candado tomado)."""
+        if self._error is not None:
+            return False
+        if self.max_playouts is not None and self._lanzadas >= self.max_playouts:
+            return False
+        # la raíz necesita al menos una evaluación para tener hijos
+        if self._limite is not None and raiz.hijos and time.perf_counter() >= self._limite:
+            return False
+        self._lanzadas += 1
+        return True
+
+    def _trabajar(self, juego: "Motor", raiz: NodoGuiado) -> None:
+        try:
+            while True:
+                with self._candado:
+                    if not self._seguir(raiz):
+                        return
+                self._simulacion(juego, raiz)
+        except BaseException as error:
+            with self._candado:
+                self._error = self._error or error
+            self.evaluador.vaciar()
+
+    # ---------- árbol ----------
+    def _seleccionar(self, nodo: NodoGuiado) -> NodoGuiado:
+        raiz_n = self.c_puct * math.sqrt(max(nodo.visitas + nodo.virtual, 1))
+
+        def puntaje(h: NodoGuiado) -> float:
+            n = h.visitas + h.virtual
+            # las visitas virtuales cuentan como derrotas (recompensa 0)
+            return (h.valor / n if n else 0.0) + raiz_n * h.prior / (1 + n)
+
+        # los hijos nunca elegidos puntúan solo por su prior y están ordenados:
+        # de ellos alcanza con mirar el primero
+        abiertos = nodo.abiertos
+        elegido = max(nodo.hijos[:abiertos + 1], key=puntaje)
+        if abiertos < len(nodo.hijos) and elegido is nodo.hijos[abiertos]:
+            nodo.abiertos += 1
+        return elegido
+
+    def _aplicar(self, juego: "Motor", jugada: Optional[Jugada]) -> None:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+
+    def _simulacion(self, juego: "Motor", raiz: NodoGuiado) -> None:
+        virtual = self.perdida_virtual
+        camino = [raiz]
+        # 1) selección (con pérdida virtual) hasta una hoja; con el candado
+        #    solo se tocan las estadísticas del árbol
+        with self._candado:
+            nodo = raiz
+            nodo.virtual += virtual
+            while nodo.hijos:
+                nodo = self._seleccionar(nodo)
+                nodo.virtual += virtual
+                camino.append(nodo)
+            if nodo.pendiente is None:
+                # este hilo evalúa la hoja; los que lleguen mientras tanto esperan su resultado
+                propio: Optional[Future] = Future()
+                nodo.pendiente = pedido = propio
+            else:
+                self._colisiones += 1
+                propio, pedido = None, nodo.pendiente
+
+        # 2) fuera del candado: bajar por la copia propia del juego, generar
+        #    jugadas y evaluar; los otros hilos siguen seleccionando
+        for n in camino[1:]:
+            self._aplicar(juego, n.jugada)
+        terminal = juego.terminado()
+        turno = juego.turno_idx
+        if terminal:
+            valores = recompensas(juego.puntajes())
+            if propio is not None:
+                propio.set_result(None)
+        elif propio is not None:
+            try:
+                jugadas: List[Optional[Jugada]] = juego.jugadas_legales() or [None]
+                evaluacion = self.evaluador.solicitar(juego, jugadas).result()
+            except BaseException as error:
+                propio.set_exception(error)
+                raise
+            propio.set_result((jugadas, evaluacion))
+            valores = evaluacion.valor
+        else:
+            # nadie más va a completar el lote por esta hoja
+            self.evaluador.vaciar()
+            jugadas, evaluacion = pedido.result()
+            valores = evaluacion.valor
+
+        # 3) expansión + retropropagación (deshace la pérdida virtual)
+        with self._candado:
+            if nodo.pendiente is pedido:
+                nodo.pendiente = None
+            if not terminal and not nodo.hijos:
+                hijos = [NodoGuiado(j, nodo, turno, p) for j, p in zip(jugadas, evaluacion.priors)]
+                hijos.sort(key=lambda h: h.prior, reverse=True)
+                nodo.hijos = hijos
+            for n in camino:
+                n.virtual -= virtual
+                n.visitas += 1
+                if n.jugador is not None:
+                    n.valor += valores[n.jugador]
+        for _ in range(len(camino) - 1):
+            juego.deshacer()
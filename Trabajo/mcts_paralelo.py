@@ -0,0 +1,195 @@
+# mcts_paralelo.py
+# Paralelismo de raíz para MCTS: varios procesos buscan de forma independiente
+# (cada uno con su semilla) sobre la misma posición y al final se suman las
+# visitas y valores de los hijos de la raíz para elegir la jugada.
+#
+# Los procesos viven entre turnos. No reciben el Juego serializado sino una
+# foto compacta: tamaño del tablero, número de jugadores y la lista de jugadas
+# desde el inicio. Cada proceso conserva su propio Motor y solo aplica las
+# jugadas nuevas. El árbol, en cambio, empieza de cero en cada tarea: un mismo
+# proceso puede recibir varias tareas en un turno y la fusión necesita las
+# visitas de cada búsqueda por separado.
+import multiprocessing
+import os
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from libro import jugada_de_libro
+from mcts import AgenteMCTS
+from mesa import Jugada
+
+if TYPE_CHECKING:
+    from motor import Motor
+
+# (filas, columnas, num_jugadores, jugadas desde el inicio; None = pasar)
+Foto = Tuple[int, int, int, Tuple[Optional[Jugada], ...]]
+
+def foto_de(juego: "Motor") -> Foto:
+    return (juego.mesa.filas, juego.mesa.columnas, len(juego.jugadores),
+            tuple(entrada[0] for entrada in juego.historial))
+
+# ---------------- lado del proceso trabajador ----------------
+_JUEGO: Optional["Motor"] = None
+_AGENTE: Optional[AgenteMCTS] = None
+
+def _iniciar_trabajador(opciones: Dict[str, Any]) -> None:
+    global _AGENTE
+    _AGENTE = AgenteMCTS(**opciones)
+
+def _sincronizar(foto: Foto) -> "Motor":
+    """Lleva el motor local a la posición de la foto aplicando solo lo que falte."""
+    from motor import Motor
+    global _JUEGO
+    filas, columnas, num_jugadores, jugadas = foto
+    juego = _JUEGO
+    if (juego is None or (juego.mesa.filas, juego.mesa.columnas, len(juego.jugadores)) != foto[:3]
+            or len(juego.historial) > len(jugadas)
+            or any(juego.historial[i][0] != jugadas[i] for i in range(len(juego.historial)))):
+        juego = Motor(filas, columnas, num_jugadores)
+    for jugada in jugadas[len(juego.historial):]:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+    _JUEGO = juego
+    return juego
+
+def _buscar(tarea: Tuple[Foto, int, Optional[float], Optional[int]]):
+    foto, semilla, tiempo_limite, max_playouts = tarea
+    juego = _sincronizar(foto)
+    agente = _AGENTE
+    agente.rng.seed(semilla)
+    agente.tiempo_limite = tiempo_limite
+    agente.max_playouts = max_playouts
+    agente.elegir_jugada(juego)
+    return agente.estadisticas_raiz(), agente.informe()
+
+# ---------------- agente ----------------
+class AgenteMCTSParalelo:
+    """
+    MCTS con paralelismo de raíz sobre 'procesos' trabajadores persistentes.
+    El presupuesto (tiempo_limite / max_playouts) es por trabajador.
+    """
+    def __init__(
+        self,
+        procesos: Optional[int] = None,
+        tiempo_limite: Optional[float] = 1.0,
+        max_playouts: Optional[int] = None,
+        c: float = 1.4,
+        simulacion: str = "heuristico",
+        usar_libro: bool = True,
+        semilla: int = 0,
+    ):
+        if tiempo_limite is None and max_playouts is None:
+            raise ValueError("Indica tiempo_limite y/o max_playouts.")
+        self.nombre = "mcts-paralelo"
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tiempo_limite = tiempo_limite
+        self.max_playouts = max_playouts
+        self._opciones = {"tiempo_limite": tiempo_limite, "max_playouts": max_playouts,
+                          "c": c, "simulacion": simulacion, "reutilizar_arbol": False,
+                          # el libro lo consulta este proceso; los trabajadores siempre buscan
+                          "usar_libro": False}
+        self.usar_libro = usar_libro
+        self._semilla = semilla
+        self._turno = 0
+        self._pool = None
+        self._informe: Dict[str, Any] = {}
+
+    def _asegurar_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.procesos, _iniciar_trabajador, (self._opciones,))
+        return self._pool
+
+    def cerrar(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> "AgenteMCTSParalelo":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+    def elegir_jugada(self, juego: "Motor") -> Optional[Jugada]:
+        if juego.terminado():
+            return None
+        if self.usar_libro:
+            jugada = jugada_de_libro(juego)
+            if jugada is not None:
+                self._informe = {"libro": True}
+                return jugada
+        pool = self._asegurar_pool()
+        foto = foto_de(juego)
+        self._turno += 1
+        tareas = [(foto, self._semilla * 1_000_003 + self._turno * 1009 + i,
+                   self.tiempo_limite, self.max_playouts) for i in range(self.procesos)]
+
+        inicio = time.perf_counter()
+        resultados = pool.map(_buscar, tareas)
+        segundos = time.perf_counter() - inicio
+
+        # fusionar estadísticas de raíz
+        visitas: Dict[Optional[Jugada], int] = {}
+        valores: Dict[Optional[Jugada], float] = {}
+        playouts = 0
+        for hijos, informe in resultados:
+            playouts += informe["playouts"]
+            for jugada, n, v in hijos:
+                visitas[jugada] = visitas.get(jugada, 0) + n
+                valores[jugada] = valores.get(jugada, 0.0) + v
+        mejor = max(visitas, key=visitas.get)
+        self._informe = {
+            "procesos": self.procesos,
+            "playouts": playouts,
+            "segundos": segundos,
+            "playouts_por_segundo": playouts / segundos if segundos > 0 else 0.0,
+            "visitas_raiz": sum(visitas.values()),
+            "jugadas_raiz": len(visitas),
+            "valor_estimado": valores[mejor] / visitas[mejor],
+        }
+        return mejor
+
+    def informe(self) -> Dict[str, Any]:
+        return dict(self._informe)
+
+# ---------------- medición de escalado ----------------
+def medir_escalado(
+    max_procesos: int,
+    segundos: float = 2.0,
+    num_jugadores: int = 4,
+    jugadas_previas: int = 8,
+) -> List[Tuple[int, float]]:
+    """
+    Simulaciones por segundo (sumando todos los trabajadores) para 1..max_procesos,
+    desde una posición de apertura fija. Devuelve [(procesos, playouts/s), ...].
+    """
+    from agentes import AgenteAleatorio
+    from motor import Motor
+    juego = Motor(num_jugadores=num_jugadores)
+    azar = AgenteAleatorio(semilla=7)
+    for _ in range(jugadas_previas):
+        jugada = azar.elegir_jugada(juego)
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+
+    curva = []
+    for n in range(1, max_procesos + 1):
+        with AgenteMCTSParalelo(procesos=n, tiempo_limite=segundos, usar_libro=False) as agente:
+            agente.elegir_jugada(juego)   # calentamiento: arranque de procesos e índice
+            agente.elegir_jugada(juego)
+            curva.append((n, agente.informe()["playouts_por_segundo"]))
+    return curva
+
+if __name__ == "__main__":
+    maximo = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    print(f"CPUs disponibles: {os.cpu_count()}")
+    print("procesos  playouts/s  aceleración")
+    curva = medir_escalado(maximo)
+    base = curva[0][1] or 1.0
+    for n, pps in curva:
+        print(f"{n:8d}  {pps:10.1f}  {pps / base:10.2f}x")
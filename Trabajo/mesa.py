@@ -1,15 +1,27 @@
 # mesa.py
-from typing import List, Tuple, Dict, Set
+import random
+from typing import List, Tuple, Dict, Optional, Iterator, Set
+from colocaciones import IndiceColocaciones, obtener_indice
 from pieza import generar_orientaciones
 from repositorio_piezas import PIEZAS
+from zobrist import obtener_zobrist
 
 Coord = Tuple[int, int]
+# (pieza_id, orient_idx, ref); pieza_id es el id entero de PIEZAS
+Jugada = Tuple[int, int, Coord]
 
 class Mesa:
-    def __init__(self, filas: int = 20, columnas: int = 20):
+    """
+    Tablero en formato bitboard: cada celda (r, c) es el bit r*columnas + c
+    de un entero de precisión arbitraria. Se guarda una máscara por símbolo
+    más la máscara de ocupación; 'grid' se reconstruye como vista.
+    """
+    def __init__(self, filas: int = 20, columnas: int = 20, verificar: bool = False):
         self.filas = filas
         self.columnas = columnas
-        self.grid = [["." for _ in range(columnas)] for _ in range(filas)]
+        # Máscaras por símbolo y ocupación total
+        self.mascaras: Dict[str, int] = {}
+        self.ocupadas = 0
         # Estado por jugador (símbolo -> jugó algo ya?)
         self.jugadores_colocaron: Dict[str, bool] = {}
         # Esquinas por jugador (A,B,C,D) en un tablero 20x20
@@ -19,60 +31,125 @@ class Mesa:
             "C": (filas - 1, columnas - 1),
             "D": (filas - 1, 0),
         }
+        self._indice: Optional[IndiceColocaciones] = None
+        self._todas = (1 << (filas * columnas)) - 1
+        # Conjuntos incrementales por símbolo (como máscaras):
+        #   anclas: celdas libres donde la próxima pieza puede apoyarse por esquina
+        #           (o la esquina inicial si aún no jugó)
+        #   prohibidas: celdas ocupadas o que tocan por lado una pieza propia
+        self.anclas: Dict[str, int] = {}
+        self.prohibidas: Dict[str, int] = {}
+        for simbolo in self.corners_por_jugador:
+            self._asegurar_simbolo(simbolo)
+        # Podas monótonas por símbolo (el tablero solo se llena, así que valen
+        # para todo lo que siga hasta deshacer):
+        #   piezas_muertas: máscara de piezas que ya no caben en ningún lado
+        #   anclas_muertas: (inventario con el que se calculó, anclas donde no
+        #                    cabe ninguna pieza de ese inventario)
+        self.piezas_muertas: Dict[str, int] = {}
+        self.anclas_muertas: Dict[str, Tuple[int, int]] = {}
+        # última colocación que cabía para (símbolo, pieza): solo una pista
+        self._testigos: Dict[Tuple[str, int], int] = {}
+        # Pila de deshacer: (simbolo, id colocación, jugó antes?, anclas previas,
+        # prohibidas previas, piezas muertas previas, anclas muertas previas)
+        self._pila: List[Tuple[str, int, Optional[bool], Tuple[int, ...], Tuple[int, ...],
+                               Dict[str, int], Dict[str, Tuple[int, int]]]] = []
+        # Clave de Zobrist de la posición (celdas, piezas usadas y primeras jugadas)
+        self.zobrist = obtener_zobrist(filas, columnas)
+        self.hash = 0
+        # Modo de verificación: tras cada aplicar/deshacer compara contra un recálculo completo
+        self.verificar = verificar
+
+    # ---------- vista de la rejilla ----------
+    @property
+    def grid(self) -> List[List[str]]:
+        """Vista de solo lectura del tablero como lista de filas de caracteres."""
+        grid = [["." for _ in range(self.columnas)] for _ in range(self.filas)]
+        for simbolo, mascara in self.mascaras.items():
+            for i in self._bits(mascara):
+                r, c = divmod(i, self.columnas)
+                grid[r][c] = simbolo
+        return grid
 
     # ---------- utilidades de impresión ----------
     def mostrar(self) -> None:
+        grid = self.grid
         print("\n   " + " ".join([f"{c:02d}" for c in range(self.columnas)]))
         for r in range(self.filas):
-            print(f"{r:02d} " + " ".join(self.grid[r]))
+            print(f"{r:02d} " + " ".join(grid[r]))
         print()
 
     # ---------- validaciones de reglas ----------
     def _dentro(self, r: int, c: int) -> bool:
         return 0 <= r < self.filas and 0 <= c < self.columnas
 
-    def _vecinos_lado(self, r: int, c: int) -> List[Coord]:
-        return [(r-1, c), (r+1, c), (r, c-1), (r, c+1)]
+    def _bit(self, r: int, c: int) -> int:
+        return 1 << (r * self.columnas + c)
+
+    @property
+    def indice(self) -> IndiceColocaciones:
+        """Índice de colocaciones compartido por todas las mesas de este tamaño."""
+        if self._indice is None:
+            self._indice = obtener_indice(self.filas, self.columnas)
+        return self._indice
+
+    # ---------- pickle ----------
+    def __getstate__(self) -> Dict[str, object]:
+        # el índice y la tabla de Zobrist se comparten por tamaño: no viajan
+        estado = self.__dict__.copy()
+        estado["_indice"] = None
+        del estado["zobrist"]
+        return estado
 
-    def _vecinos_diagonal(self, r: int, c: int) -> List[Coord]:
-        return [(r-1, c-1), (r-1, c+1), (r+1, c-1), (r+1, c+1)]
+    def __setstate__(self, estado: Dict[str, object]) -> None:
+        self.__dict__.update(estado)
+        self.zobrist = obtener_zobrist(self.filas, self.columnas)
 
-    def _celdas_orientadas(self, pieza_id: str, orient_idx: int, ref: Coord) -> List[Coord]:
+    def _colocacion(self, pieza_id: int, orient_idx: int, ref: Coord) -> Optional[int]:
         """
-        Toma la orientación 'orient_idx' de la pieza y la traslada para que la
-        celda (0,0) caiga en 'ref' (fila, col).
+        Id de la colocación en el índice, o None si alguna celda queda fuera
+        del tablero.
         """
-        o = generar_orientaciones(pieza_id)
-        if orient_idx < 0 or orient_idx >= len(o):
-            raise ValueError(f"Orientación inválida para {pieza_id}: {orient_idx}")
-        rr, cc = ref
-        return [(rr + r, cc + c) for r, c in o[orient_idx]]
+        n = len(generar_orientaciones(pieza_id))
+        if orient_idx < 0 or orient_idx >= n:
+            raise ValueError(f"Orientación inválida para {PIEZAS.nombre(pieza_id)}: {orient_idx}")
+        return self.indice.por_clave.get((pieza_id, orient_idx, tuple(ref)))
 
-    def _toca_esquina_propia(self, celdas: List[Coord], simbolo: str) -> bool:
-        for r, c in celdas:
-            for dr, dc in self._vecinos_diagonal(r, c):
-                if self._dentro(dr, dc) and self.grid[dr][dc] == simbolo:
-                    return True
-        return False
+    def _delta_hash(self, simbolo: str, idx: int, primera: bool) -> int:
+        """XOR que aporta (o quita) la colocación 'idx' de 'simbolo' a la clave."""
+        z = self.zobrist
+        claves = z.celdas(simbolo)
+        delta = z.pieza(simbolo, self.indice.pieza[idx])
+        for i in self._bits(self.indice.mascara[idx]):
+            delta ^= claves[i]
+        if primera:
+            delta ^= z.primera(simbolo)
+        return delta
 
-    def _toca_lado_propio(self, celdas: List[Coord], simbolo: str) -> bool:
-        for r, c in celdas:
-            for lr, lc in self._vecinos_lado(r, c):
-                if self._dentro(lr, lc) and self.grid[lr][lc] == simbolo:
-                    return True
-        return False
+    def _bits(self, mascara: int) -> Iterator[int]:
+        """Recorre los índices de celda (r*columnas + c) encendidos en una máscara."""
+        while mascara:
+            bajo = mascara & -mascara
+            yield bajo.bit_length() - 1
+            mascara ^= bajo
 
-    def _ocupa_esquina_inicial(self, celdas: List[Coord], simbolo: str) -> bool:
-        if simbolo not in self.corners_por_jugador:
-            # Si no está mapeado, no exigimos esquina (útil para más de 4)
-            return True
-        return self.corners_por_jugador[simbolo] in celdas
+    def _asegurar_simbolo(self, simbolo: str) -> None:
+        """Inicializa anclas/prohibidas de un símbolo la primera vez que aparece."""
+        if simbolo in self.anclas:
+            return
+        if simbolo in self.corners_por_jugador:
+            anclas = self._bit(*self.corners_por_jugador[simbolo])
+        else:
+            # sin esquina asignada la primera pieza puede ir en cualquier celda libre
+            anclas = self._todas
+        self.anclas[simbolo] = anclas & ~self.ocupadas
+        self.prohibidas[simbolo] = self.ocupadas
 
     # ---------- API pública ----------
     def validar_colocacion(
         self,
         simbolo: str,
-        pieza_id: str,
+        pieza_id: int,
         orient_idx: int,
         ref: Coord
     ) -> Tuple[bool, List[Coord], str]:
@@ -84,51 +161,274 @@ class Mesa:
           - si NO es la primera: DEBE tocar por ESQUINA alguna propia
           - NUNCA tocar por LADO una propia
         """
-        if pieza_id not in PIEZAS.ids():
+        if not isinstance(pieza_id, int) or not 0 <= pieza_id < PIEZAS.n:
             return False, [], f"Pieza no reconocida: {pieza_id}"
 
-        celdas = self._celdas_orientadas(pieza_id, orient_idx, ref)
+        idx = self._colocacion(pieza_id, orient_idx, ref)
 
         # 1) dentro
-        for r, c in celdas:
-            if not self._dentro(r, c):
-                return False, [], "La pieza se sale del tablero."
+        if idx is None:
+            return False, [], "La pieza se sale del tablero."
+        mascara = self.indice.mascara[idx]
 
         # 2) libre/ no solape
-        for r, c in celdas:
-            if self.grid[r][c] != ".":
-                return False, [], "La pieza se superpone con otra."
+        if mascara & self.ocupadas:
+            return False, [], "La pieza se superpone con otra."
 
         # 3) contacto con propias (lado prohibido, esquina depende)
-        primera = not self.jugadores_colocaron.get(simbolo, False)
+        self._asegurar_simbolo(simbolo)
 
-        # no tocar por lado
-        if self._toca_lado_propio(celdas, simbolo):
+        # no tocar por lado: lo libre que queda prohibido es lo adyacente a una propia
+        if mascara & self.prohibidas[simbolo]:
             return False, [], "No puede tocar por lado otra pieza propia."
 
-        if primera:
-            # primera debe ocupar la esquina asignada
-            if not self._ocupa_esquina_inicial(celdas, simbolo):
+        # la primera debe cubrir la esquina asignada; las siguientes, tocar por
+        # esquina alguna propia. En ambos casos equivale a cubrir un ancla.
+        if not mascara & self.anclas[simbolo]:
+            if not self.jugadores_colocaron.get(simbolo, False):
                 return False, [], "La primera pieza debe cubrir tu esquina inicial."
-        else:
-            # jugadas posteriores deben tocar por esquina al menos una
-            if not self._toca_esquina_propia(celdas, simbolo):
-                return False, [], "Debes tocar por esquina alguna pieza tuya."
+            return False, [], "Debes tocar por esquina alguna pieza tuya."
+
+        return True, list(self.indice.celdas[idx]), "OK"
+
+    def iter_jugadas_legales(self, simbolo: str, piezas: int) -> Iterator[Jugada]:
+        """
+        Genera perezosamente todas las jugadas legales (pieza_id, orient_idx, ref)
+        del jugador con el inventario 'piezas' (máscara de PIEZAS). Solo prueba
+        las colocaciones que cubren alguna ancla, alineando cada celda de la
+        orientación con ella. Cada jugada se entrega una sola vez. Se saltan
+        las piezas y anclas que ya se sabe que no tienen jugada (ver _vivas);
+        si se recorre hasta el final, anota las nuevas.
+        """
+        self._asegurar_simbolo(simbolo)
+        inventario = piezas & PIEZAS.todas
+        piezas_vivas, anclas = self._vivas(simbolo, inventario)
+        piezas = PIEZAS.lista(piezas_vivas)
+        prohibidas = self.prohibidas[simbolo]
+        indice = self.indice
+        mascaras = indice.mascara
+        vistas: Set[int] = set()
+        anclas_con_jugada = piezas_con_jugada = 0
+
+        for i in self._bits(anclas):
+            cubren = indice.por_celda[i]
+            for pieza_id in piezas:
+                for idx in cubren[pieza_id]:
+                    # cubre el ancla por construcción: basta con no pisar prohibidas
+                    if mascaras[idx] & prohibidas:
+                        continue
+                    anclas_con_jugada |= 1 << i
+                    piezas_con_jugada |= 1 << pieza_id
+                    if idx not in vistas:
+                        vistas.add(idx)
+                        yield indice.clave(idx)
+        # solo se llega aquí si se recorrió todo
+        self._registrar_muertas(simbolo, inventario, anclas & ~anclas_con_jugada,
+                                piezas_vivas & ~piezas_con_jugada)
+
+    def jugadas_legales(self, simbolo: str, piezas: int) -> List[Jugada]:
+        """Lista completa de jugadas legales (ver iter_jugadas_legales)."""
+        return list(self.iter_jugadas_legales(simbolo, piezas))
+
+    def hay_jugada_legal(self, simbolo: str, piezas: int) -> bool:
+        """True en cuanto aparece la primera jugada legal."""
+        return next(self.iter_jugadas_legales(simbolo, piezas), None) is not None
+
+    def jugada_aleatoria(
+        self,
+        simbolo: str,
+        piezas: int,
+        rng: random.Random,
+        grandes_primero: bool = False,
+    ) -> Optional[Jugada]:
+        """
+        Primera jugada legal que aparece recorriendo piezas, anclas y colocaciones
+        en orden aleatorio (con grandes_primero, las piezas de mayor tamaño antes).
+        No es uniforme sobre todas las jugadas, pero cuesta mucho menos que
+        listarlas: pensada para simulaciones (playouts).
+        """
+        self._asegurar_simbolo(simbolo)
+        inventario = piezas & PIEZAS.todas
+        piezas_vivas, anclas_vivas = self._vivas(simbolo, inventario)
+        piezas = PIEZAS.lista(piezas_vivas)
+        rng.shuffle(piezas)
+        if grandes_primero:
+            piezas.sort(key=PIEZAS.tamanos.__getitem__, reverse=True)  # sort estable: empates siguen al azar
+        prohibidas = self.prohibidas[simbolo]
+        anclas = list(self._bits(anclas_vivas))
+        rng.shuffle(anclas)
+        indice = self.indice
+        mascaras = indice.mascara
+
+        for pieza_id in piezas:
+            for i in anclas:
+                candidatos = indice.por_celda[i][pieza_id]
+                if not candidatos:
+                    continue
+                inicio = rng.randrange(len(candidatos))
+                for k in range(len(candidatos)):
+                    idx = candidatos[(inicio + k) % len(candidatos)]
+                    if not mascaras[idx] & prohibidas:
+                        return indice.clave(idx)
+        # no hubo jugada: se probaron todas las piezas en todas las anclas
+        self._registrar_muertas(simbolo, inventario, anclas_vivas, piezas_vivas)
+        return None
+
+    # ---------- podas monótonas ----------
+    def _vivas(self, simbolo: str, inventario: int) -> Tuple[int, int]:
+        """
+        (piezas, anclas) que vale la pena probar: sin las piezas que ya no caben
+        en ningún lado ni las anclas donde no cabe nada del inventario. Las
+        anclas muertas solo se usan si se calcularon con un inventario que
+        incluye a este.
+        """
+        piezas = inventario & ~self.piezas_muertas.get(simbolo, 0)
+        anclas = self.anclas[simbolo]
+        registro = self.anclas_muertas.get(simbolo)
+        if registro is not None and not inventario & ~registro[0]:
+            anclas &= ~registro[1]
+        return piezas, anclas
+
+    def _registrar_muertas(self, simbolo: str, inventario: int, anclas: int, candidatas: int) -> None:
+        """
+        Anota como muertas las 'anclas' en las que no cupo ninguna pieza del
+        inventario, y de las piezas 'candidatas' (sin jugada ahora) las que
+        tampoco caben en ninguna otra parte del tablero.
+        """
+        registro = self.anclas_muertas.get(simbolo)
+        if registro is not None and not inventario & ~registro[0]:
+            anclas |= registro[1]
+        self.anclas_muertas[simbolo] = (inventario, anclas)
 
-        return True, celdas, "OK"
+        if not candidatas:
+            return
+        prohibidas = self.prohibidas[simbolo]
+        mascaras = self.indice.mascara
+        muertas = self.piezas_muertas.get(simbolo, 0)
+        for pieza_id in PIEZAS.lista(candidatas):
+            testigo = self._testigos.get((simbolo, pieza_id))
+            if testigo is not None and not mascaras[testigo] & prohibidas:
+                continue
+            for idx in self.indice.por_pieza[pieza_id]:
+                if not mascaras[idx] & prohibidas:
+                    self._testigos[(simbolo, pieza_id)] = idx
+                    break
+            else:
+                muertas |= 1 << pieza_id
+        self.piezas_muertas[simbolo] = muertas
 
     def colocar(
         self,
         simbolo: str,
-        pieza_id: str,
+        pieza_id: int,
         orient_idx: int,
         ref: Coord
     ) -> bool:
-        ok, celdas, _ = self.validar_colocacion(simbolo, pieza_id, orient_idx, ref)
+        ok, _, _ = self.validar_colocacion(simbolo, pieza_id, orient_idx, ref)
         if not ok:
             return False
-        for r, c in celdas:
-            self.grid[r][c] = simbolo
+        self.aplicar(simbolo, (pieza_id, orient_idx, ref))
+        return True
+
+    # ---------- hacer / deshacer ----------
+    def aplicar(self, simbolo: str, jugada: Jugada) -> None:
+        """
+        Coloca una jugada YA VALIDADA (p.ej. salida de jugadas_legales) sin
+        volver a comprobar reglas y la apila para poder deshacerla.
+        """
+        self._asegurar_simbolo(simbolo)
+        indice = self.indice
+        idx = self._colocacion(*jugada)
+        if idx is None:
+            raise ValueError(f"La jugada {jugada} queda fuera del tablero.")
+        mascara = indice.mascara[idx]
+        previo = self.jugadores_colocaron.get(simbolo)
+        # las máscaras son enteros inmutables: guardar la referencia no copia nada
+        self._pila.append((simbolo, idx, previo, tuple(self.anclas.values()), tuple(self.prohibidas.values()),
+                           dict(self.piezas_muertas), dict(self.anclas_muertas)))
+
+        self.mascaras[simbolo] = self.mascaras.get(simbolo, 0) | mascara
+        self.ocupadas |= mascara
+        self.hash ^= self._delta_hash(simbolo, idx, not previo)
+
+        # actualización incremental: solo las celdas de la pieza y sus halos
+        for otro in self.anclas:
+            self.prohibidas[otro] |= mascara
+            self.anclas[otro] &= ~mascara
+        self.prohibidas[simbolo] |= indice.lado[idx]
+        anclas = indice.esquina[idx] if not previo else self.anclas[simbolo] | indice.esquina[idx]
+        self.anclas[simbolo] = anclas & ~self.prohibidas[simbolo]
+
         # marcar que ya jugó al menos una
         self.jugadores_colocaron[simbolo] = True
-        return True
+        if self.verificar:
+            self.verificar_consistencia()
+
+    def deshacer(self) -> Jugada:
+        """Revierte la última colocación y la devuelve. O(tamaño de pieza)."""
+        if not self._pila:
+            raise ValueError("No hay jugadas para deshacer.")
+        simbolo, idx, previo, anclas, prohibidas, self.piezas_muertas, self.anclas_muertas = self._pila.pop()
+        mascara = self.indice.mascara[idx]
+        self.mascaras[simbolo] ^= mascara
+        if not self.mascaras[simbolo]:
+            del self.mascaras[simbolo]
+        self.ocupadas ^= mascara
+        self.hash ^= self._delta_hash(simbolo, idx, not previo)
+        simbolos = list(self.anclas)
+        for s, a, p in zip(simbolos, anclas, prohibidas):
+            self.anclas[s] = a
+            self.prohibidas[s] = p
+        # símbolos que aparecieron después se vuelven a inicializar cuando hagan falta
+        for s in simbolos[len(anclas):]:
+            del self.anclas[s]
+            del self.prohibidas[s]
+        if previo is None:
+            del self.jugadores_colocaron[simbolo]
+        else:
+            self.jugadores_colocaron[simbolo] = previo
+        if self.verificar:
+            self.verificar_consistencia()
+        return self.indice.clave(idx)
+
+    def historial(self) -> List[Tuple[str, Jugada]]:
+        """Colocaciones aplicadas en orden, como (simbolo, jugada)."""
+        return [(entrada[0], self.indice.clave(entrada[1])) for entrada in self._pila]
+
+    def verificar_consistencia(self) -> None:
+        """
+        Recalcula el estado desde cero reproduciendo el historial en una mesa
+        nueva y lo compara con el incremental. Lanza RuntimeError si difieren.
+        """
+        nueva = Mesa(self.filas, self.columnas)
+        nueva.corners_por_jugador = dict(self.corners_por_jugador)
+        nueva.anclas, nueva.prohibidas = {}, {}
+        for simbolo in self.anclas:
+            nueva._asegurar_simbolo(simbolo)
+        for simbolo, jugada in self.historial():
+            ok, _, motivo = nueva.validar_colocacion(simbolo, *jugada)
+            if not ok:
+                raise RuntimeError(f"Historial inválido ({simbolo} {jugada}): {motivo}")
+            nueva.aplicar(simbolo, jugada)
+
+        for campo in ("ocupadas", "jugadores_colocaron", "anclas", "prohibidas", "hash"):
+            if getattr(nueva, campo) != getattr(self, campo):
+                raise RuntimeError(f"Estado inconsistente en Mesa.{campo}")
+        for simbolo in set(self.mascaras) | set(nueva.mascaras):
+            if self.mascaras.get(simbolo, 0) != nueva.mascaras.get(simbolo, 0):
+                raise RuntimeError(f"Estado inconsistente en Mesa.mascaras[{simbolo}]")
+
+        # las podas no se recalculan igual (dependen de qué se generó), pero
+        # deben ser correctas: nada de lo descartado puede tener jugada
+        mascaras = self.indice.mascara
+        for simbolo, muertas in self.piezas_muertas.items():
+            prohibidas = self.prohibidas[simbolo]
+            for pieza_id in PIEZAS.lista(muertas):
+                if any(not mascaras[idx] & prohibidas for idx in self.indice.por_pieza[pieza_id]):
+                    raise RuntimeError(f"Pieza {PIEZAS.nombre(pieza_id)} marcada muerta para {simbolo} pero cabe")
+        for simbolo, (inventario, muertas) in self.anclas_muertas.items():
+            prohibidas = self.prohibidas[simbolo]
+            for i in self._bits(muertas & self.anclas[simbolo]):
+                for pieza_id in PIEZAS.lista(inventario):
+                    if any(not mascaras[idx] & prohibidas for idx in self.indice.por_celda[i][pieza_id]):
+                        raise RuntimeError(f"Ancla {divmod(i, self.columnas)} marcada muerta para {simbolo} pero tiene jugada")
@@ -0,0 +1,160 @@
+# motor.py
+# Motor de juego sin entrada/salida: reglas, turnos, pases, hacer/deshacer y
+# puntajes sobre Mesa + Jugador + PIEZAS. No imprime nada; lo usan la consola
+# (Juego), los agentes y cualquier código que quiera jugar a máxima velocidad.
+import random
+from typing import List, Optional, Tuple
+from mesa import Mesa, Jugada
+from repositorio_piezas import PIEZAS
+from jugador import Jugador
+
+class Motor:
+    def __init__(self, filas: int = 20, columnas: int = 20, num_jugadores: int = 2, verificar: bool = False):
+        if not 2 <= num_jugadores <= 4:
+            raise ValueError("El juego soporta entre 2 y 4 jugadores.")
+
+        self.mesa = Mesa(filas, columnas, verificar=verificar)
+        # Símbolos fijos para mapear esquinas: A,B,C,D
+        simbolos = ["A", "B", "C", "D"]
+        nombres  = ["Azul", "Rojo", "Verde", "Amarillo"]
+
+        self.jugadores: List[Jugador] = []
+        for i in range(num_jugadores):
+            j = Jugador(
+                id=i+1,
+                nombre=nombres[i],
+                simbolo=simbolos[i],
+                piezas_disponibles=PIEZAS.todas
+            )
+            self.jugadores.append(j)
+
+        self.turno_idx = 0
+        self.pases_consecutivos = 0  # para detectar fin (todos pasaron)
+        # Pila de deshacer: (jugada o None si pasó, ha_pasado previo, pases_consecutivos previo)
+        self.historial: List[Tuple[Optional[Jugada], bool, int]] = []
+        self.verificar = verificar
+
+    # ----------------- utilidades de turno -----------------
+    def jugador_actual(self) -> Jugador:
+        return self.jugadores[self.turno_idx]
+
+    def siguiente_turno(self) -> None:
+        self.turno_idx = (self.turno_idx + 1) % len(self.jugadores)
+
+    def terminado(self) -> bool:
+        """El juego acaba cuando todos pasaron de forma consecutiva."""
+        return self.pases_consecutivos >= len(self.jugadores)
+
+    def puntajes(self) -> List[int]:
+        """Puntaje de cada jugador (en orden de asiento): -cuadros sin jugar."""
+        return [-j.cuadros_restantes for j in self.jugadores]
+
+    def clave_posicion(self) -> int:
+        """Clave de Zobrist de la posición completa, incluido quién mueve."""
+        return self.mesa.hash ^ self.mesa.zobrist.turno[self.turno_idx]
+
+    def quedan_jugadas_posibles(self, jugador: Optional[Jugador] = None) -> bool:
+        """True si el jugador (por defecto el actual) tiene al menos una jugada legal."""
+        jugador = jugador or self.jugador_actual()
+        return self.mesa.hay_jugada_legal(jugador.simbolo, jugador.piezas_disponibles)
+
+    def jugadas_legales(self, jugador: Optional[Jugador] = None) -> List[Jugada]:
+        """Todas las jugadas legales (pieza_id, orient_idx, ref) del jugador (por defecto el actual)."""
+        jugador = jugador or self.jugador_actual()
+        return self.mesa.jugadas_legales(jugador.simbolo, jugador.piezas_disponibles)
+
+    def validar(self, jugada: Jugada) -> Tuple[bool, str]:
+        """Comprueba inventario y reglas de una jugada del jugador actual (sin aplicarla)."""
+        jugador = self.jugador_actual()
+        pieza_id, orient_idx, ref = jugada
+        if not isinstance(pieza_id, int) or not jugador.tiene_pieza(pieza_id):
+            return False, "Esa pieza no está en tu lista disponible."
+        ok, _, motivo = self.mesa.validar_colocacion(jugador.simbolo, pieza_id, orient_idx, ref)
+        return ok, motivo
+
+    # ----------------- hacer / deshacer -----------------
+    def jugar(self, jugada: Jugada) -> None:
+        """
+        Aplica una jugada legal del jugador actual (p.ej. de jugadas_legales) y
+        avanza el turno. Se puede revertir con deshacer().
+        Si la jugada no se puede aplicar lanza ValueError sin cambiar nada; las
+        reglas del tablero solo se comprueban con 'verificar'.
+        """
+        jugador = self.jugador_actual()
+        pieza_id = jugada[0]
+        if self.verificar:
+            ok, motivo = self.validar(jugada)
+            if not ok:
+                raise ValueError(f"Jugada ilegal {jugada}: {motivo}")
+        elif not jugador.tiene_pieza(pieza_id):
+            raise ValueError(f"La pieza {PIEZAS.nombre(pieza_id)} no está disponible para {jugador.nombre}.")
+        self.mesa.aplicar(jugador.simbolo, jugada)
+        self.historial.append((jugada, jugador.ha_pasado, self.pases_consecutivos))
+        jugador.quitar_pieza(pieza_id)
+        idx = self.mesa.indice.por_clave[(pieza_id, jugada[1], tuple(jugada[2]))]
+        jugador.registrar_colocacion(pieza_id, list(self.mesa.indice.celdas[idx]))
+        jugador.ha_pasado = False
+        self.pases_consecutivos = 0
+        self.siguiente_turno()
+        if self.verificar:
+            self.verificar_consistencia()
+
+    def pasar(self) -> None:
+        """El jugador actual pasa el turno (deshacible)."""
+        jugador = self.jugador_actual()
+        self.historial.append((None, jugador.ha_pasado, self.pases_consecutivos))
+        jugador.marcar_paso()
+        self.pases_consecutivos += 1
+        self.siguiente_turno()
+
+    def deshacer(self) -> Optional[Jugada]:
+        """Revierte la última jugada o pase: tablero, inventario, turno y pases."""
+        if not self.historial:
+            raise ValueError("No hay jugadas para deshacer.")
+        jugada, ha_pasado, pases = self.historial.pop()
+        self.turno_idx = (self.turno_idx - 1) % len(self.jugadores)
+        jugador = self.jugador_actual()
+        if jugada is not None:
+            self.mesa.deshacer()
+            jugador.devolver_pieza(jugada[0])
+            del jugador.piezas_colocadas[jugada[0]]
+        jugador.ha_pasado = ha_pasado
+        self.pases_consecutivos = pases
+        if self.verificar:
+            self.verificar_consistencia()
+        return jugada
+
+    def verificar_consistencia(self) -> None:
+        """Comprueba mesa e inventarios contra un recálculo desde el historial."""
+        self.mesa.verificar_consistencia()
+        colocadas = {j.simbolo: [] for j in self.jugadores}
+        for simbolo, jugada in self.mesa.historial():
+            colocadas[simbolo].append(jugada[0])
+        for j in self.jugadores:
+            esperadas = PIEZAS.todas
+            for p in colocadas[j.simbolo]:
+                esperadas &= ~(1 << p)
+            if j.piezas_disponibles != esperadas or j.cuadros_restantes != PIEZAS.cuadros(esperadas):
+                raise RuntimeError(f"Inventario inconsistente para {j.nombre}")
+            if sorted(j.piezas_colocadas) != sorted(colocadas[j.simbolo]):
+                raise RuntimeError(f"Historial de colocaciones inconsistente para {j.nombre}")
+
+    # ----------------- simulación -----------------
+    def jugar_al_azar(self, rng: random.Random, grandes_primero: bool = False) -> int:
+        """
+        Completa la partida con jugadas al azar (Mesa.jugada_aleatoria).
+        Devuelve cuántas acciones (jugadas o pases) aplicó.
+        """
+        acciones = 0
+        while not self.terminado():
+            jugador = self.jugador_actual()
+            jugada = None
+            if jugador.piezas_disponibles:
+                jugada = self.mesa.jugada_aleatoria(jugador.simbolo, jugador.piezas_disponibles,
+                                                    rng, grandes_primero)
+            if jugada is None:
+                self.pasar()
+            else:
+                self.jugar(jugada)
+            acciones += 1
+        return acciones
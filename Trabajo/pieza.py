@@ -7,7 +7,7 @@ from repositorio_piezas import PIEZAS  # importamos el repositorio global
 
 Coord = Tuple[int, int]
 
-def generar_orientaciones(pieza_id: str) -> List[List[Coord]]:
+def generar_orientaciones(pieza_id: int) -> Tuple[Tuple[Coord, ...], ...]:
     """
     Devuelve todas las orientaciones únicas (rotaciones + reflejos) 
     para una pieza específica.
@@ -15,22 +15,22 @@ def generar_orientaciones(pieza_id: str) -> List[List[Coord]]:
     """
     return PIEZAS.orientaciones(pieza_id)
 
-def tamano_pieza(pieza_id: str) -> int:
+def tamano_pieza(pieza_id: int) -> int:
     """
     Devuelve el tamaño (cantidad de cuadros) de la pieza.
     Ejemplo: I1 -> 1, L5 -> 5
     """
-    return PIEZAS.tam(pieza_id)
+    return PIEZAS.tamanos[pieza_id]
 
 def lista_piezas_disponibles() -> List[str]:
     """
-    Devuelve la lista completa de IDs de piezas disponibles en el juego.
-    Ejemplo: ["I1", "I2", "I3", "L3", "L4", "L5", ...]
+    Devuelve los nombres de todas las piezas del juego (en orden de id).
+    Ejemplo: ["I1", "I2", "I3", "L3", "I4", ...]
     """
-    return PIEZAS.ids()
+    return list(PIEZAS.nombres)
 
 # Ejemplo de uso rápido
 if __name__ == "__main__":
     print("Piezas disponibles:", lista_piezas_disponibles())
-    print("Tamaño de L5:", tamano_pieza("L5"))
-    print("Cantidad de orientaciones de L5:", len(generar_orientaciones("L5")))
+    print("Tamaño de L5:", tamano_pieza(PIEZAS.id_de("L5")))
+    print("Cantidad de orientaciones de L5:", len(generar_orientaciones(PIEZAS.id_de("L5"))))
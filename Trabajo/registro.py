@@ -0,0 +1,197 @@
+# registro.py
+# Formato binario compacto para guardar millones de partidas.
+#
+# Archivo de datos (.blk):
+#   cabecera: b"BLKR", versión (u8), filas (u8), columnas (u8), reservado (u8)
+#   por partida: etiqueta (u32), num_jugadores (u8), num_acciones (u16),
+#                y 3 bytes por acción:
+#                  byte 0 = índice de pieza << 3 | orientación  (0xFF = pasar)
+#                  bytes 1-2 = celda de referencia r*columnas + c (u16)
+# Índice (.blk.idx): un u64 por partida con su posición en el archivo de datos.
+#
+# El escritor solo agrega al final; el lector abre ambos archivos con mmap y
+# puede ir directo a la partida N sin leer el resto.
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional, Sequence, Tuple
+from mesa import Jugada
+from motor import Motor
+
+MAGIA = b"BLKR"
+VERSION = 1
+_CABECERA = struct.Struct("<4sBBBB")
+_PARTIDA = struct.Struct("<IBH")
+_ACCION = struct.Struct("<BH")
+_POSICION = struct.Struct("<Q")
+PASAR = 0xFF
+
+def codificar(jugada: Optional[Jugada], columnas: int) -> bytes:
+    if jugada is None:
+        return _ACCION.pack(PASAR, 0)
+    pieza_id, orient_idx, (r, c) = jugada
+    return _ACCION.pack(pieza_id << 3 | orient_idx, r * columnas + c)
+
+def decodificar(datos: bytes, desde: int, columnas: int) -> Optional[Jugada]:
+    primero, celda = _ACCION.unpack_from(datos, desde)
+    if primero == PASAR:
+        return None
+    return primero >> 3, primero & 7, divmod(celda, columnas)
+
+def ruta_indice(ruta: str) -> str:
+    return ruta + ".idx"
+
+class EscritorRegistro:
+    """
+    Agrega partidas a un registro (lo crea si no existe). Si el proceso anterior
+    se cortó a mitad de una escritura, descarta la partida incompleta.
+    """
+    def __init__(self, ruta: str, filas: int = 20, columnas: int = 20):
+        self.ruta = ruta
+        self.filas = filas
+        self.columnas = columnas
+        nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) < _CABECERA.size
+        self._datos = open(ruta, "wb" if nuevo else "r+b")
+        if nuevo:
+            self._datos.write(_CABECERA.pack(MAGIA, VERSION, filas, columnas, 0))
+            self._datos.flush()
+            open(ruta_indice(ruta), "wb").close()
+        else:
+            magia, version, f, c, _ = _CABECERA.unpack(self._datos.read(_CABECERA.size))
+            if magia != MAGIA or version != VERSION:
+                raise ValueError(f"{ruta} no es un registro de partidas compatible.")
+            if (f, c) != (filas, columnas):
+                raise ValueError(f"{ruta} es de un tablero {f}x{c}, no {filas}x{columnas}.")
+        if not os.path.exists(ruta_indice(ruta)):
+            self._reconstruir_indice()
+        self._indice = open(ruta_indice(ruta), "r+b")
+        self._recuperar()
+
+    def _reconstruir_indice(self) -> None:
+        """Vuelve a generar el índice recorriendo las cabeceras de las partidas."""
+        self._datos.seek(0, os.SEEK_END)
+        tam = self._datos.tell()
+        posicion = _CABECERA.size
+        with open(ruta_indice(self.ruta), "wb") as indice:
+            while posicion + _PARTIDA.size <= tam:
+                self._datos.seek(posicion)
+                _, _, acciones = _PARTIDA.unpack(self._datos.read(_PARTIDA.size))
+                fin = posicion + _PARTIDA.size + acciones * _ACCION.size
+                if fin > tam:
+                    break
+                indice.write(_POSICION.pack(posicion))
+                posicion = fin
+
+    def _recuperar(self) -> None:
+        """Deja datos e índice alineados con la última partida completa."""
+        tam_datos = os.fstat(self._datos.fileno()).st_size
+        completas = os.fstat(self._indice.fileno()).st_size // _POSICION.size
+        fin = _CABECERA.size
+        while completas:
+            self._indice.seek((completas - 1) * _POSICION.size)
+            (ultima,) = _POSICION.unpack(self._indice.read(_POSICION.size))
+            self._datos.seek(ultima)
+            cabecera = self._datos.read(_PARTIDA.size)
+            if len(cabecera) == _PARTIDA.size:
+                _, _, acciones = _PARTIDA.unpack(cabecera)
+                fin = ultima + _PARTIDA.size + acciones * _ACCION.size
+                if fin <= tam_datos:
+                    break
+            # la última partida indexada quedó a medias
+            completas -= 1
+            fin = ultima
+        self._indice.truncate(completas * _POSICION.size)
+        self._datos.truncate(fin)
+        self._indice.seek(0, os.SEEK_END)
+        self._datos.seek(0, os.SEEK_END)
+        self.partidas = completas
+
+    def agregar(self, jugadas: Sequence[Optional[Jugada]], num_jugadores: int, etiqueta: int = 0) -> int:
+        """Agrega una partida (jugadas en orden; None = pasar). Devuelve su número."""
+        posicion = self._datos.tell()
+        cuerpo = b"".join(codificar(j, self.columnas) for j in jugadas)
+        self._datos.write(_PARTIDA.pack(etiqueta, num_jugadores, len(jugadas)) + cuerpo)
+        self._indice.write(_POSICION.pack(posicion))
+        self.partidas += 1
+        return self.partidas - 1
+
+    def agregar_motor(self, motor: Motor, etiqueta: int = 0) -> int:
+        return self.agregar([entrada[0] for entrada in motor.historial], len(motor.jugadores), etiqueta)
+
+    def flush(self) -> None:
+        self._datos.flush()
+        self._indice.flush()
+
+    def cerrar(self) -> None:
+        self.flush()
+        self._datos.close()
+        self._indice.close()
+
+    def __enter__(self) -> "EscritorRegistro":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+class LectorRegistro:
+    """Acceso aleatorio a las partidas de un registro mediante mmap."""
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._f_datos = open(ruta, "rb")
+        self._datos = mmap.mmap(self._f_datos.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, self.filas, self.columnas, _ = _CABECERA.unpack_from(self._datos, 0)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es un registro de partidas compatible.")
+        self._f_indice = open(ruta_indice(ruta), "rb")
+        tam = os.fstat(self._f_indice.fileno()).st_size
+        self._indice = mmap.mmap(self._f_indice.fileno(), 0, access=mmap.ACCESS_READ) if tam else b""
+        self._n = tam // _POSICION.size
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _posicion(self, n: int) -> int:
+        if not 0 <= n < self._n:
+            raise IndexError(f"Partida fuera de rango: {n}")
+        return _POSICION.unpack_from(self._indice, n * _POSICION.size)[0]
+
+    def info(self, n: int) -> Tuple[int, int, int]:
+        """(etiqueta, num_jugadores, num_acciones) de la partida n."""
+        return _PARTIDA.unpack_from(self._datos, self._posicion(n))
+
+    def jugadas(self, n: int) -> List[Optional[Jugada]]:
+        posicion = self._posicion(n)
+        _, _, acciones = _PARTIDA.unpack_from(self._datos, posicion)
+        inicio = posicion + _PARTIDA.size
+        return [decodificar(self._datos, inicio + k * _ACCION.size, self.columnas) for k in range(acciones)]
+
+    def reproducir(self, n: int, hasta: Optional[int] = None) -> Motor:
+        """Motor con la partida n jugada hasta la acción 'hasta' (por defecto, hasta el final)."""
+        _, num_jugadores, _ = self.info(n)
+        motor = Motor(self.filas, self.columnas, num_jugadores)
+        for jugada in self.jugadas(n)[:hasta]:
+            if jugada is None:
+                motor.pasar()
+            else:
+                ok, motivo = motor.validar(jugada)
+                if not ok:
+                    raise ValueError(f"Partida {n}: jugada ilegal {jugada}: {motivo}")
+                motor.jugar(jugada)
+        return motor
+
+    def __iter__(self) -> Iterator[List[Optional[Jugada]]]:
+        for n in range(self._n):
+            yield self.jugadas(n)
+
+    def cerrar(self) -> None:
+        if isinstance(self._indice, mmap.mmap):
+            self._indice.close()
+        self._datos.close()
+        self._f_indice.close()
+        self._f_datos.close()
+
+    def __enter__(self) -> "LectorRegistro":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
@@ -1,6 +1,6 @@
 # repositorio_piezas.py
 # Catálogo oficial de piezas de Blokus + cache de orientaciones
-from typing import Dict, List, Tuple, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 Coord = Tuple[int, int]
 
@@ -53,27 +53,58 @@ def _reflect(c: Coord) -> Coord:
     return (r, -c)
 
 # ---------------- repositorio con cache ----------------
+Orientacion = Tuple[Coord, ...]
+
 class RepositorioPiezas:
+    """
+    Catálogo con ids enteros densos: la pieza i es la i-ésima de 'base' y su
+    nombre ("L5", ...) solo hace falta en la consola. Las orientaciones son
+    tuplas inmutables y además tienen un id global denso (0..total-1).
+    Un inventario es una máscara de bits: bit i encendido = pieza i disponible.
+    """
     def __init__(self, base: Dict[str, List[Coord]] = None):
         self.base = base if base is not None else PIECES_BASE
-        self._cache_orient: Dict[str, List[List[Coord]]] = {}
-
-    def ids(self) -> List[str]:
-        return list(self.base.keys())
-
-    def tam(self, pieza_id: str) -> int:
-        return len(self.base[pieza_id])
-
-    def base_coords(self, pieza_id: str) -> List[Coord]:
-        return self.base[pieza_id]
-
-    def orientaciones(self, pieza_id: str) -> List[List[Coord]]:
+        self.nombres: Tuple[str, ...] = tuple(self.base)
+        self._por_nombre: Dict[str, int] = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.n = len(self.nombres)
+        self.tamanos: Tuple[int, ...] = tuple(len(self.base[nombre]) for nombre in self.nombres)
+        # inventario inicial y sus cuadros
+        self.todas = (1 << self.n) - 1
+        self.cuadros_totales = sum(self.tamanos)
+        self._cache_orient: Dict[int, Tuple[Orientacion, ...]] = {}
+        # ids globales de orientación: orientacion_id[pieza][k]
+        self.orientacion_id: Tuple[Tuple[int, ...], ...] = ()
+        self.pieza_de_orientacion: Tuple[int, ...] = ()
+        siguiente = 0
+        for pieza_id in self.ids():
+            k = len(self.orientaciones(pieza_id))
+            self.orientacion_id += (tuple(range(siguiente, siguiente + k)),)
+            self.pieza_de_orientacion += (pieza_id,) * k
+            siguiente += k
+
+    def ids(self) -> range:
+        return range(self.n)
+
+    def id_de(self, nombre: str) -> Optional[int]:
+        """Id entero de una pieza por su nombre ("L5"), o None si no existe."""
+        return self._por_nombre.get(nombre)
+
+    def nombre(self, pieza_id: int) -> str:
+        return self.nombres[pieza_id]
+
+    def tam(self, pieza_id: int) -> int:
+        return self.tamanos[pieza_id]
+
+    def base_coords(self, pieza_id: int) -> List[Coord]:
+        return self.base[self.nombres[pieza_id]]
+
+    def orientaciones(self, pieza_id: int) -> Tuple[Orientacion, ...]:
         """Devuelve todas las orientaciones únicas (rotaciones + reflejos). Usa cache."""
         if pieza_id in self._cache_orient:
             return self._cache_orient[pieza_id]
 
-        base = self.base[pieza_id]
-        variantes: Set[Tuple[Coord, ...]] = set()
+        base = self.base_coords(pieza_id)
+        variantes: Set[Orientacion] = set()
 
         shapes = [base, [_reflect(c) for c in base]]
         for shape in shapes:
@@ -82,9 +113,23 @@ class RepositorioPiezas:
                 variantes.add(tuple(_normalize(cur)))
                 cur = [_rot90(c) for c in cur]
 
-        orient = [list(v) for v in sorted(list(variantes))]
+        orient = tuple(sorted(variantes))
         self._cache_orient[pieza_id] = orient
         return orient
 
+    # ---------- inventarios como máscara ----------
+    def lista(self, inventario: int) -> List[int]:
+        """Ids de las piezas encendidas en el inventario, de menor a mayor."""
+        piezas = []
+        while inventario:
+            bajo = inventario & -inventario
+            piezas.append(bajo.bit_length() - 1)
+            inventario ^= bajo
+        return piezas
+
+    def cuadros(self, inventario: int) -> int:
+        """Cuadros que suman las piezas del inventario."""
+        return sum(self.tamanos[p] for p in self.lista(inventario))
+
 # Instancia global cómoda
 PIEZAS = RepositorioPiezas()
@@ -0,0 +1,470 @@
+# servidor.py
+# Servidor asyncio con muchas partidas a la vez (bots y humanos) en un proceso.
+#
+# Las partidas corren sobre Motor (las reglas de Mesa), sin la consola de
+# Juego. Las jugadas de los bots se calculan en un ejecutor (hilos o
+# procesos), así una búsqueda lenta no frena al resto de las partidas. El
+# ejecutor recibe la foto de mcts_paralelo (jugadas desde el inicio) y cada
+# hilo/proceso conserva un Motor por estrategia al que solo le aplica las
+# jugadas nuevas: los agentes que reutilizan su árbol entre turnos lo siguen
+# haciendo. Con hilos el GIL se reparte entre los bots y el bucle; con
+# --procesos el bucle queda libre.
+#
+# Protocolo: un objeto JSON por línea, por TCP o socket Unix. Los pedidos
+# llevan "op" (y opcionalmente "id", que se repite en la respuesta); cada
+# respuesta trae "ok" y, si falló, "error". Las jugadas van como
+# [nombre de pieza, orientación, [fila, columna]] y pasar es null.
+#   {"op": "crear", "jugadores": 4, "bots": {"1": "mcts:max_playouts=200", "2": "codicioso", "3": "busqueda"}}
+#       -> {"ok": true, "partida": 7, "humanos": [0]}   (los asientos sin bot son de esta conexión)
+#   {"op": "jugar", "partida": 7, "jugada": ["L4", 2, [0, 0]]}
+#   {"op": "estado", "partida": 7}
+#   {"op": "observar", "partida": 7}
+#   {"op": "estadisticas"}
+# Eventos del servidor (a quien creó u observa la partida):
+#   {"evento": "turno", "partida": 7, "asiento": 0}          (le toca a un humano)
+#   {"evento": "jugada", "partida": 7, "asiento": 1, "jugada": [...], "ms": 12.5}
+#   {"evento": "fin", "partida": 7, "puntajes": [...]}
+#
+#   python servidor.py --puerto 8765                 # TCP en 127.0.0.1
+#   python servidor.py --unix /tmp/blokus.sock --procesos 4
+#   python servidor.py --carga 32 --estrategias codicioso mcts:max_playouts=50 --jugadores 4
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from agentes import crear_agente, parsear_estrategia
+from colocaciones import obtener_indice
+from mcts_paralelo import Foto, foto_de
+from mesa import Jugada
+from motor import Motor
+from repositorio_piezas import PIEZAS
+
+# cuántas latencias (y partidas terminadas) se conservan para las estadísticas
+MAX_HISTORIAL = 10_000
+MAX_TERMINADAS = 1_000
+
+# ---------------- lado del ejecutor ----------------
+_LOCAL = threading.local()
+
+def _sincronizar(juego: Optional[Motor], foto: Foto) -> Motor:
+    """Lleva el motor a la posición de la foto aplicando solo lo que falte (o arma uno nuevo)."""
+    filas, columnas, num_jugadores, jugadas = foto
+    if (juego is None or (juego.mesa.filas, juego.mesa.columnas, len(juego.jugadores)) != foto[:3]
+            or len(juego.historial) > len(jugadas)
+            or any(juego.historial[i][0] != jugadas[i] for i in range(len(juego.historial)))):
+        juego = Motor(filas, columnas, num_jugadores)
+    for jugada in jugadas[len(juego.historial):]:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+    return juego
+
+def _pensar(especificacion: str, foto: Foto) -> Tuple[Optional[Jugada], float]:
+    """Jugada del bot para la posición de la foto y segundos de cálculo (corre en el ejecutor)."""
+    inicio = time.perf_counter()
+    # un (motor, agente) por estrategia y por hilo/proceso del ejecutor: nunca se comparten
+    propios = _LOCAL.__dict__.setdefault("agentes", {})
+    juego, agente = propios.get(especificacion, (None, None))
+    if agente is None:
+        agente = crear_agente(especificacion)
+    juego = _sincronizar(juego, foto)
+    propios[especificacion] = (juego, agente)
+    jugada = agente.elegir_jugada(juego)
+    return jugada, time.perf_counter() - inicio
+
+# ---------------- utilidades ----------------
+def jugada_a_json(jugada: Optional[Jugada]) -> Optional[list]:
+    if jugada is None:
+        return None
+    pieza_id, orient, (r, c) = jugada
+    return [PIEZAS.nombre(pieza_id), orient, [r, c]]
+
+def jugada_de_json(dato: Any) -> Optional[Jugada]:
+    """["L5", orient, [r, c]] (o el id entero de la pieza) -> Jugada; ValueError si no tiene sentido."""
+    if dato is None:
+        return None
+    try:
+        pieza, orient, (r, c) = dato
+    except (TypeError, ValueError):
+        raise ValueError(f"Jugada mal formada: {dato!r}")
+    pieza_id = PIEZAS.id_de(pieza.upper()) if isinstance(pieza, str) else pieza
+    # bool es subclase de int: true/false no son números de pieza ni coordenadas
+    if not all(isinstance(x, int) and not isinstance(x, bool) for x in (pieza_id, orient, r, c)):
+        raise ValueError(f"Jugada mal formada: {dato!r}")
+    if not 0 <= pieza_id < PIEZAS.n:
+        raise ValueError(f"Pieza desconocida: {pieza!r}")
+    if not 0 <= orient < len(PIEZAS.orientaciones(pieza_id)):
+        raise ValueError(f"Orientación inválida para {PIEZAS.nombre(pieza_id)}: {orient}")
+    return pieza_id, orient, (r, c)
+
+def percentiles(valores: Any) -> Dict[str, float]:
+    """n, p50, p90, p99 y máximo (rango más cercano, como instrumentacion.py)."""
+    ordenados = sorted(valores)
+
+    def percentil(p: float) -> float:
+        return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] if ordenados else 0.0
+
+    return {"n": len(ordenados), "p50": percentil(0.50), "p90": percentil(0.90),
+            "p99": percentil(0.99), "max": ordenados[-1] if ordenados else 0.0}
+
+class _Conexion:
+    def __init__(self, escritor: asyncio.StreamWriter):
+        self.escritor = escritor
+        self.abierta = True
+
+    async def enviar(self, mensaje: Dict[str, Any]) -> None:
+        if not self.abierta:
+            return
+        try:
+            self.escritor.write(json.dumps(mensaje, separators=(",", ":")).encode() + b"\n")
+            await self.escritor.drain()
+        except (ConnectionError, RuntimeError):
+            self.abierta = False
+
+class Partida:
+    def __init__(self, id_: int, motor: Motor, bots: Dict[int, str], duenio: Optional[_Conexion]):
+        self.id = id_
+        self.motor = motor
+        self.bots = bots
+        self.duenio = duenio                    # juega los asientos sin bot
+        self.observadores: Set[_Conexion] = set() if duenio is None else {duenio}
+        self.latencias: List[float] = []        # ms por jugada de bot (cola del ejecutor incluida)
+        self.calculo: List[float] = []          # ms de cálculo dentro del ejecutor
+        self.espera: Optional[asyncio.Future] = None  # jugada humana pendiente
+        self.tarea: Optional[asyncio.Task] = None
+        self.inicio = time.perf_counter()
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            "jugadores": len(self.motor.jugadores),
+            "bots": {str(a): e for a, e in self.bots.items()},
+            "acciones": len(self.motor.historial),
+            "terminada": self.motor.terminado(),
+            "segundos": time.perf_counter() - self.inicio,
+            "latencia_ms": percentiles(self.latencias),
+            "calculo_ms": percentiles(self.calculo),
+        }
+
+# ---------------- servidor ----------------
+class ServidorJuegos:
+    """
+    Con procesos > 0 los bots piensan en un ProcessPoolExecutor (paralelismo
+    real); si no, en un ThreadPoolExecutor de 'hilos' hilos.
+    """
+    def __init__(self, procesos: int = 0, hilos: Optional[int] = None):
+        self.procesos = procesos
+        self._ejecutor: Executor = (ProcessPoolExecutor(procesos) if procesos > 0
+                                    else ThreadPoolExecutor(hilos or min(32, (os.cpu_count() or 1) + 4)))
+        self.partidas: Dict[int, Partida] = {}
+        self.terminadas: "collections.OrderedDict[int, Dict[str, Any]]" = collections.OrderedDict()
+        self._siguiente_id = 0
+        self.pico_activas = 0
+        self.jugadas_bot = 0
+        self._latencias: Deque[float] = collections.deque(maxlen=MAX_HISTORIAL)
+        self._retrasos: Deque[float] = collections.deque(maxlen=MAX_HISTORIAL)
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._vigia: Optional[asyncio.Task] = None
+        self._conexiones: Dict[asyncio.Task, _Conexion] = {}
+        self._inicio = time.perf_counter()
+        # armar el índice de colocaciones ahora y no dentro del bucle con la primera partida
+        obtener_indice(20, 20)
+
+    # ---------- arranque / cierre ----------
+    async def iniciar(self, host: str = "127.0.0.1", puerto: int = 8765, unix: Optional[str] = None) -> None:
+        if unix is not None:
+            self._servidor = await asyncio.start_unix_server(self._atender, path=unix)
+        else:
+            self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        self._vigia = asyncio.create_task(self._vigilar_bucle())
+
+    @property
+    def direccion(self) -> Any:
+        return self._servidor.sockets[0].getsockname() if self._servidor else None
+
+    async def cerrar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        tareas = [p.tarea for p in self.partidas.values() if p.tarea is not None]
+        for tarea in tareas + ([self._vigia] if self._vigia else []):
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        # cerrar el socket hace que cada _atender lea fin de archivo y termine solo
+        for conexion in self._conexiones.values():
+            conexion.escritor.close()
+        await asyncio.gather(*self._conexiones, return_exceptions=True)
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    async def _vigilar_bucle(self, periodo: float = 0.05) -> None:
+        """Retraso del bucle de eventos: si algo lo bloquea, las esperas se alargan."""
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(periodo)
+            self._retrasos.append((time.perf_counter() - inicio - periodo) * 1000)
+
+    # ---------- estadísticas ----------
+    def estadisticas(self) -> Dict[str, Any]:
+        segundos = time.perf_counter() - self._inicio
+        return {
+            "activas": len(self.partidas),
+            "pico_activas": self.pico_activas,
+            "terminadas": len(self.terminadas),
+            "jugadas_bot": self.jugadas_bot,
+            "jugadas_bot_por_segundo": self.jugadas_bot / segundos if segundos > 0 else 0.0,
+            "latencia_ms": percentiles(self._latencias),
+            "retraso_bucle_ms": percentiles(self._retrasos),
+            "ejecutor": f"procesos={self.procesos}" if self.procesos > 0 else "hilos",
+            "partidas": {str(i): p.resumen() for i, p in self.partidas.items()},
+        }
+
+    # ---------- partidas ----------
+    def crear_partida(self, jugadores: int, bots: Dict[int, str], duenio: Optional[_Conexion] = None) -> Partida:
+        if not 2 <= jugadores <= 4:
+            raise ValueError(f"Número de jugadores no soportado: {jugadores}")
+        for asiento, especificacion in bots.items():
+            if not 0 <= asiento < jugadores:
+                raise ValueError(f"Asiento fuera de rango: {asiento}")
+            parsear_estrategia(especificacion)  # falla ya si la estrategia no existe
+        if duenio is None and len(bots) < jugadores:
+            raise ValueError("Sin conexión, todos los asientos tienen que ser bots.")
+        partida = Partida(self._siguiente_id, Motor(num_jugadores=jugadores), dict(bots), duenio)
+        self._siguiente_id += 1
+        self.partidas[partida.id] = partida
+        self.pico_activas = max(self.pico_activas, len(self.partidas))
+        partida.tarea = asyncio.create_task(self._correr(partida))
+        return partida
+
+    async def _emitir(self, partida: Partida, mensaje: Dict[str, Any]) -> None:
+        mensaje = {"partida": partida.id, **mensaje}
+        for conexion in list(partida.observadores):
+            await conexion.enviar(mensaje)
+
+    async def _correr(self, partida: Partida) -> None:
+        motor = partida.motor
+        bucle = asyncio.get_running_loop()
+        try:
+            while not motor.terminado():
+                asiento = motor.turno_idx
+                ms = None
+                if not motor.quedan_jugadas_posibles():
+                    jugada = None
+                elif asiento in partida.bots:
+                    inicio = time.perf_counter()
+                    jugada, calculo = await bucle.run_in_executor(
+                        self._ejecutor, _pensar, partida.bots[asiento], foto_de(motor))
+                    ms = (time.perf_counter() - inicio) * 1000
+                    if jugada is not None:
+                        jugada = (jugada[0], jugada[1], tuple(jugada[2]))
+                        ok, motivo = motor.validar(jugada)
+                        if not ok:
+                            raise RuntimeError(f"El bot {partida.bots[asiento]} propuso una jugada ilegal: {motivo}")
+                    partida.latencias.append(ms)
+                    partida.calculo.append(calculo * 1000)
+                    self._latencias.append(ms)
+                    self.jugadas_bot += 1
+                else:
+                    partida.espera = bucle.create_future()
+                    if partida.duenio is not None:
+                        await partida.duenio.enviar({"evento": "turno", "partida": partida.id, "asiento": asiento})
+                    jugada = await partida.espera
+                    partida.espera = None
+                if jugada is None:
+                    motor.pasar()
+                else:
+                    motor.jugar(jugada)
+                await self._emitir(partida, {"evento": "jugada", "asiento": asiento,
+                                             "jugada": jugada_a_json(jugada), "ms": ms})
+            await self._emitir(partida, {"evento": "fin", "puntajes": motor.puntajes()})
+        except asyncio.CancelledError:
+            await self._emitir(partida, {"evento": "fin", "puntajes": motor.puntajes(), "cancelada": True})
+        except Exception as error:
+            await self._emitir(partida, {"evento": "fin", "puntajes": motor.puntajes(), "error": str(error)})
+        finally:
+            del self.partidas[partida.id]
+            self.terminadas[partida.id] = partida.resumen()
+            while len(self.terminadas) > MAX_TERMINADAS:
+                self.terminadas.popitem(last=False)
+
+    def _partida(self, pedido: Dict[str, Any]) -> Partida:
+        partida = self.partidas.get(pedido.get("partida"))
+        if partida is None:
+            raise ValueError(f"No hay una partida en curso con id {pedido.get('partida')!r}.")
+        return partida
+
+    def estado(self, partida: Partida) -> Dict[str, Any]:
+        motor = partida.motor
+        return {
+            "turno": motor.turno_idx,
+            "terminada": motor.terminado(),
+            "puntajes": motor.puntajes(),
+            "tablero": ["".join(fila) for fila in motor.mesa.grid],
+            "piezas": [[PIEZAS.nombre(p) for p in PIEZAS.lista(j.piezas_disponibles)] for j in motor.jugadores],
+            "acciones": len(motor.historial),
+        }
+
+    # ---------- conexiones ----------
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        conexion = _Conexion(escritor)
+        tarea = asyncio.current_task()
+        self._conexiones[tarea] = conexion
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                if not linea.strip():
+                    continue
+                respuesta: Dict[str, Any]
+                pedido: Dict[str, Any] = {}
+                try:
+                    pedido = json.loads(linea)
+                    if not isinstance(pedido, dict):
+                        raise ValueError("Cada línea tiene que ser un objeto JSON.")
+                    respuesta = {"ok": True, **self._despachar(pedido, conexion)}
+                except (ValueError, TypeError, KeyError) as error:
+                    respuesta = {"ok": False, "error": str(error)}
+                except Exception as error:
+                    # un pedido que falla por otra cosa no termina la sesión
+                    # (ni cancela las partidas de esta conexión)
+                    respuesta = {"ok": False, "error": f"Error interno: {error!r}"}
+                if "id" in pedido:
+                    respuesta["id"] = pedido["id"]
+                await conexion.enviar(respuesta)
+        except ConnectionError:
+            pass
+        finally:
+            del self._conexiones[tarea]
+            conexion.abierta = False
+            for partida in list(self.partidas.values()):
+                partida.observadores.discard(conexion)
+                # sin quien juegue sus asientos humanos la partida no puede seguir
+                if partida.duenio is conexion and partida.tarea is not None:
+                    partida.tarea.cancel()
+            escritor.close()
+
+    def _despachar(self, pedido: Dict[str, Any], conexion: _Conexion) -> Dict[str, Any]:
+        op = pedido.get("op")
+        if op == "crear":
+            jugadores = int(pedido.get("jugadores", 2))
+            bots = pedido.get("bots") or {}
+            if not isinstance(bots, dict):
+                raise ValueError("'bots' tiene que ser un objeto {asiento: estrategia}.")
+            bots = {int(a): str(e) for a, e in bots.items()}
+            partida = self.crear_partida(jugadores, bots, conexion)
+            return {"partida": partida.id, "humanos": [a for a in range(jugadores) if a not in bots]}
+        if op == "jugar":
+            partida = self._partida(pedido)
+            if partida.duenio is not conexion:
+                raise ValueError("Esta conexión no juega en esa partida.")
+            if partida.espera is None or partida.espera.done():
+                raise ValueError("No es el turno de un jugador humano.")
+            jugada = jugada_de_json(pedido.get("jugada"))
+            if jugada is not None:
+                ok, motivo = partida.motor.validar(jugada)
+                if not ok:
+                    raise ValueError(motivo)
+            partida.espera.set_result(jugada)
+            return {}
+        if op == "estado":
+            return self.estado(self._partida(pedido))
+        if op == "observar":
+            self._partida(pedido).observadores.add(conexion)
+            return {}
+        if op == "estadisticas":
+            return self.estadisticas()
+        raise ValueError(f"Operación desconocida: {op!r}")
+
+# ---------------- prueba de carga ----------------
+async def _cliente_bots(direccion: Any, unix: Optional[str], jugadores: int, estrategias: List[str],
+                        desfase: int) -> Dict[str, Any]:
+    """Un cliente que crea una partida solo de bots y espera a que termine."""
+    if unix is not None:
+        lector, escritor = await asyncio.open_unix_connection(unix)
+    else:
+        lector, escritor = await asyncio.open_connection(*direccion[:2])
+    bots = {str(a): estrategias[(a + desfase) % len(estrategias)] for a in range(jugadores)}
+    escritor.write(json.dumps({"op": "crear", "jugadores": jugadores, "bots": bots}).encode() + b"\n")
+    try:
+        while True:
+            mensaje = json.loads(await lector.readline())
+            if mensaje.get("ok") is False:
+                raise RuntimeError(mensaje["error"])
+            if mensaje.get("evento") == "fin":
+                return mensaje
+    finally:
+        escritor.close()
+
+async def carga(partidas: int, estrategias: List[str], jugadores: int = 4, procesos: int = 0,
+                unix: Optional[str] = None) -> Dict[str, Any]:
+    """Levanta un servidor, juega 'partidas' partidas de bots a la vez por la red y devuelve las estadísticas."""
+    servidor = ServidorJuegos(procesos)
+    await servidor.iniciar(puerto=0, unix=unix)
+    inicio = time.perf_counter()
+    try:
+        finales = await asyncio.gather(*(_cliente_bots(servidor.direccion, unix, jugadores, estrategias, k)
+                                         for k in range(partidas)))
+        estadisticas = servidor.estadisticas()
+    finally:
+        await servidor.cerrar()
+    estadisticas["segundos"] = time.perf_counter() - inicio
+    estadisticas["errores"] = [f["error"] for f in finales if "error" in f]
+    estadisticas["partidas"] = {str(i): r for i, r in servidor.terminadas.items()}
+    return estadisticas
+
+def _imprimir_carga(estadisticas: Dict[str, Any]) -> None:
+    lat = estadisticas["latencia_ms"]
+    retraso = estadisticas["retraso_bucle_ms"]
+    print(f"{len(estadisticas['partidas'])} partidas en {estadisticas['segundos']:.1f}s, "
+          f"pico de {estadisticas['pico_activas']} partidas a la vez ({estadisticas['ejecutor']})")
+    print(f"jugadas de bot: {estadisticas['jugadas_bot']} "
+          f"({estadisticas['jugadas_bot'] / estadisticas['segundos']:.0f}/s)")
+    print(f"latencia por jugada (ms): p50 {lat['p50']:.1f}  p90 {lat['p90']:.1f}  "
+          f"p99 {lat['p99']:.1f}  max {lat['max']:.1f}")
+    print(f"retraso del bucle (ms):   p50 {retraso['p50']:.1f}  p99 {retraso['p99']:.1f}  max {retraso['max']:.1f}")
+    peores = sorted(estadisticas["partidas"].items(), key=lambda e: -e[1]["latencia_ms"]["p99"])[:5]
+    for i, r in peores:
+        print(f"  partida {i}: {r['acciones']} acciones, p50 {r['latencia_ms']['p50']:.1f} ms, "
+              f"p99 {r['latencia_ms']['p99']:.1f} ms")
+    for error in estadisticas["errores"]:
+        print(f"  error: {error}")
+
+async def _servir(args: argparse.Namespace) -> None:
+    servidor = ServidorJuegos(args.procesos, args.hilos)
+    await servidor.iniciar(args.host, args.puerto, args.unix)
+    print(f"Escuchando en {args.unix or servidor.direccion}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.cerrar()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor de partidas de Blokus (JSON por líneas).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="ruta de un socket Unix (en vez de TCP)")
+    parser.add_argument("--procesos", type=int, default=0, help="bots en N procesos (0 = hilos)")
+    parser.add_argument("--hilos", type=int, default=None, help="hilos del ejecutor si no hay procesos")
+    parser.add_argument("--carga", type=int, default=None, metavar="N",
+                        help="prueba de carga: N partidas de bots a la vez y sale")
+    parser.add_argument("--estrategias", nargs="+", default=["codicioso"], help="para --carga")
+    parser.add_argument("--jugadores", type=int, default=4, help="para --carga")
+    args = parser.parse_args(argv)
+
+    if args.carga is not None:
+        _imprimir_carga(asyncio.run(carga(args.carga, args.estrategias, args.jugadores, args.procesos, args.unix)))
+        return 0
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
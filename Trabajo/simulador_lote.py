@@ -0,0 +1,279 @@
+# simulador_lote.py
+# Simulador de partidas al azar que avanza K tableros a la vez (NumPy).
+#
+# Cada tablero es un arreglo bool por celda, y los K tableros se apilan:
+# prohibidas y anclas (K, jugadores, celdas + 1), inventarios como máscara
+# (K, jugadores). La celda extra es ficticia y siempre vale False: sirve de
+# relleno para las colocaciones de menos de 5 celdas. En cada paso todos los
+# tableros activos mueven a la vez:
+#   1. para cada tablero se sortean 'muestras' candidatos (ancla al azar del
+#      jugador y colocación al azar que la cubre) y se comprueban todos juntos;
+#   2. si ninguno es legal, ese tablero prueba todos sus candidatos;
+#   3. si tampoco hay, el jugador pasa y queda fuera: su tablero solo puede
+#      empeorar mientras él no juegue, así que no se vuelve a comprobar.
+# Las reglas, los pases y el final (todos pasan seguidos) son los de Motor;
+# el reparto de las jugadas al azar no es exactamente el de Mesa.jugada_aleatoria.
+# Cuando un tablero termina se rellena con la siguiente partida de la cola.
+#
+# Uso:
+#   python simulador_lote.py [partidas] [jugadores]   # tabla por tamaño de lote
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from colocaciones import IndiceColocaciones, obtener_indice
+from repositorio_piezas import PIEZAS
+
+_ESQUINAS = ("A", "B", "C", "D")
+
+def _rellenar(listas: List[List[int]], relleno: int) -> np.ndarray:
+    """Listas de celdas de largo variable -> matriz rellenada con 'relleno'."""
+    ancho = max(len(l) for l in listas)
+    matriz = np.full((len(listas), ancho), relleno, dtype=np.int64)
+    for i, l in enumerate(listas):
+        matriz[i, :len(l)] = l
+    return matriz
+
+def _celdas(mascara: int) -> List[int]:
+    celdas = []
+    while mascara:
+        bajo = mascara & -mascara
+        celdas.append(bajo.bit_length() - 1)
+        mascara ^= bajo
+    return celdas
+
+class TablasSimulador:
+    """Colocaciones del índice como matrices de celdas + listas por (celda, pieza) (CSR)."""
+    def __init__(self, indice: IndiceColocaciones):
+        self.n = n = indice.filas * indice.columnas
+        self.celdas = _rellenar([_celdas(m) for m in indice.mascara], n)
+        self.lado = _rellenar([_celdas(m) for m in indice.lado], n)
+        self.esquina = _rellenar([_celdas(m) for m in indice.esquina], n)
+        self.pieza = np.array(indice.pieza, dtype=np.int64)
+        self.tam = np.array(PIEZAS.tamanos, dtype=np.int64)
+        # cubren[ptr[i*P + p]:ptr[i*P + p + 1]] = colocaciones de la pieza p que cubren la celda i
+        self.num_piezas = PIEZAS.n
+        listas = [indice.por_celda[i][p] for i in range(n) for p in PIEZAS.ids()]
+        self.ptr = np.zeros(len(listas) + 1, dtype=np.int64)
+        self.ptr[1:] = np.cumsum([len(l) for l in listas])
+        self.cubren = np.array([idx for l in listas for idx in l], dtype=np.int64)
+        esquinas = {"A": (0, 0), "B": (0, indice.columnas - 1),
+                    "C": (indice.filas - 1, indice.columnas - 1), "D": (indice.filas - 1, 0)}
+        self.esquina_inicial = np.array([r * indice.columnas + c for r, c in (esquinas[s] for s in _ESQUINAS)])
+
+class SimuladorLote:
+    """
+    'lote' tableros de 'num_jugadores' que avanzan a la vez. Con registrar=True
+    cada resultado incluye sus jugadas (None = pasar) para reproducirlas en Motor.
+    """
+    def __init__(
+        self,
+        num_jugadores: int = 4,
+        lote: int = 128,
+        filas: int = 20,
+        columnas: int = 20,
+        muestras: int = 64,
+        semilla: Optional[int] = None,
+        registrar: bool = False,
+    ):
+        if not 2 <= num_jugadores <= 4:
+            raise ValueError("El juego soporta entre 2 y 4 jugadores.")
+        self.num_jugadores = num_jugadores
+        self.lote = lote
+        self.muestras = muestras
+        self.registrar = registrar
+        self.indice = obtener_indice(filas, columnas)
+        self.tablas = TablasSimulador(self.indice)
+        self.rng = np.random.default_rng(semilla)
+
+        k, j, n = lote, num_jugadores, self.tablas.n
+        self.prohibidas = np.zeros((k, j, n + 1), dtype=bool)
+        self.anclas = np.zeros((k, j, n + 1), dtype=bool)
+        self.inventario = np.zeros((k, j), dtype=np.int64)
+        self.cuadros = np.zeros((k, j), dtype=np.int64)
+        self.fuera = np.zeros((k, j), dtype=bool)
+        self.turno = np.zeros(k, dtype=np.int64)
+        self.pases = np.zeros(k, dtype=np.int64)
+        self.acciones = np.zeros(k, dtype=np.int64)
+        self.partida = np.full(k, -1, dtype=np.int64)   # -1 = tablero libre
+        self.jugadas: List[List[int]] = [[] for _ in range(k)]
+
+    # ---------- tableros ----------
+    def _reiniciar(self, k: int, partida: int) -> None:
+        self.prohibidas[k] = False
+        self.anclas[k] = False
+        self.anclas[k, np.arange(self.num_jugadores), self.tablas.esquina_inicial[:self.num_jugadores]] = True
+        self.inventario[k] = PIEZAS.todas
+        self.cuadros[k] = PIEZAS.cuadros_totales
+        self.fuera[k] = False
+        self.turno[k] = 0
+        self.pases[k] = 0
+        self.acciones[k] = 0
+        self.partida[k] = partida
+        self.jugadas[k] = []
+
+    def _elegir(self, ks: np.ndarray) -> np.ndarray:
+        """Colocación al azar para el jugador actual de cada tablero 'ks' (-1 = no tiene)."""
+        t = self.tablas
+        jug = self.turno[ks]
+        prohibidas = self.prohibidas[ks, jug].ravel()   # fila f, celda c -> f*(n+1) + c
+        ancho = t.n + 1
+        elegidas = np.full(len(ks), -1, dtype=np.int64)
+
+        # celdas ancla de cada tablero, en una lista plana ordenada por fila
+        filas, celdas = np.nonzero(self.anclas[ks, jug])
+        cuantas = np.bincount(filas, minlength=len(ks))
+        piezas = (self.inventario[ks, jug][:, None] >> np.arange(t.num_piezas)) & 1 == 1
+        n_piezas = piezas.sum(axis=1)
+        vivas = np.flatnonzero((cuantas > 0) & (n_piezas > 0))
+        if not len(vivas):
+            return elegidas
+        inicio = np.concatenate(([0], np.cumsum(cuantas)[:-1]))
+
+        # 1) muestreo: ancla al azar, pieza al azar del inventario y una de sus
+        #    colocaciones que cubra el ancla
+        azar = self.rng.random((len(vivas), self.muestras, 3))
+        celda = celdas[inicio[vivas, None] + (azar[..., 0] * cuantas[vivas, None]).astype(np.int64)]
+        k_esima = (azar[..., 1] * n_piezas[vivas, None]).astype(np.int64)
+        pieza = (np.cumsum(piezas[vivas], axis=1)[:, None, :] > k_esima[..., None]).argmax(axis=2)
+        clave = celda * t.num_piezas + pieza
+        base, largo = t.ptr[clave], t.ptr[clave + 1] - t.ptr[clave]
+        cand = t.cubren[np.minimum(base + (azar[..., 2] * largo).astype(np.int64), len(t.cubren) - 1)]
+        legal = (largo > 0) & ~prohibidas[(vivas * ancho)[:, None, None] + t.celdas[cand]].any(axis=2)
+        acierto = legal.any(axis=1)
+        elegidas[vivas[acierto]] = cand[acierto, legal[acierto].argmax(axis=1)]
+
+        # 2) sin acierto: todos los candidatos (ancla × pieza disponible) de esos tableros
+        fallan = vivas[~acierto]
+        if len(fallan):
+            entradas = np.flatnonzero(np.isin(filas, fallan))
+            e, pieza = np.nonzero(piezas[filas[entradas]])
+            fila = filas[entradas][e]
+            clave = celdas[entradas][e] * t.num_piezas + pieza
+            base, largo = t.ptr[clave], t.ptr[clave + 1] - t.ptr[clave]
+            total = int(largo.sum())
+            if total:
+                grupo = np.repeat(np.arange(len(clave)), largo)
+                desplazamiento = np.arange(total) - np.repeat(np.cumsum(largo) - largo, largo)
+                cand = t.cubren[base[grupo] + desplazamiento]
+                fila = fila[grupo]
+                legal = ~prohibidas[(fila * ancho)[:, None] + t.celdas[cand]].any(axis=1)
+                # prioridad al azar; por fila gana la legal de mayor prioridad
+                prioridad = np.where(legal, self.rng.random(total), -1.0)
+                orden = np.lexsort((-prioridad, fila))
+                primera = orden[np.flatnonzero(np.r_[True, fila[orden][1:] != fila[orden][:-1]])]
+                primera = primera[prioridad[primera] >= 0]
+                elegidas[fila[primera]] = cand[primera]
+        return elegidas
+
+    def _aplicar(self, ks: np.ndarray, idx: np.ndarray) -> None:
+        t = self.tablas
+        jug = self.turno[ks]
+        celdas = t.celdas[idx]
+        self.prohibidas[ks[:, None, None], np.arange(self.num_jugadores)[:, None], celdas[:, None, :]] = True
+        self.anclas[ks[:, None, None], np.arange(self.num_jugadores)[:, None], celdas[:, None, :]] = False
+        self.prohibidas[ks[:, None], jug[:, None], t.lado[idx]] = True
+        self.anclas[ks[:, None], jug[:, None], t.esquina[idx]] = True
+        # la celda ficticia (relleno) vuelve a False
+        self.prohibidas[ks, :, t.n] = False
+        self.anclas[ks, :, t.n] = False
+        self.anclas[ks, jug] &= ~self.prohibidas[ks, jug]
+        pieza = t.pieza[idx]
+        self.inventario[ks, jug] &= ~(1 << pieza)
+        self.cuadros[ks, jug] -= t.tam[pieza]
+        self.pases[ks] = 0
+
+    def paso(self) -> int:
+        """Una acción (jugada o pase) en cada tablero activo. Devuelve cuántas jugadas hubo."""
+        activos = np.flatnonzero(self.partida >= 0)
+        jug = self.turno[activos]
+        pueden = activos[~self.fuera[activos, jug]]
+        elegidas = self._elegir(pueden) if len(pueden) else np.zeros(0, dtype=np.int64)
+        juegan = elegidas >= 0
+        if juegan.any():
+            self._aplicar(pueden[juegan], elegidas[juegan])
+        # sin jugada ahora = sin jugada nunca más (su tablero solo empeora)
+        sin = pueden[~juegan]
+        self.fuera[sin, self.turno[sin]] = True
+        pasan = np.setdiff1d(activos, pueden[juegan], assume_unique=True)
+        self.pases[pasan] += 1
+        if self.registrar:
+            for k, idx in zip(pueden[juegan], elegidas[juegan]):
+                self.jugadas[k].append(int(idx))
+            for k in pasan:
+                self.jugadas[k].append(-1)
+        self.acciones[activos] += 1
+        self.turno[activos] = (self.turno[activos] + 1) % self.num_jugadores
+        return int(juegan.sum())
+
+    # ---------- partidas ----------
+    def _resultado(self, k: int) -> Dict[str, Any]:
+        resultado = {
+            "partida": int(self.partida[k]),
+            "puntajes": [-int(c) for c in self.cuadros[k]],
+            "acciones": int(self.acciones[k]),
+        }
+        if self.registrar:
+            resultado["jugadas"] = [self.indice.clave(i) if i >= 0 else None for i in self.jugadas[k]]
+        return resultado
+
+    def correr(self, partidas: int) -> Dict[str, Any]:
+        """
+        Juega 'partidas' partidas completas. Devuelve los resultados (en orden
+        de partida) junto con tableros/s y jugadas/s.
+        """
+        cola = iter(range(partidas))
+        self.partida[:] = -1
+        for k in range(self.lote):
+            g = next(cola, None)
+            if g is None:
+                break
+            self._reiniciar(k, g)
+
+        resultados: List[Dict[str, Any]] = []
+        acciones = jugadas = pasos = 0
+        inicio = time.perf_counter()
+        while (self.partida >= 0).any():
+            acciones += int((self.partida >= 0).sum())
+            jugadas += self.paso()
+            pasos += 1
+            for k in np.flatnonzero((self.partida >= 0) & (self.pases >= self.num_jugadores)):
+                resultados.append(self._resultado(k))
+                g = next(cola, None)
+                if g is None:
+                    self.partida[k] = -1
+                else:
+                    self._reiniciar(k, g)
+        segundos = time.perf_counter() - inicio
+
+        resultados.sort(key=lambda r: r["partida"])
+        return {
+            "resultados": resultados,
+            "segundos": segundos,
+            "pasos": pasos,
+            "tableros_por_segundo": partidas / segundos if segundos > 0 else 0.0,
+            "acciones_por_segundo": acciones / segundos if segundos > 0 else 0.0,
+            "jugadas_por_segundo": jugadas / segundos if segundos > 0 else 0.0,
+        }
+
+def medir_lotes(
+    lotes: Tuple[int, ...] = (1, 8, 32, 128, 512),
+    partidas: int = 256,
+    num_jugadores: int = 4,
+) -> List[Tuple[int, float, float]]:
+    """[(lote, tableros/s, acciones/s), ...] para elegir el tamaño de lote en esta máquina."""
+    curva = []
+    for lote in lotes:
+        sim = SimuladorLote(num_jugadores, lote=lote, semilla=0)
+        sim.correr(min(lote, partidas))  # calentamiento
+        r = sim.correr(partidas)
+        curva.append((lote, r["tableros_por_segundo"], r["acciones_por_segundo"]))
+    return curva
+
+if __name__ == "__main__":
+    partidas = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    jugadores = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{partidas} partidas de {jugadores} jugadores")
+    print("    lote  tableros/s   acciones/s")
+    for lote, tps, aps in medir_lotes(partidas=partidas, num_jugadores=jugadores):
+        print(f"{lote:8d}  {tps:10.1f}  {aps:11.0f}")
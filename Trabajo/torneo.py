@@ -0,0 +1,261 @@
+# torneo.py
+# Torneos de auto-juego entre estrategias, en paralelo y reanudables.
+#
+# Uso:
+#   python torneo.py --estrategias aleatorio mcts:max_playouts=100 \
+#       --jugadores 4 --partidas 1000 --salida torneo.jsonl
+#
+# Cada partida terminada se agrega como una línea JSON al archivo de salida
+# (la primera línea guarda la configuración). Si se vuelve a lanzar con la
+# misma configuración y el mismo archivo, solo se juegan las partidas que faltan.
+#
+# --instrumentar agrega a cada línea los contadores de instrumentacion.py y al
+# resumen su suma; --perfil RUTA juega todo en este proceso bajo el perfilador
+# por muestreo y guarda las pilas colapsadas en RUTA.
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from agentes import crear_agente, parsear_estrategia
+from instrumentacion import INSTR, PerfiladorMuestreo, sumar_fotos
+from motor import Motor
+from registro import EscritorRegistro, LectorRegistro
+
+def asientos(estrategias: List[str], num_jugadores: int, partida: int) -> List[str]:
+    """Rotación de asientos: en la partida g el asiento i juega estrategias[(i + g) % k]."""
+    k = len(estrategias)
+    return [estrategias[(i + partida) % k] for i in range(num_jugadores)]
+
+def jugar_partida(config: Dict[str, Any], partida: int, instrumentar: bool = False) -> Dict[str, Any]:
+    """Juega una partida completa sin E/S y devuelve su resultado."""
+    if instrumentar:
+        INSTR.activar()
+        INSTR.reiniciar()
+    semilla = config["semilla"] * 1_000_003 + partida
+    nombres = asientos(config["estrategias"], config["jugadores"], partida)
+    agentes = [crear_agente(e, semilla=semilla * 8 + i) for i, e in enumerate(nombres)]
+    motor = Motor(num_jugadores=config["jugadores"])
+
+    inicio = time.perf_counter()
+    try:
+        while not motor.terminado():
+            jugada = None
+            if motor.quedan_jugadas_posibles():
+                with INSTR.turno():
+                    jugada = agentes[motor.turno_idx].elegir_jugada(motor)
+            if jugada is None:
+                motor.pasar()
+            else:
+                motor.jugar(jugada)
+    finally:
+        # algunos agentes tienen hilos o procesos propios (p.ej. "guiado")
+        for agente in agentes:
+            cerrar = getattr(agente, "cerrar", None)
+            if cerrar is not None:
+                cerrar()
+
+    resultado = {
+        "partida": partida,
+        "asientos": nombres,
+        "puntajes": motor.puntajes(),
+        "acciones": len(motor.historial),
+        "segundos": time.perf_counter() - inicio,
+        "jugadas": [entrada[0] for entrada in motor.historial],
+    }
+    if instrumentar:
+        resultado["instrumentacion"] = INSTR.foto()
+    return resultado
+
+def _trabajo(args):
+    return jugar_partida(*args)
+
+# ---------------- archivo de resultados ----------------
+def _leer_resultados(ruta: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Lee un archivo previo; descarta las líneas ilegibles (p.ej. una cortada por una interrupción)."""
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, "r", encoding="utf-8") as f:
+        lineas = f.read().split("\n")
+    lineas = [l for l in lineas if l.strip()]
+    validas: List[str] = []
+    resultados: List[Dict[str, Any]] = []
+    for linea in lineas:
+        try:
+            dato = json.loads(linea)
+        except json.JSONDecodeError:
+            continue
+        if dato.get("tipo") == "config":
+            if dato["config"] != config:
+                raise ValueError(f"{ruta} es de otra configuración: {dato['config']}")
+        else:
+            resultados.append(dato)
+        validas.append(linea)
+    if len(validas) != len(lineas):
+        # reescribir sin las líneas corruptas para poder seguir agregando
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write("".join(l + "\n" for l in validas))
+    return resultados
+
+def resumir(resultados: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Por estrategia (contando cada asiento que ocupó): partidas, tasa de victorias
+    (empates repartidos) y puntaje medio, cada uno con su intervalo de confianza
+    del 95% (aproximación normal).
+    """
+    por_estrategia: Dict[str, Dict[str, List[float]]] = {}
+    for r in resultados:
+        puntajes = r["puntajes"]
+        mejor = max(puntajes)
+        ganadores = puntajes.count(mejor)
+        for nombre, p in zip(r["asientos"], puntajes):
+            d = por_estrategia.setdefault(nombre, {"victorias": [], "puntajes": []})
+            d["victorias"].append(1.0 / ganadores if p == mejor else 0.0)
+            d["puntajes"].append(float(p))
+
+    def media_ic(xs: List[float]):
+        n = len(xs)
+        media = sum(xs) / n
+        var = sum((x - media) ** 2 for x in xs) / (n - 1) if n > 1 else 0.0
+        return media, 1.96 * math.sqrt(var / n)
+
+    resumen = {}
+    for nombre, d in sorted(por_estrategia.items()):
+        v, v_ic = media_ic(d["victorias"])
+        p, p_ic = media_ic(d["puntajes"])
+        resumen[nombre] = {"partidas": len(d["victorias"]),
+                           "tasa_victorias": v, "tasa_victorias_ic95": v_ic,
+                           "puntaje_medio": p, "puntaje_medio_ic95": p_ic}
+    return resumen
+
+def correr_torneo(
+    estrategias: List[str],
+    jugadores: int,
+    partidas: int,
+    salida: str,
+    procesos: Optional[int] = None,
+    semilla: int = 0,
+    progreso: bool = True,
+    registro: Optional[str] = None,
+    instrumentar: bool = False,
+    perfil: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Juega las partidas que falten de 0..partidas-1. Con 'registro' además
+    guarda las jugadas de cada partida nueva en ese archivo binario (ver
+    registro.py), con el número de partida como etiqueta.
+    Con 'perfil' las partidas se juegan en este proceso (el perfilador solo
+    ve el hilo actual) y las pilas muestreadas se guardan en esa ruta.
+    """
+    if not 2 <= jugadores <= 4:
+        raise ValueError("El juego soporta entre 2 y 4 jugadores.")
+    for e in estrategias:
+        parsear_estrategia(e)  # falla pronto si alguna está mal escrita
+    config = {"estrategias": list(estrategias), "jugadores": jugadores, "semilla": semilla}
+
+    resultados = _leer_resultados(salida, config)
+    hechas: Set[int] = {r["partida"] for r in resultados}
+    pendientes = [g for g in range(partidas) if g not in hechas]
+    if progreso and hechas:
+        print(f"Reanudando: {len(hechas)} partidas ya jugadas, faltan {len(pendientes)}.")
+
+    escritor = EscritorRegistro(registro) if registro else None
+    registradas: Set[int] = set()
+    if escritor is not None:
+        # una interrupción entre el registro y el .jsonl deja partidas que se
+        # vuelven a jugar pero que ya están en el registro
+        with LectorRegistro(registro) as lector:
+            registradas = {lector.info(n)[0] for n in range(len(lector))}
+    perfilador = PerfiladorMuestreo() if perfil else None
+    fotos = []
+    inicio = time.perf_counter()
+    with open(salida, "a", encoding="utf-8") as f:
+        if not os.path.getsize(salida):
+            f.write(json.dumps({"tipo": "config", "config": config}) + "\n")
+        if pendientes:
+            trabajos = [(config, g, instrumentar) for g in pendientes]
+            with contextlib.ExitStack() as pila:
+                if perfilador is not None:
+                    pila.enter_context(perfilador)
+                    partidas_hechas = map(_trabajo, trabajos)
+                else:
+                    pool = pila.enter_context(multiprocessing.Pool(procesos or os.cpu_count() or 1))
+                    partidas_hechas = pool.imap_unordered(_trabajo, trabajos)
+                for i, r in enumerate(partidas_hechas, 1):
+                    jugadas = r.pop("jugadas")
+                    if escritor is not None and r["partida"] not in registradas:
+                        escritor.agregar(jugadas, jugadores, etiqueta=r["partida"])
+                        escritor.flush()
+                    if "instrumentacion" in r:
+                        fotos.append(r["instrumentacion"])
+                    f.write(json.dumps(r) + "\n")
+                    f.flush()
+                    resultados.append(r)
+                    if progreso and (i % 50 == 0 or i == len(pendientes)):
+                        ritmo = i / (time.perf_counter() - inicio)
+                        print(f"  {i}/{len(pendientes)} partidas ({ritmo:.1f} partidas/s)", flush=True)
+    segundos = time.perf_counter() - inicio
+    if escritor is not None:
+        escritor.cerrar()
+    if perfilador is not None:
+        perfilador.guardar(perfil)
+
+    resumen = {
+        "config": config,
+        "partidas": len([r for r in resultados if r["partida"] < partidas]),
+        "partidas_nuevas": len(pendientes),
+        "segundos": segundos,
+        "partidas_por_segundo": len(pendientes) / segundos if segundos > 0 else 0.0,
+        "estrategias": resumir(r for r in resultados if r["partida"] < partidas),
+    }
+    if instrumentar:
+        resumen["instrumentacion"] = sumar_fotos(fotos)
+    if perfilador is not None:
+        resumen["perfil"] = {"muestras": perfilador.muestras, "propias": perfilador.propias(15)}
+    return resumen
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Torneo de auto-juego de Blokus.")
+    parser.add_argument("--estrategias", nargs="+", required=True,
+                        help="p.ej. aleatorio codicioso mcts:max_playouts=100")
+    parser.add_argument("--jugadores", type=int, default=4, help="2-4")
+    parser.add_argument("--partidas", type=int, default=100)
+    parser.add_argument("--salida", default="torneo.jsonl")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--resumen", default=None, help="archivo JSON donde guardar el resumen")
+    parser.add_argument("--registro", default=None, help="archivo binario donde guardar las jugadas")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="contar validaciones, generación de jugadas y latencia por turno")
+    parser.add_argument("--perfil", default=None,
+                        help="perfilar por muestreo (en un solo proceso) y guardar las pilas aquí")
+    args = parser.parse_args(argv)
+
+    try:
+        resumen = correr_torneo(args.estrategias, args.jugadores, args.partidas, args.salida,
+                                args.procesos, args.semilla, registro=args.registro,
+                                instrumentar=args.instrumentar, perfil=args.perfil)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"\nPartidas: {resumen['partidas']}  "
+          f"({resumen['partidas_por_segundo']:.1f} partidas/s en esta ejecución)")
+    print(f"{'estrategia':30s} {'n':>6s} {'victorias':>16s} {'puntaje medio':>18s}")
+    for nombre, e in resumen["estrategias"].items():
+        print(f"{nombre:30s} {e['partidas']:6d} "
+              f"{e['tasa_victorias']:8.3f} ±{e['tasa_victorias_ic95']:.3f} "
+              f"{e['puntaje_medio']:10.2f} ±{e['puntaje_medio_ic95']:.2f}")
+    if "perfil" in resumen:
+        print(f"\nPerfil ({resumen['perfil']['muestras']} muestras, guardado en {args.perfil}):")
+        for funcion, fraccion in resumen["perfil"]["propias"]:
+            print(f"  {fraccion:6.1%}  {funcion}")
+    if args.resumen:
+        with open(args.resumen, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2)
+
+if __name__ == "__main__":
+    main()
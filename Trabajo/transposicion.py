@@ -0,0 +1,91 @@
+# transposicion.py
+# Tabla de transposición acotada, indexada por la clave de Zobrist de la posición.
+# La comparten la búsqueda y las caches de evaluación.
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Tipo de valor guardado (para búsquedas alfa-beta)
+EXACTO = 0
+COTA_INFERIOR = 1   # el valor real es >= valor
+COTA_SUPERIOR = 2   # el valor real es <= valor
+
+class EntradaTT(NamedTuple):
+    clave: int
+    valor: Any
+    profundidad: int
+    tipo: int
+    jugada: Any
+    generacion: int
+
+class TablaTransposicion:
+    """
+    Tabla de tamaño fijo: cada clave cae en una sola ranura (clave % capacidad).
+    Política de reemplazo al chocar dos claves distintas:
+      - se reemplaza siempre una entrada de una búsqueda anterior (generación vieja)
+      - dentro de la misma búsqueda, solo si la nueva es al menos igual de profunda
+    """
+    def __init__(self, capacidad: int = 1 << 20):
+        if capacidad <= 0:
+            raise ValueError("La capacidad debe ser positiva.")
+        self.capacidad = capacidad
+        self._ranuras: List[Optional[EntradaTT]] = [None] * capacidad
+        self.generacion = 0
+        self.ocupadas = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.descartes = 0  # escrituras rechazadas por la política
+
+    def nueva_busqueda(self) -> None:
+        """Marca las entradas actuales como de una búsqueda anterior (envejecen)."""
+        self.generacion += 1
+
+    def buscar(self, clave: int) -> Optional[EntradaTT]:
+        entrada = self._ranuras[clave % self.capacidad]
+        if entrada is not None and entrada.clave == clave:
+            self.aciertos += 1
+            return entrada
+        self.fallos += 1
+        return None
+
+    def guardar(
+        self,
+        clave: int,
+        valor: Any,
+        profundidad: int = 0,
+        tipo: int = EXACTO,
+        jugada: Any = None,
+    ) -> bool:
+        """Guarda la entrada si la política lo permite. Devuelve True si se escribió."""
+        i = clave % self.capacidad
+        actual = self._ranuras[i]
+        if actual is None:
+            self.ocupadas += 1
+        elif actual.clave != clave:
+            if actual.generacion == self.generacion and actual.profundidad > profundidad:
+                self.descartes += 1
+                return False
+            self.desalojos += 1
+        elif jugada is None:
+            # misma posición: conservar la mejor jugada conocida
+            jugada = actual.jugada
+        self._ranuras[i] = EntradaTT(clave, valor, profundidad, tipo, jugada, self.generacion)
+        return True
+
+    def limpiar(self) -> None:
+        self._ranuras = [None] * self.capacidad
+        self.ocupadas = 0
+
+    def __len__(self) -> int:
+        return self.ocupadas
+
+    def estadisticas(self) -> Dict[str, float]:
+        consultas = self.aciertos + self.fallos
+        return {
+            "capacidad": self.capacidad,
+            "ocupadas": self.ocupadas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "desalojos": self.desalojos,
+            "descartes": self.descartes,
+        }
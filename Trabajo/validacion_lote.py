@@ -0,0 +1,135 @@
+# validacion_lote.py
+# Validación vectorizada (NumPy) de muchas colocaciones contra una posición.
+#
+# Aplica exactamente las mismas reglas y en el mismo orden que
+# Mesa.validar_colocacion, pero sobre arreglos: cada candidato recibe un
+# código de rechazo (OK = 0) y MOTIVOS[código] es el texto del validador
+# escalar. La única diferencia: una orientación fuera de rango, que en el
+# validador escalar lanza ValueError, aquí es ORIENTACION_INVALIDA.
+#
+#   ok, codigos = validar_lote(mesa, "A", piezas, orientaciones, filas, columnas)
+#   ok, codigos = validar_todas(mesa, "A")   # una entrada por colocación del índice
+from typing import Dict, Tuple
+import numpy as np
+from colocaciones import IndiceColocaciones
+from mesa import Mesa
+from repositorio_piezas import PIEZAS
+
+OK = 0
+PIEZA_DESCONOCIDA = 1
+ORIENTACION_INVALIDA = 2
+FUERA = 3
+SUPERPUESTA = 4
+LADO_PROPIO = 5
+SIN_ESQUINA_INICIAL = 6
+SIN_ESQUINA_PROPIA = 7
+
+MOTIVOS = (
+    "OK",
+    "Pieza no reconocida",
+    "Orientación inválida",
+    "La pieza se sale del tablero.",
+    "La pieza se superpone con otra.",
+    "No puede tocar por lado otra pieza propia.",
+    "La primera pieza debe cubrir tu esquina inicial.",
+    "Debes tocar por esquina alguna pieza tuya.",
+)
+
+class TablasLote:
+    """
+    Arreglos precalculados de un índice de colocaciones:
+      celdas[idx]    -> índices de celda de la colocación (rellenado con la
+                        celda ficticia filas*columnas, que siempre vale False)
+      colocacion[p, o, r, c] -> id de la colocación o -1 si se sale del tablero
+      orientaciones[p] -> cuántas orientaciones tiene la pieza p
+    """
+    def __init__(self, indice: IndiceColocaciones):
+        self.filas = indice.filas
+        self.columnas = indice.columnas
+        self.n_celdas = indice.filas * indice.columnas
+        ancho = max(len(c) for c in indice.celdas)
+        self.celdas = np.full((len(indice), ancho), self.n_celdas, dtype=np.int32)
+        for idx, celdas in enumerate(indice.celdas):
+            self.celdas[idx, :len(celdas)] = [r * self.columnas + c for r, c in celdas]
+
+        self.orientaciones = np.array([len(PIEZAS.orientaciones(p)) for p in PIEZAS.ids()], dtype=np.int32)
+        max_orient = int(self.orientaciones.max())
+        self.colocacion = np.full((PIEZAS.n, max_orient, self.filas, self.columnas), -1, dtype=np.int32)
+        for idx in range(len(indice)):
+            r, c = indice.ref[idx]
+            self.colocacion[indice.pieza[idx], indice.orient[idx], r, c] = idx
+
+_TABLAS: Dict[int, Tuple[IndiceColocaciones, TablasLote]] = {}
+
+def obtener_tablas(indice: IndiceColocaciones) -> TablasLote:
+    """Tablas compartidas por todas las mesas que usan el mismo índice."""
+    entrada = _TABLAS.get(id(indice))
+    if entrada is None or entrada[0] is not indice:
+        entrada = (indice, TablasLote(indice))
+        _TABLAS[id(indice)] = entrada
+    return entrada[1]
+
+def _a_bool(mascara: int, n: int) -> np.ndarray:
+    """Máscara entera -> arreglo bool de n+1 celdas (la última, ficticia, en False)."""
+    datos = np.frombuffer(mascara.to_bytes((n + 8) // 8, "little"), dtype=np.uint8)
+    bits = np.unpackbits(datos, bitorder="little")[:n + 1].astype(bool)
+    bits[n] = False
+    return bits
+
+def vista_tablero(mesa: Mesa, simbolo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ocupadas, prohibidas, anclas) de 'simbolo' como arreglos bool por celda."""
+    mesa._asegurar_simbolo(simbolo)
+    n = mesa.filas * mesa.columnas
+    return (_a_bool(mesa.ocupadas, n),
+            _a_bool(mesa.prohibidas[simbolo], n),
+            _a_bool(mesa.anclas[simbolo], n))
+
+def _reglas(mesa: Mesa, simbolo: str, tablas: TablasLote, ids: np.ndarray) -> np.ndarray:
+    """Códigos de las colocaciones 'ids' (todas dentro del tablero)."""
+    ocupadas, prohibidas, anclas = vista_tablero(mesa, simbolo)
+    celdas = tablas.celdas[ids]
+    codigos = np.full(len(ids), OK, dtype=np.int8)
+    sin_ancla = ~anclas[celdas].any(axis=1)
+    codigos[sin_ancla] = (SIN_ESQUINA_PROPIA if mesa.jugadores_colocaron.get(simbolo, False)
+                          else SIN_ESQUINA_INICIAL)
+    # en orden inverso al del validador escalar: la primera regla que falla gana
+    codigos[prohibidas[celdas].any(axis=1)] = LADO_PROPIO
+    codigos[ocupadas[celdas].any(axis=1)] = SUPERPUESTA
+    return codigos
+
+def validar_todas(mesa: Mesa, simbolo: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(legal, código) para cada colocación del índice de la mesa, por id."""
+    tablas = obtener_tablas(mesa.indice)
+    codigos = _reglas(mesa, simbolo, tablas, np.arange(len(mesa.indice)))
+    return codigos == OK, codigos
+
+def validar_lote(
+    mesa: Mesa,
+    simbolo: str,
+    piezas: np.ndarray,
+    orientaciones: np.ndarray,
+    filas: np.ndarray,
+    columnas: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valida los candidatos (piezas[k], orientaciones[k], (filas[k], columnas[k]))
+    de 'simbolo'. Devuelve (legal, código) con un elemento por candidato.
+    """
+    tablas = obtener_tablas(mesa.indice)
+    piezas, orientaciones, filas, columnas = (np.asarray(a, dtype=np.int64).ravel()
+                                              for a in (piezas, orientaciones, filas, columnas))
+    codigos = np.full(len(piezas), FUERA, dtype=np.int8)
+
+    pieza_ok = (piezas >= 0) & (piezas < PIEZAS.n)
+    codigos[~pieza_ok] = PIEZA_DESCONOCIDA
+    n_orient = np.where(pieza_ok, tablas.orientaciones[np.where(pieza_ok, piezas, 0)], 0)
+    orient_ok = pieza_ok & (orientaciones >= 0) & (orientaciones < n_orient)
+    codigos[pieza_ok & ~orient_ok] = ORIENTACION_INVALIDA
+
+    dentro = orient_ok & (filas >= 0) & (filas < tablas.filas) & (columnas >= 0) & (columnas < tablas.columnas)
+    ids = np.full(len(piezas), -1, dtype=np.int64)
+    ids[dentro] = tablas.colocacion[piezas[dentro], orientaciones[dentro], filas[dentro], columnas[dentro]]
+    validos = ids >= 0
+    if validos.any():
+        codigos[validos] = _reglas(mesa, simbolo, tablas, ids[validos])
+    return codigos == OK, codigos
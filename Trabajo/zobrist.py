@@ -0,0 +1,58 @@
+# zobrist.py
+# Claves de Zobrist para identificar posiciones con un entero de 64 bits.
+# La clave de una posición es el XOR de:
+#   - (celda, símbolo) por cada celda ocupada
+#   - (símbolo, pieza) por cada pieza que el jugador YA colocó
+#     (equivale a codificar las piezas que le quedan)
+#   - (símbolo) si el jugador ya hizo su primera jugada
+#   - (turno) del jugador que mueve (lo aplica Juego, no la Mesa)
+import random
+from typing import Dict, List, Tuple
+from repositorio_piezas import PIEZAS
+
+SEMILLA_ZOBRIST = 20240611
+_BITS = 64
+
+class TablaZobrist:
+    def __init__(self, filas: int, columnas: int, semilla: int = SEMILLA_ZOBRIST):
+        self.filas = filas
+        self.columnas = columnas
+        self.semilla = semilla
+        self._celda: Dict[str, List[int]] = {}
+        self._pieza: Dict[str, List[int]] = {}
+        self._primera: Dict[str, int] = {}
+        rng = random.Random(f"{semilla}:turno")
+        self.turno: List[int] = [rng.getrandbits(_BITS) for _ in range(8)]
+
+    def _generar(self, simbolo: str) -> None:
+        # Cada símbolo tiene su propio generador: las claves no dependen del
+        # orden en que aparecen los símbolos.
+        rng = random.Random(f"{self.semilla}:{self.filas}x{self.columnas}:{simbolo}")
+        self._celda[simbolo] = [rng.getrandbits(_BITS) for _ in range(self.filas * self.columnas)]
+        self._pieza[simbolo] = [rng.getrandbits(_BITS) for _ in PIEZAS.ids()]
+        self._primera[simbolo] = rng.getrandbits(_BITS)
+
+    def celdas(self, simbolo: str) -> List[int]:
+        """Claves por índice de celda (r*columnas + c) para ese símbolo."""
+        if simbolo not in self._celda:
+            self._generar(simbolo)
+        return self._celda[simbolo]
+
+    def pieza(self, simbolo: str, pieza_id: int) -> int:
+        if simbolo not in self._pieza:
+            self._generar(simbolo)
+        return self._pieza[simbolo][pieza_id]
+
+    def primera(self, simbolo: str) -> int:
+        if simbolo not in self._primera:
+            self._generar(simbolo)
+        return self._primera[simbolo]
+
+_TABLAS: Dict[Tuple[int, int], TablaZobrist] = {}
+
+def obtener_zobrist(filas: int = 20, columnas: int = 20) -> TablaZobrist:
+    """Tabla compartida por tamaño de tablero (las claves son deterministas)."""
+    clave = (filas, columnas)
+    if clave not in _TABLAS:
+        _TABLAS[clave] = TablaZobrist(filas, columnas)
+    return _TABLAS[clave]
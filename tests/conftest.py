@@ -0,0 +1,8 @@
+# conftest.py
+# Los módulos viven planos en Trabajo/ y se importan sin paquete.
+import os
+import sys
+
+TRABAJO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Trabajo")
+if TRABAJO not in sys.path:
+    sys.path.insert(0, TRABAJO)
@@ -0,0 +1,64 @@
+# test_busqueda.py
+# Alfa-beta (con tabla, ventanas de aspiración y profundización iterativa)
+# tiene que dar el mismo valor que un minimax paranoico sin podas.
+import random
+import pytest
+from busqueda import AgenteBusqueda
+from evaluacion import Evaluador
+from finales import jugadas_restantes
+from motor import Motor
+
+def _posicion(num_jugadores: int, semilla: int, tope: int) -> Motor:
+    """Partida al azar hasta que queden a lo sumo 'tope' jugadas legales en total."""
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    while jugadas_restantes(juego, tope) > tope:
+        jugadas = juego.jugadas_legales()
+        if jugadas:
+            juego.jugar(rng.choice(jugadas))
+        else:
+            juego.pasar()
+    assert not juego.terminado()
+    return juego
+
+def _final(juego: Motor, raiz: int) -> float:
+    puntajes = juego.puntajes()
+    diferencia = puntajes[raiz] - max(p for i, p in enumerate(puntajes) if i != raiz)
+    return ((diferencia > 0) - (diferencia < 0)) * 1000.0 + diferencia
+
+def _minimax(juego: Motor, evaluador: Evaluador, raiz: int, prof: int) -> float:
+    if juego.terminado():
+        return _final(juego, raiz)
+    if prof == 0:
+        return evaluador.relativos()[raiz]
+    valores = []
+    for jugada in juego.jugadas_legales() or [None]:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+        valores.append(_minimax(juego, evaluador, raiz, prof - 1))
+        juego.deshacer()
+    return max(valores) if juego.turno_idx == raiz else min(valores)
+
+@pytest.mark.parametrize("num_jugadores,semilla,prof", [(2, 1, 3), (2, 5, 4), (3, 3, 3), (4, 4, 4)])
+def test_alfabeta_igual_a_minimax(num_jugadores, semilla, prof):
+    juego = _posicion(num_jugadores, semilla, 40)
+    evaluador = Evaluador(juego.mesa, [j.simbolo for j in juego.jugadores])
+    esperado = _minimax(juego, evaluador, juego.turno_idx, prof)
+
+    agente = AgenteBusqueda(tiempo_limite=None, profundidad=prof, umbral_final=None, ventana=0.5)
+    antes = juego.clave_posicion(), len(juego.historial)
+    jugada = agente.elegir_jugada(juego)
+    assert (juego.clave_posicion(), len(juego.historial)) == antes
+    informe = agente.informe()
+    assert informe["jugadas_raiz"] > 1
+    assert informe["profundidad"] == prof
+    assert informe["valor_estimado"] == pytest.approx(esperado)
+    # la jugada elegida vale lo mismo que el óptimo
+    if jugada is None:
+        juego.pasar()
+    else:
+        juego.jugar(jugada)
+    raiz = (juego.turno_idx - 1) % num_jugadores
+    assert _minimax(juego, evaluador, raiz, prof - 1) == pytest.approx(esperado)
@@ -0,0 +1,56 @@
+# test_deshacer.py
+# Fuzz de hacer/deshacer: tras cada paso el estado incremental debe coincidir
+# con el de una mesa nueva que reproduce el mismo historial.
+import random
+import pytest
+from motor import Motor
+
+def _estado(juego: Motor):
+    mesa = juego.mesa
+    return (mesa.grid, mesa.ocupadas, mesa.hash, dict(mesa.jugadores_colocaron), dict(mesa.anclas),
+            dict(mesa.prohibidas), juego.turno_idx, juego.pases_consecutivos,
+            [(j.piezas_disponibles, j.cuadros_restantes, j.ha_pasado, sorted(j.piezas_colocadas))
+             for j in juego.jugadores])
+
+def _reproducir(juego: Motor) -> Motor:
+    nuevo = Motor(juego.mesa.filas, juego.mesa.columnas, len(juego.jugadores))
+    for jugada, _, _ in juego.historial:
+        if jugada is None:
+            nuevo.pasar()
+        else:
+            nuevo.jugar(jugada)
+    return nuevo
+
+@pytest.mark.parametrize("semilla,num_jugadores", [(1, 2), (2, 3), (3, 4), (4, 4)])
+def test_hacer_deshacer_al_azar(semilla, num_jugadores):
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    inicial = _estado(juego)
+    pasos = 0
+    while not juego.terminado() and pasos < 400:
+        pasos += 1
+        if juego.historial and rng.random() < 0.3:
+            juego.deshacer()
+        else:
+            jugadas = juego.jugadas_legales()
+            if jugadas:
+                juego.jugar(rng.choice(jugadas))
+            else:
+                juego.pasar()
+        if pasos % 5 == 0:
+            juego.verificar_consistencia()
+            assert _estado(juego) == _estado(_reproducir(juego))
+    juego.verificar_consistencia()
+    assert _estado(juego) == _estado(_reproducir(juego))
+    while juego.historial:
+        juego.deshacer()
+    assert _estado(juego) == inicial
+
+def test_modo_verificar_en_partidas_completas():
+    rng = random.Random(5)
+    juego = Motor(num_jugadores=4, verificar=True)
+    juego.jugar_al_azar(rng, grandes_primero=True)
+    assert juego.terminado()
+    while juego.historial:
+        juego.deshacer()
+    assert _estado(juego) == _estado(Motor(num_jugadores=4))
@@ -0,0 +1,95 @@
+# test_exportador.py
+# El aumento por simetrías de DatosEntrenamiento tiene que dar exactamente la
+# posición girada/reflejada según libro.simetrias: planos, y jugada objetivo
+# con las celdas transformadas (y legal en la posición transformada).
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from colocaciones import obtener_indice
+from exportador import PASAR, PLANOS_POR_ASIENTO, DatosEntrenamiento, ExportadorDatos, codificar_posicion
+from libro import _transformar, simetrias
+from motor import Motor
+
+def _partida(num_jugadores: int, semilla: int):
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    while not juego.terminado():
+        jugadas = juego.jugadas_legales()
+        if jugadas:
+            juego.jugar(rng.choice(jugadas))
+        else:
+            juego.pasar()
+    return [entrada[0] for entrada in juego.historial]
+
+@pytest.fixture(scope="module")
+def datos(tmp_path_factory):
+    directorio = str(tmp_path_factory.mktemp("datos"))
+    partidas = [(_partida(2, 1), 2), (_partida(4, 2), 4)]
+    with ExportadorDatos(directorio, por_fragmento=64) as exportador:
+        for jugadas, n in partidas:
+            exportador.agregar_partida(jugadas, n)
+    return DatosEntrenamiento(directorio), partidas
+
+def test_exportado_coincide_con_la_partida(datos):
+    datos, partidas = datos
+    assert len(datos) == sum(len(j) for j, _ in partidas) and len(datos.fragmentos) > 1
+    fila = 0
+    for jugadas, n in partidas:
+        motor = Motor(num_jugadores=n)
+        lote = datos.lote(range(fila, fila + len(jugadas)))
+        indice = motor.mesa.indice
+        for k, jugada in enumerate(jugadas):
+            planos, piezas = codificar_posicion(motor)
+            assert (lote["planos"][k] == planos).all() and (lote["piezas"][k] == piezas).all()
+            esperado = PASAR if jugada is None else indice.por_clave[jugada]
+            assert lote["jugada"][k] == esperado
+            if jugada is None:
+                motor.pasar()
+            else:
+                motor.jugar(jugada)
+        fila += len(jugadas)
+
+def test_simetrias_del_primer_fragmento(datos):
+    datos, _ = datos
+    filas, columnas = datos.filas, datos.columnas
+    indice = obtener_indice(filas, columnas)
+    posiciones = range(datos.fragmentos[0])
+    original = datos.lote(posiciones)
+    lista = simetrias(filas, columnas)
+    assert len(lista) == 8
+    for s, sim in enumerate(lista):
+        girado = datos.lote(posiciones, s)
+        for campo in ("piezas", "valor", "puntaje", "jugadores"):
+            assert (girado[campo] == original[campo]).all()
+        # planos: la celda (r, c) pasa a _transformar(sim, r, c)
+        esperado = np.zeros_like(original["planos"])
+        for r in range(filas):
+            for c in range(columnas):
+                r2, c2 = _transformar(sim, r, c)
+                esperado[:, :, r2, c2] = original["planos"][:, :, r, c]
+        assert (girado["planos"] == esperado).all()
+
+        for k in posiciones:
+            antes, despues = int(original["jugada"][k]), int(girado["jugada"][k])
+            if antes == PASAR:
+                assert despues == PASAR
+                continue
+            # misma pieza, celdas transformadas
+            assert indice.pieza[despues] == indice.pieza[antes]
+            assert set(indice.celdas[despues]) == {_transformar(sim, r, c) for r, c in indice.celdas[antes]}
+            # y es legal para quien mueve en la posición transformada
+            planos = girado["planos"][k]
+            celdas = tuple(zip(*indice.celdas[despues]))
+            ocupadas = planos[0::PLANOS_POR_ASIENTO].any(axis=0)
+            assert not ocupadas[celdas].any()
+            assert planos[1][celdas].any()
+            assert not planos[2][celdas].any()
+
+def test_lotes_recorren_todo_una_vez(datos):
+    datos, _ = datos
+    vistas = 0
+    for lote in datos.lotes(50, random.Random(3)):
+        vistas += len(lote["jugada"])
+    assert vistas == len(datos)
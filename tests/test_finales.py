@@ -0,0 +1,66 @@
+# test_finales.py
+# El solucionador (con regiones aisladas, empaquetado y tabla) tiene que dar
+# el mismo diferencial final que recorrer el árbol completo.
+import random
+import pytest
+from finales import SolucionadorFinal, jugadas_restantes
+from motor import Motor
+
+def _posicion(num_jugadores: int, semilla: int, tope: int) -> Motor:
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    while jugadas_restantes(juego, tope) > tope:
+        jugadas = juego.jugadas_legales()
+        if jugadas:
+            juego.jugar(rng.choice(jugadas))
+        else:
+            juego.pasar()
+    assert not juego.terminado()
+    return juego
+
+def _fuerza_bruta(juego: Motor, raiz: int) -> int:
+    """Diferencial final (raíz menos el mejor rival) con los rivales en contra."""
+    if juego.terminado():
+        puntajes = juego.puntajes()
+        return puntajes[raiz] - max(p for i, p in enumerate(puntajes) if i != raiz)
+    valores = []
+    for jugada in juego.jugadas_legales() or [None]:
+        if jugada is None:
+            juego.pasar()
+        else:
+            juego.jugar(jugada)
+        valores.append(_fuerza_bruta(juego, raiz))
+        juego.deshacer()
+    return max(valores) if juego.turno_idx == raiz else min(valores)
+
+@pytest.mark.parametrize("num_jugadores,semilla", [(2, 1), (2, 7), (3, 3), (4, 4), (4, 8)])
+def test_valor_exacto_igual_a_fuerza_bruta(num_jugadores, semilla):
+    juego = _posicion(num_jugadores, semilla, 14)
+    raiz = juego.turno_idx
+    esperado = _fuerza_bruta(juego, raiz)
+
+    solucionador = SolucionadorFinal(umbral=14, max_nodos=10_000_000)
+    antes = juego.clave_posicion(), len(juego.historial)
+    resuelto = solucionador.resolver(juego)
+    assert (juego.clave_posicion(), len(juego.historial)) == antes
+    assert resuelto is not None
+    jugada, valor = resuelto
+    assert valor == esperado
+    # la jugada devuelta consigue ese valor
+    if jugada is None:
+        juego.pasar()
+    else:
+        juego.jugar(jugada)
+    assert _fuerza_bruta(juego, raiz) == esperado
+
+def test_sin_presupuesto_devuelve_none():
+    juego = _posicion(4, 4, 10)
+    assert SolucionadorFinal(umbral=10, max_nodos=1).resolver(juego) is None
+
+def test_memoria_de_empaquetado_acotada():
+    solucionador = SolucionadorFinal(umbral=14, max_nodos=10_000_000, capacidad_empaquetados=4)
+    for semilla in range(6):
+        juego = _posicion(4, semilla, 14)
+        raiz = juego.turno_idx
+        assert solucionador.resolver(juego)[1] == _fuerza_bruta(juego, raiz)
+        assert len(solucionador._empaquetados) <= 4
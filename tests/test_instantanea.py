@@ -0,0 +1,82 @@
+# test_instantanea.py
+import random
+import pytest
+from instantanea import TAMANO, Instantanea
+from motor import Motor
+
+def _estado(juego: Motor):
+    return (juego.mesa.grid, juego.mesa.hash, juego.mesa.anclas, juego.mesa.prohibidas, juego.turno_idx,
+            juego.pases_consecutivos, [(j.piezas_disponibles, j.cuadros_restantes, j.ha_pasado,
+                                        j.piezas_colocadas) for j in juego.jugadores])
+
+def _jugar(juego: Motor, rng: random.Random, acciones: int) -> None:
+    for _ in range(acciones):
+        if juego.terminado():
+            break
+        jugadas = juego.jugadas_legales()
+        if jugadas:
+            juego.jugar(rng.choice(jugadas))
+        else:
+            juego.pasar()
+
+@pytest.mark.parametrize("num_jugadores,acciones", [(2, 0), (2, 9), (3, 20), (4, 35), (4, 200)])
+def test_ida_y_vuelta(num_jugadores, acciones):
+    rng = random.Random(acciones)
+    juego = Motor(num_jugadores=num_jugadores)
+    _jugar(juego, rng, acciones)
+
+    foto = Instantanea.capturar(juego)
+    datos = foto.codificar()
+    assert len(datos) == TAMANO
+    assert Instantanea.decodificar(datos) == foto
+
+    copia = Instantanea.decodificar(datos).motor(verificar=True)
+    assert _estado(copia) == _estado(juego)
+    assert copia.jugadas_legales() == juego.jugadas_legales()
+    copia.verificar_consistencia()
+
+    # desde la copia la partida sigue igual que desde el original
+    semilla = rng.random()
+    _jugar(juego, random.Random(semilla), 300)
+    _jugar(copia, random.Random(semilla), 300)
+    assert _estado(copia) == _estado(juego)
+
+def test_restaurar_exige_mismo_numero_de_jugadores():
+    foto = Instantanea.capturar(Motor(num_jugadores=4))
+    with pytest.raises(ValueError):
+        foto.restaurar(Motor(num_jugadores=2))
+
+def test_decodificar_rechaza_tamano_incorrecto():
+    with pytest.raises(ValueError):
+        Instantanea.decodificar(b"\0" * (TAMANO - 1))
+
+@pytest.mark.parametrize("num_jugadores,semilla", [(2, 1), (3, 2), (4, 3)])
+def test_deshacer_despues_de_restaurar(num_jugadores, semilla):
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    inicial = _estado(Motor(num_jugadores=num_jugadores))
+    paso = 0
+    while not juego.terminado():
+        _jugar(juego, rng, 1)
+        paso += 1
+        if paso % 4 and not juego.terminado():
+            continue
+        copia = Instantanea.capturar(juego).motor()
+        assert _estado(copia) == _estado(juego)
+        copia.verificar_consistencia()
+        # el historial reconstruido lleva a la misma posición desde cero
+        repeticion = Motor(num_jugadores=num_jugadores)
+        for jugada, _, _ in copia.historial:
+            if jugada is None:
+                repeticion.pasar()
+            else:
+                repeticion.jugar(jugada)
+        assert _estado(repeticion) == _estado(copia)
+        # y se puede deshacer hasta el principio
+        for _ in range(3):
+            if copia.historial:
+                copia.deshacer()
+                copia.verificar_consistencia()
+        while copia.historial:
+            copia.deshacer()
+        assert _estado(copia) == inicial
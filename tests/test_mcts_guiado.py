@@ -0,0 +1,29 @@
+# test_mcts_guiado.py
+import pytest
+
+pytest.importorskip("numpy")
+
+from evaluacion_lote import EvaluadorLotes
+from mcts_guiado import AgenteGuiado
+from motor import Motor
+
+def test_rechaza_presupuesto_vacio():
+    with pytest.raises(ValueError):
+        AgenteGuiado(tiempo_limite=None, max_playouts=0)
+
+def test_agentes_comparten_evaluador():
+    juego = Motor(num_jugadores=2)
+    with EvaluadorLotes(tamano_lote=4) as evaluador:
+        agentes = [AgenteGuiado(tiempo_limite=None, max_playouts=12, hilos=2, evaluador=evaluador,
+                                usar_libro=False, semilla=s)
+                   for s in range(2)]
+        for agente in agentes:
+            jugada = agente.elegir_jugada(juego)
+            assert juego.validar(jugada)[0]
+            assert agente.informe()["visitas_raiz"] == 12
+            juego.jugar(jugada)
+        agentes[0].cerrar()
+        # cerrar un agente no cierra el evaluador compartido
+        antes = evaluador.posiciones
+        assert agentes[1].elegir_jugada(juego) is not None
+        assert evaluador.posiciones > antes
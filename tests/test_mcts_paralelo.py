@@ -0,0 +1,30 @@
+# test_mcts_paralelo.py
+import mcts_paralelo
+from mcts_paralelo import AgenteMCTSParalelo, foto_de
+from motor import Motor
+
+def _posicion() -> Motor:
+    juego = Motor(num_jugadores=2)
+    for _ in range(4):
+        juego.jugar(juego.jugadas_legales()[0])
+    return juego
+
+def test_tareas_del_mismo_trabajador_no_acumulan_visitas():
+    # un mismo proceso puede atender varias tareas del mismo turno
+    agente = AgenteMCTSParalelo(procesos=1, tiempo_limite=None, max_playouts=30)
+    mcts_paralelo._iniciar_trabajador(agente._opciones)
+    foto = foto_de(_posicion())
+    for semilla in (1, 2):
+        hijos, informe = mcts_paralelo._buscar((foto, semilla, None, 30))
+        assert informe["playouts"] == 30
+        assert sum(n for _, n, _ in hijos) == 30
+
+def test_visitas_fusionadas_suman_los_playouts_de_cada_tarea():
+    juego = _posicion()
+    with AgenteMCTSParalelo(procesos=2, tiempo_limite=None, max_playouts=25, usar_libro=False) as agente:
+        for _ in range(2):
+            jugada = agente.elegir_jugada(juego)
+            informe = agente.informe()
+            assert informe["playouts"] == 2 * 25
+            assert informe["visitas_raiz"] == informe["playouts"]
+            juego.jugar(jugada)
@@ -0,0 +1,23 @@
+# test_mesa.py
+import pickle
+import random
+from mesa import Mesa
+from motor import Motor
+
+def test_pickle_no_arrastra_indice_ni_zobrist():
+    juego = Motor(num_jugadores=4)
+    juego.jugar_al_azar(random.Random(3))
+    for _ in range(10):
+        juego.deshacer()
+    datos = pickle.dumps(juego, pickle.HIGHEST_PROTOCOL)
+    assert len(datos) < 50_000
+    copia = pickle.loads(datos)
+    assert copia.mesa.zobrist is juego.mesa.zobrist
+    assert copia.mesa.indice is juego.mesa.indice
+    assert copia.mesa.grid == juego.mesa.grid and copia.mesa.hash == juego.mesa.hash
+    copia.mesa.verificar_consistencia()
+    # la copia sigue jugando y deshaciendo igual que el original
+    assert copia.jugadas_legales() == juego.jugadas_legales()
+    for _ in range(5):
+        copia.deshacer()
+    copia.verificar_consistencia()
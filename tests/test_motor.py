@@ -0,0 +1,24 @@
+# test_motor.py
+import pytest
+from motor import Motor
+
+def _estado(juego: Motor):
+    return (juego.mesa.grid, juego.mesa.hash, len(juego.historial), juego.turno_idx,
+            [j.piezas_disponibles for j in juego.jugadores])
+
+@pytest.mark.parametrize("verificar", [False, True])
+def test_jugar_fallido_no_cambia_nada(verificar):
+    juego = Motor(num_jugadores=2)
+    juego.verificar = verificar
+    juego.jugar(juego.jugadas_legales()[0])
+    juego.pasar()
+    repetida = juego.historial[0][0]       # pieza que el jugador 0 ya no tiene
+    antes = _estado(juego)
+    with pytest.raises(ValueError):
+        juego.jugar(repetida)
+    assert _estado(juego) == antes
+    with pytest.raises(ValueError):
+        juego.jugar((0, 0, (25, 25)))      # fuera del tablero
+    assert _estado(juego) == antes
+    juego.mesa.verificar_consistencia()
+    juego.verificar_consistencia()
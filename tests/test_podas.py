@@ -0,0 +1,71 @@
+# test_podas.py
+# Las podas de piezas/anclas muertas (Mesa._vivas) no pueden perder jugadas:
+# con y sin ellas la generación tiene que dar lo mismo, también después de
+# hacer y deshacer.
+import random
+import pytest
+from motor import Motor
+from repositorio_piezas import PIEZAS
+
+def _sin_podas(mesa, simbolo, piezas):
+    guardadas = mesa.piezas_muertas, mesa.anclas_muertas
+    mesa.piezas_muertas, mesa.anclas_muertas = {}, {}
+    try:
+        return set(mesa.jugadas_legales(simbolo, piezas))
+    finally:
+        mesa.piezas_muertas, mesa.anclas_muertas = guardadas
+
+def _fuerza_bruta(mesa, simbolo, piezas):
+    indice = mesa.indice
+    return {indice.clave(idx) for pieza_id in PIEZAS.lista(piezas) for idx in indice.por_pieza[pieza_id]
+            if mesa.validar_colocacion(simbolo, *indice.clave(idx))[0]}
+
+def _comparar(juego, rng):
+    mesa = juego.mesa
+    for jugador in juego.jugadores:
+        inventario = jugador.piezas_disponibles
+        # además del inventario real, uno menor: las anclas muertas dependen de él
+        subconjunto = inventario & rng.getrandbits(PIEZAS.n)
+        for piezas in (inventario, subconjunto, inventario):
+            podadas = set(mesa.jugadas_legales(jugador.simbolo, piezas))
+            assert podadas == _sin_podas(mesa, jugador.simbolo, piezas)
+            assert mesa.hay_jugada_legal(jugador.simbolo, piezas) == bool(podadas)
+
+@pytest.mark.parametrize("semilla,num_jugadores", [(1, 2), (2, 4), (3, 4)])
+def test_podas_no_pierden_jugadas(semilla, num_jugadores):
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    pasos = 0
+    hubo_podas = False
+    while not juego.terminado():
+        pasos += 1
+        if juego.historial and rng.random() < 0.25:
+            for _ in range(rng.randint(1, 4)):
+                if juego.historial:
+                    juego.deshacer()
+        else:
+            jugador = juego.jugador_actual()
+            # las simulaciones también anotan podas
+            jugada = juego.mesa.jugada_aleatoria(jugador.simbolo, jugador.piezas_disponibles, rng)
+            if jugada is None:
+                juego.pasar()
+            else:
+                juego.jugar(jugada)
+        mesa = juego.mesa
+        hubo_podas |= any(mesa.piezas_muertas.values()) or any(a for _, a in mesa.anclas_muertas.values())
+        if pasos % 3 == 0:
+            _comparar(juego, rng)
+    _comparar(juego, rng)
+    assert hubo_podas
+    juego.mesa.verificar_consistencia()
+
+def test_coincide_con_fuerza_bruta_al_final():
+    rng = random.Random(9)
+    juego = Motor(num_jugadores=4)
+    juego.jugar_al_azar(rng)
+    for _ in range(12):
+        juego.deshacer()
+        for jugador in juego.jugadores:
+            piezas = jugador.piezas_disponibles
+            assert set(juego.mesa.jugadas_legales(jugador.simbolo, piezas)) == \
+                _fuerza_bruta(juego.mesa, jugador.simbolo, piezas)
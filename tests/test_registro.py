@@ -0,0 +1,75 @@
+# test_registro.py
+import os
+import random
+import pytest
+from motor import Motor
+from registro import EscritorRegistro, LectorRegistro, ruta_indice
+
+def _partida(semilla: int, num_jugadores: int) -> Motor:
+    rng = random.Random(semilla)
+    juego = Motor(num_jugadores=num_jugadores)
+    while not juego.terminado():
+        jugadas = juego.jugadas_legales()
+        if jugadas:
+            juego.jugar(rng.choice(jugadas))
+        else:
+            juego.pasar()
+    return juego
+
+def _acciones(juego: Motor):
+    return [entrada[0] for entrada in juego.historial]
+
+@pytest.fixture(scope="module")
+def partidas():
+    return [_partida(s, 2 + s % 3) for s in range(5)]
+
+def test_ida_y_vuelta(tmp_path, partidas):
+    ruta = str(tmp_path / "p.blk")
+    with EscritorRegistro(ruta) as escritor:
+        for k, juego in enumerate(partidas[:3]):
+            assert escritor.agregar_motor(juego, etiqueta=100 + k) == k
+    # reabrir y seguir agregando
+    with EscritorRegistro(ruta) as escritor:
+        for k, juego in enumerate(partidas[3:], 3):
+            assert escritor.agregar(_acciones(juego), len(juego.jugadores), etiqueta=100 + k) == k
+
+    with LectorRegistro(ruta) as lector:
+        assert len(lector) == len(partidas)
+        assert list(lector) == [_acciones(j) for j in partidas]
+        for n in reversed(range(len(lector))):   # acceso directo, en cualquier orden
+            juego = partidas[n]
+            assert lector.info(n) == (100 + n, len(juego.jugadores), len(juego.historial))
+            assert lector.jugadas(n) == _acciones(juego)
+            assert lector.reproducir(n).puntajes() == juego.puntajes()
+        parcial = lector.reproducir(0, hasta=5)
+        assert _acciones(parcial) == _acciones(partidas[0])[:5]
+        with pytest.raises(IndexError):
+            lector.info(len(partidas))
+
+def test_recupera_escritura_cortada_e_indice_perdido(tmp_path, partidas):
+    ruta = str(tmp_path / "p.blk")
+    with EscritorRegistro(ruta) as escritor:
+        for juego in partidas[:2]:
+            escritor.agregar_motor(juego)
+    completo = os.path.getsize(ruta)
+    with EscritorRegistro(ruta) as escritor:
+        escritor.agregar_motor(partidas[2])
+    # la última partida quedó a medias en el disco
+    with open(ruta, "r+b") as f:
+        f.truncate(completo + 10)
+    with EscritorRegistro(ruta) as escritor:
+        assert escritor.partidas == 2
+    assert os.path.getsize(ruta) == completo
+
+    os.remove(ruta_indice(ruta))
+    with EscritorRegistro(ruta) as escritor:
+        escritor.agregar_motor(partidas[3])
+    with LectorRegistro(ruta) as lector:
+        assert [lector.jugadas(n) for n in range(len(lector))] == [_acciones(j) for j in
+                                                                    (partidas[0], partidas[1], partidas[3])]
+
+def test_rechaza_otro_tablero(tmp_path):
+    ruta = str(tmp_path / "p.blk")
+    EscritorRegistro(ruta).cerrar()
+    with pytest.raises(ValueError):
+        EscritorRegistro(ruta, 14, 14)
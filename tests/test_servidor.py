@@ -0,0 +1,89 @@
+# test_servidor.py
+import asyncio
+import json
+import pytest
+from repositorio_piezas import PIEZAS
+from servidor import ServidorJuegos, jugada_de_json
+
+@pytest.mark.parametrize("dato", [
+    [True, 0, [0, 0]],
+    ["F5", False, [0, 0]],
+    ["F5", 0, [True, 0]],
+    [-1, 0, [0, 0]],
+    [PIEZAS.n, 0, [0, 0]],
+    ["ZZ", 0, [0, 0]],
+    ["F5", -1, [0, 0]],
+    ["F5", 8, [0, 0]],
+    ["O4", 1, [0, 0]],
+    ["F5", 0.0, [0, 0]],
+    ["F5", 0],
+    "F5",
+])
+def test_jugada_de_json_rechaza(dato):
+    with pytest.raises(ValueError):
+        jugada_de_json(dato)
+
+def test_jugada_de_json_acepta():
+    pieza_id = PIEZAS.id_de("F5")
+    assert jugada_de_json(["f5", 3, [4, 5]]) == (pieza_id, 3, (4, 5))
+    assert jugada_de_json([pieza_id, 0, [0, 0]]) == (pieza_id, 0, (0, 0))
+    assert jugada_de_json(None) is None
+
+def _sesion(guion, servidor=None):
+    """Corre guion(servidor, pedir) con una conexión a un servidor local; pedir espera la respuesta."""
+    async def correr():
+        nonlocal servidor
+        servidor = servidor or ServidorJuegos(hilos=1)
+        await servidor.iniciar(puerto=0)
+        try:
+            lector, escritor = await asyncio.open_connection(*servidor.direccion[:2])
+            ids = iter(range(1, 1 << 30))
+
+            async def pedir(pedido):
+                pedido = {**pedido, "id": next(ids)}
+                escritor.write(json.dumps(pedido).encode() + b"\n")
+                await escritor.drain()
+                while True:
+                    mensaje = json.loads(await asyncio.wait_for(lector.readline(), 10))
+                    if mensaje.get("id") == pedido["id"]:
+                        return mensaje
+
+            try:
+                return await guion(servidor, pedir)
+            finally:
+                escritor.close()
+        finally:
+            await servidor.cerrar()
+    return asyncio.run(correr())
+
+def test_jugada_invalida_responde_error_de_protocolo():
+    async def guion(servidor, pedir):
+        creada = await pedir({"op": "crear", "jugadores": 2, "bots": {"1": "aleatorio"}})
+        assert creada["ok"] and creada["humanos"] == [0]
+        return [await pedir({"op": "jugar", "partida": creada["partida"], "jugada": jugada})
+                for jugada in ([-1, 0, [0, 0]], [True, 0, [0, 0]], ["F5", 9, [0, 0]])]
+
+    errores = [r["error"] for r in _sesion(guion) if r["ok"] is False]
+    assert errores == ["Pieza desconocida: -1", "Jugada mal formada: [True, 0, [0, 0]]",
+                       "Orientación inválida para F5: 9"]
+
+def test_pedido_malo_no_corta_la_sesion():
+    async def guion(servidor, pedir):
+        creada = await pedir({"op": "crear", "jugadores": 2, "bots": {"1": "aleatorio"}})
+        assert creada["ok"]
+        respuestas = [await pedir({"op": "crear", "jugadores": 2, "bots": ["x"]}),
+                      await pedir({"op": "crear", "jugadores": 2, "bots": "aleatorio"}),
+                      await pedir({"op": "estadisticas"})]
+        # la conexión sigue viva y su partida no se canceló
+        estado = await pedir({"op": "estado", "partida": creada["partida"]})
+        return respuestas, estado, servidor.partidas[creada["partida"]].tarea.cancelled()
+
+    class Fallido(ServidorJuegos):
+        def estadisticas(self):
+            raise RuntimeError("falla inesperada")
+
+    (lista, texto, interno), estado, cancelada = _sesion(guion, Fallido(hilos=1))
+    assert lista == {"ok": False, "error": "'bots' tiene que ser un objeto {asiento: estrategia}.", "id": 2}
+    assert texto["ok"] is False and "bots" in texto["error"]
+    assert interno["ok"] is False and "falla inesperada" in interno["error"]
+    assert estado["ok"] and not estado["terminada"] and not cancelada
@@ -0,0 +1,52 @@
+# test_torneo.py
+import json
+import threading
+import pytest
+from registro import LectorRegistro
+from torneo import correr_torneo, jugar_partida
+
+ESTRATEGIAS = ["aleatorio", "codicioso"]
+
+def _lineas(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+def _etiquetas(ruta):
+    with LectorRegistro(ruta) as lector:
+        return sorted(lector.info(n)[0] for n in range(len(lector)))
+
+def test_reanudar_no_repite_partidas(tmp_path):
+    salida, registro = str(tmp_path / "t.jsonl"), str(tmp_path / "t.blk")
+    completo = correr_torneo(ESTRATEGIAS, 2, 6, salida, procesos=1, progreso=False, registro=registro)
+    lineas = _lineas(salida)
+    with LectorRegistro(registro) as lector:
+        jugadas = {lector.info(n)[0]: lector.jugadas(n) for n in range(len(lector))}
+
+    # corte después del registro pero antes del .jsonl, y una línea rota en el medio
+    cortada = json.loads(lineas[-1])["partida"]
+    with open(salida, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas[:3] + ['{"partida": 9, "roto'] + lineas[3:-1]) + "\n")
+
+    reanudado = correr_torneo(ESTRATEGIAS, 2, 6, salida, procesos=1, progreso=False, registro=registro)
+    assert reanudado["partidas_nuevas"] == 1
+    assert reanudado["estrategias"] == completo["estrategias"]
+    partidas = [json.loads(l)["partida"] for l in _lineas(salida)[1:]]
+    assert sorted(partidas) == list(range(6))
+    assert _etiquetas(registro) == list(range(6))
+    with LectorRegistro(registro) as lector:
+        assert lector.jugadas(cortada) == jugadas[cortada]
+
+def test_reanudar_sin_registro_juega_lo_que_falta(tmp_path):
+    salida = str(tmp_path / "t.jsonl")
+    correr_torneo(ESTRATEGIAS, 2, 3, salida, procesos=1, progreso=False)
+    resumen = correr_torneo(ESTRATEGIAS, 2, 5, salida, procesos=1, progreso=False)
+    assert resumen["partidas_nuevas"] == 2
+    assert resumen["partidas"] == 5
+
+def test_jugar_partida_cierra_los_agentes():
+    pytest.importorskip("numpy")
+    config = {"estrategias": ["guiado:max_playouts=4,hilos=2", "aleatorio"], "jugadores": 2, "semilla": 0}
+    antes = threading.active_count()
+    for partida in range(3):
+        jugar_partida(config, partida)
+    assert threading.active_count() == antes
@@ -0,0 +1,59 @@
+# test_validacion_lote.py
+# El validador por lotes (NumPy) debe dar lo mismo que Mesa.validar_colocacion.
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from motor import Motor
+from repositorio_piezas import PIEZAS
+from validacion_lote import MOTIVOS, OK, ORIENTACION_INVALIDA, PIEZA_DESCONOCIDA, validar_lote, validar_todas
+
+def _posiciones():
+    rng = random.Random(11)
+    for num_jugadores, acciones in ((2, 0), (2, 6), (4, 12), (4, 40)):
+        juego = Motor(num_jugadores=num_jugadores)
+        for _ in range(acciones):
+            jugadas = juego.jugadas_legales()
+            if jugadas:
+                juego.jugar(rng.choice(jugadas))
+            else:
+                juego.pasar()
+        yield juego
+
+def _escalar(mesa, simbolo, pieza, orient, r, c):
+    if not 0 <= pieza < PIEZAS.n:
+        return PIEZA_DESCONOCIDA
+    try:
+        ok, _, motivo = mesa.validar_colocacion(simbolo, pieza, orient, (r, c))
+    except ValueError:
+        return ORIENTACION_INVALIDA
+    return OK if ok else MOTIVOS.index(motivo)
+
+@pytest.mark.parametrize("juego", list(_posiciones()))
+def test_lote_coincide_con_escalar(juego):
+    rng = random.Random(len(juego.historial))
+    mesa = juego.mesa
+    n = 3000
+    piezas = [rng.randrange(-1, PIEZAS.n + 1) for _ in range(n)]
+    orients = [rng.randrange(-1, 9) for _ in range(n)]
+    filas = [rng.randrange(-3, mesa.filas + 3) for _ in range(n)]
+    columnas = [rng.randrange(-3, mesa.columnas + 3) for _ in range(n)]
+    # y todas las legales de verdad, para que no sean todas rechazos
+    for p, o, (r, c) in juego.jugadas_legales():
+        piezas.append(p), orients.append(o), filas.append(r), columnas.append(c)
+    for jugador in juego.jugadores:
+        legal, codigos = validar_lote(mesa, jugador.simbolo, np.array(piezas), np.array(orients),
+                                      np.array(filas), np.array(columnas))
+        esperados = [_escalar(mesa, jugador.simbolo, *k) for k in zip(piezas, orients, filas, columnas)]
+        assert codigos.tolist() == esperados
+        assert legal.tolist() == [e == OK for e in esperados]
+
+@pytest.mark.parametrize("juego", list(_posiciones()))
+def test_validar_todas_coincide_con_generador(juego):
+    mesa = juego.mesa
+    for jugador in juego.jugadores:
+        legal, _ = validar_todas(mesa, jugador.simbolo)
+        ids = {mesa.indice.por_clave[(p, o, tuple(ref))]
+               for p, o, ref in mesa.jugadas_legales(jugador.simbolo, PIEZAS.todas)}
+        assert set(np.flatnonzero(legal).tolist()) == ids